@@ -0,0 +1,422 @@
+"""Throughput benchmark of the decryption entry points.
+
+Synthetic encrypted files are generated locally with the C-MAP scheme (the
+AES key and iv are derived with PBKDF2 from a random encryption key and the
+salt of an iv file), then decrypted with every combination of entry point,
+backend, chunk size, number of workers and pipelining. Each combination runs
+in a fresh process, so that its peak RSS is measured on its own.
+
+Usage:
+    python -m src.decryption.benchmark --sizes 32M 256M 4G \
+        --output benchmark.csv --baseline previous_benchmark.csv
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from src.decryption.cmap_decryption import decrypt_encrypted_file, derive_key_and_iv
+from src.decryption.decryption import FileDecryption
+from src.decryption.streaming import BACKENDS, BLOCK_SIZE, DEFAULT_CHUNK_SIZE
+
+ENTRY_POINTS = ("decrypt_single_file", "decrypt_encrypted_file")
+SIZE_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+# The synthetic plain data repeats a random block of this size, which is much
+# faster to generate than random data and as costly to decrypt
+PATTERN_SIZE = 1 << 20
+CASE_COLUMNS = [
+    "entry_point",
+    "backend",
+    "size",
+    "chunk_size",
+    "workers",
+    "pipelined",
+]
+RESULT_COLUMNS = CASE_COLUMNS + ["elapsed", "throughput", "peak_rss"]
+
+
+def parse_size(size: str) -> int:
+    """Parses a size in bytes, with an optional K, M or G suffix (powers of
+    1024), e.g. 256M."""
+    size = size.strip().upper().rstrip("B")
+    if size and size[-1] in SIZE_UNITS:
+        return int(float(size[:-1]) * SIZE_UNITS[size[-1]])
+    return int(size)
+
+
+class SyntheticFile:
+    """A synthetic encrypted file and the secrets needed to decrypt it.
+
+    Attributes:
+        encrypted_filepath (Path): the encrypted file
+        iv_filepath (Path): the iv file, holding the PBKDF2 salt
+        encryption_key (str): the encryption key, as in video_keys.csv
+        size (int): the size of the encrypted file, in bytes
+    """
+
+    __slots__ = ("encrypted_filepath", "iv_filepath", "encryption_key", "size")
+
+    def __init__(
+        self,
+        encrypted_filepath: Path,
+        iv_filepath: Path,
+        encryption_key: str,
+        size: int,
+    ):
+        self.encrypted_filepath = encrypted_filepath
+        self.iv_filepath = iv_filepath
+        self.encryption_key = encryption_key
+        self.size = size
+
+    @property
+    def key_and_iv(self) -> tuple[bytes, bytes]:
+        """The AES key and iv derived from the encryption key and salt."""
+        return derive_key_and_iv(self.iv_filepath, self.encryption_key)
+
+
+def generate_synthetic_file(data_dir: Path, size: int) -> SyntheticFile:
+    """Generates an encrypted file of the given plain size, padded with
+    PKCS7 like the C-MAP videos, or reuses the one generated by a previous
+    run.
+
+    Args:
+        data_dir: the folder where to store the synthetic files
+        size: the size of the plain data, in bytes
+
+    Returns: the synthetic file
+
+    """
+    encrypted_size = BLOCK_SIZE * (size // BLOCK_SIZE + 1)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    encrypted_filepath = data_dir.joinpath(f"synthetic_{size}.okiv")
+    iv_filepath = data_dir.joinpath(f"synthetic_{size}.iv")
+    key_filepath = data_dir.joinpath(f"synthetic_{size}.key")
+    if (
+        key_filepath.exists()
+        and iv_filepath.exists()
+        and encrypted_filepath.exists()
+        and encrypted_filepath.stat().st_size == encrypted_size
+    ):
+        return SyntheticFile(
+            encrypted_filepath,
+            iv_filepath,
+            key_filepath.read_text(encoding="utf-8"),
+            encrypted_size,
+        )
+
+    encryption_key = os.urandom(32).hex()
+    iv_filepath.write_text(os.urandom(16).hex(), encoding="utf-8")
+    key, iv = derive_key_and_iv(iv_filepath, encryption_key)
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    padder = padding.PKCS7(8 * BLOCK_SIZE).padder()
+    pattern = os.urandom(PATTERN_SIZE)
+    with open(encrypted_filepath, "wb") as encrypted_file:
+        remaining = size
+        while remaining:
+            chunk = pattern[: min(remaining, PATTERN_SIZE)]
+            encrypted_file.write(encryptor.update(padder.update(chunk)))
+            remaining -= len(chunk)
+        encrypted_file.write(encryptor.update(padder.finalize()) + encryptor.finalize())
+    # Written last, so an interrupted generation is never reused
+    key_filepath.write_text(encryption_key, encoding="utf-8")
+    return SyntheticFile(
+        encrypted_filepath, iv_filepath, encryption_key, encrypted_size
+    )
+
+
+# pylint: disable=too-many-arguments
+def _decrypt(
+    synthetic_file: SyntheticFile,
+    decrypted_filepath: Path,
+    entry_point: str,
+    backend: str,
+    chunk_size: int,
+    pipelined: bool,
+) -> int:
+    """Decrypts a synthetic file with the given entry point, and returns the
+    peak RSS of the process, in bytes."""
+    if entry_point == "decrypt_single_file":
+        key, iv = synthetic_file.key_and_iv
+        decrypted_filepath.touch()
+        FileDecryption.decrypt_single_file(
+            synthetic_file.encrypted_filepath,
+            key,
+            iv,
+            decrypted_filepath,
+            chunk_size=chunk_size,
+            pipelined=pipelined,
+            backend=backend,
+        )
+    else:
+        decrypt_encrypted_file(
+            synthetic_file.encrypted_filepath,
+            synthetic_file.iv_filepath,
+            decrypted_filepath,
+            synthetic_file.encryption_key,
+            chunk_size,
+            pipelined=pipelined,
+            backend=backend,
+        )
+    decrypted_filepath.unlink()
+    return peak_rss()
+
+
+def peak_rss() -> int:
+    """The peak resident set size of the current process, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# pylint: disable=too-many-arguments
+def run_case(
+    synthetic_file: SyntheticFile,
+    output_dir: Path,
+    entry_point: str,
+    backend: str,
+    chunk_size: int,
+    workers: int,
+    pipelined: bool,
+) -> dict:
+    """Decrypts the synthetic file once per worker, all the workers running
+    concurrently, and measures the aggregated throughput.
+
+    Args:
+        synthetic_file: the file to decrypt
+        output_dir: the folder where to write the decrypted files
+        entry_point: one of ENTRY_POINTS
+        backend: one of streaming.BACKENDS
+        chunk_size: the number of bytes decrypted at once
+        workers: the number of files decrypted in parallel
+        pipelined: True to read, decrypt and write concurrently
+
+    Returns: a dictionary with the RESULT_COLUMNS of the case
+
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    args = [
+        (
+            synthetic_file,
+            output_dir.joinpath(f"decrypted_{i}.mp4"),
+            entry_point,
+            backend,
+            chunk_size,
+            pipelined,
+        )
+        for i in range(workers)
+    ]
+    if workers <= 1:
+        start = time.perf_counter()
+        peaks = [_decrypt(*args[0])]
+        elapsed = time.perf_counter() - start
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # The workers are started before the measure
+            list(pool.map(time.sleep, [0.1] * workers))
+            start = time.perf_counter()
+            peaks = list(pool.map(_decrypt, *zip(*args)))
+            elapsed = time.perf_counter() - start
+    return {
+        "entry_point": entry_point,
+        "backend": backend,
+        "size": synthetic_file.size,
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "pipelined": pipelined,
+        "elapsed": elapsed,
+        "throughput": workers * synthetic_file.size / elapsed,
+        # With several workers, the peak of the busiest process
+        "peak_rss": max(peaks + [peak_rss()]),
+    }
+
+
+# pylint: disable=too-many-arguments, too-many-locals
+def run_benchmark(
+    data_dir: Path,
+    sizes: list[int],
+    entry_points: list[str] = ENTRY_POINTS,
+    backends: list[str] = tuple(BACKENDS),
+    chunk_sizes: list[int] = (DEFAULT_CHUNK_SIZE,),
+    workers: list[int] = (1,),
+    pipelined: list[bool] = (False,),
+    isolate: bool = True,
+) -> pd.DataFrame:
+    """Runs every combination of the given parameters.
+
+    Args:
+        data_dir: the folder where to store the synthetic and decrypted files
+        sizes: the sizes of the synthetic files, in bytes
+        entry_points: the decryption entry points to measure
+        backends: the decryption backends to measure
+        chunk_sizes: the chunk sizes to measure
+        workers: the numbers of parallel workers to measure
+        pipelined: whether to measure the sequential and/or pipelined loop
+        isolate: True to run each combination in a fresh process, so that
+         peak RSS is measured on its own
+
+    Returns: a dataframe with one row of RESULT_COLUMNS per combination
+
+    """
+    synthetic_files = [generate_synthetic_file(data_dir, size) for size in sizes]
+    results = []
+    for synthetic_file, case in itertools.product(
+        synthetic_files,
+        itertools.product(entry_points, backends, chunk_sizes, workers, pipelined),
+    ):
+        args = (synthetic_file, data_dir.joinpath("decrypted"), *case)
+        if isolate:
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                result = pool.submit(run_case, *args).result()
+        else:
+            result = run_case(*args)
+        print(
+            f"{result['entry_point']} {result['backend']} "
+            f"size={result['size']} chunk={result['chunk_size']} "
+            f"workers={result['workers']} pipelined={result['pipelined']}: "
+            f"{result['throughput'] / 1e6:.1f} MB/s, "
+            f"peak RSS {result['peak_rss'] / 1e6:.1f} MB"
+        )
+        results.append(result)
+    return pd.DataFrame(results, columns=RESULT_COLUMNS)
+
+
+def compare_to_baseline(
+    results_df: pd.DataFrame, baseline_df: pd.DataFrame, tolerance: float
+) -> pd.DataFrame:
+    """Finds the combinations whose throughput dropped compared to a
+    previous run.
+
+    Args:
+        results_df: the dataframe returned by run_benchmark()
+        baseline_df: the dataframe of a previous run
+        tolerance: the accepted relative drop of throughput (e.g. 0.1)
+
+    Returns: the regressed combinations, with their baseline and current
+    throughput
+
+    """
+    merged = results_df.merge(
+        baseline_df[CASE_COLUMNS + ["throughput"]],
+        on=CASE_COLUMNS,
+        suffixes=("", "_baseline"),
+    )
+    return merged[
+        merged["throughput"] < (1 - tolerance) * merged["throughput_baseline"]
+    ]
+
+
+def args_parser() -> argparse.Namespace:
+    """This function defines and runs the arguments' parser for the function
+    main().
+
+    Returns: a Namespace
+
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures the throughput and memory footprint of the "
+        "decryption, on synthetic encrypted files."
+    )
+    parser.add_argument(
+        "--data-dir",
+        help="the folder where to store the synthetic files (kept between "
+        "runs), defaults to a temporary folder",
+        type=Path,
+        default=None,
+    )
+    parser.add_argument(
+        "--sizes",
+        help="the sizes of the synthetic files (e.g. 32M 256M 4G)",
+        nargs="+",
+        type=parse_size,
+        default=[parse_size("32M"), parse_size("256M")],
+    )
+    parser.add_argument(
+        "--entry-points", nargs="+", choices=ENTRY_POINTS, default=ENTRY_POINTS
+    )
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS)
+    )
+    parser.add_argument(
+        "--chunk-sizes",
+        nargs="+",
+        type=parse_size,
+        default=[parse_size("64K"), DEFAULT_CHUNK_SIZE, parse_size("8M")],
+    )
+    parser.add_argument("--workers", nargs="+", type=int, default=[1])
+    parser.add_argument(
+        "--pipelined",
+        help="also measure the pipelined read/decrypt/write loop",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--output",
+        help="a .csv file where to save the results",
+        type=Path,
+        default=None,
+    )
+    parser.add_argument(
+        "--baseline",
+        help="the .csv file of a previous run: the program fails when a "
+        "combination got slower",
+        type=Path,
+        default=None,
+    )
+    parser.add_argument(
+        "--tolerance",
+        help="the accepted relative drop of throughput against the baseline",
+        type=float,
+        default=0.1,
+    )
+    return parser.parse_args()
+
+
+def main(parsed_args: argparse.Namespace) -> int:
+    """Main function that runs the benchmark, with the given parsed
+    arguments.
+
+    Args:
+        parsed_args: the inputs arguments
+
+    Returns: the exit code, 1 when a regression was found
+
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results_df = run_benchmark(
+            parsed_args.data_dir or Path(tmp_dir),
+            parsed_args.sizes,
+            parsed_args.entry_points,
+            parsed_args.backends,
+            parsed_args.chunk_sizes,
+            parsed_args.workers,
+            [False, True] if parsed_args.pipelined else [False],
+        )
+    if parsed_args.output is not None:
+        results_df.to_csv(parsed_args.output, index=False)
+    if parsed_args.baseline is None:
+        return 0
+    regressions = compare_to_baseline(
+        results_df, pd.read_csv(parsed_args.baseline), parsed_args.tolerance
+    )
+    if regressions.empty:
+        return 0
+    print("Throughput regressions:")
+    print(regressions.to_string(index=False))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(args_parser()))
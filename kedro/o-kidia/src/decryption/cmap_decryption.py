@@ -1,20 +1,62 @@
 """Module that assert the integrity of the C-MAP dataset and decrypts its
 video files.
 """
+from __future__ import annotations
+
 import argparse
+import os
+import time
+from contextlib import suppress
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterator, Tuple
 
 import pandas as pd
-from Crypto.Cipher import AES
 from Crypto.Protocol.KDF import PBKDF2
 
+from src.decryption.key_index import INDEX_DIRNAME, VideoKeyIndex
+from src.decryption.manifest import MANIFEST_FILENAME, DecryptionManifest
+from src.decryption.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    DecryptionStats,
+    get_backend,
+    pipelined_decrypt,
+    stream_decrypt,
+)
+from src.decryption.verification import StreamVerifier, verify_file
 from src.utils.definitions import (
     CMAP_DATASET_COLUMNS,
-    CMAP_ROOT_LOC,
+    CMAP_ROOT_DIR,
     CMAP_TARGET_DIR,
 )
 from src.utils.exceptions import UnexpectedFormatError
 
+# Minimum delay between two writes of the manifest during a run, in seconds
+MANIFEST_SAVE_INTERVAL = 5.0
+RESULT_COLUMNS = [
+    "session_id",
+    "filename",
+    "tag",
+    "status",
+    "bytes_read",
+    "elapsed",
+    "throughput",
+    "error",
+    "decrypted_filepath",
+    "sha256",
+    "read_time",
+    "decrypt_time",
+    "write_time",
+    "valid_container",
+    "valid_padding",
+]
+
 
 def load_cmap_video_keys(file_path: Path) -> pd.DataFrame:
     """
@@ -39,7 +81,7 @@ def load_cmap_video_keys(file_path: Path) -> pd.DataFrame:
     # Load the file: it should have a header that contains 5 fields
     try:
         dataframe = pd.read_csv(file_path, sep=",", header=0)
-        assert dataframe.columns == CMAP_DATASET_COLUMNS
+        assert list(dataframe.columns) == CMAP_DATASET_COLUMNS
     except Exception as ex:
         print(ex)
         raise UnexpectedFormatError(
@@ -48,6 +90,54 @@ def load_cmap_video_keys(file_path: Path) -> pd.DataFrame:
     return dataframe
 
 
+def load_video_key_index(
+    file_path: Path, cache_dir: Path | None = None
+) -> VideoKeyIndex:
+    """Load the index of the C-MAP video keys by session and tag. The index
+    is cached in cache_dir, e.g. the output directory, until the .csv file
+    changes: the .csv file is then not parsed again, and only the selected
+    rows are read from the cache. The raw C-MAP directory is never written
+    to.
+
+    Args:
+        file_path: a Path pointing to the .csv file of the C-MAP dataset
+        cache_dir: the directory where the index is cached, None to always
+         build the index
+
+    Returns: the index of the C-MAP video keys
+
+    """
+    if cache_dir is None:
+        return VideoKeyIndex(load_cmap_video_keys(file_path))
+    cache_path = cache_dir.joinpath(INDEX_DIRNAME)
+    index = VideoKeyIndex.from_cache(cache_path, file_path)
+    if index is None:
+        index = VideoKeyIndex(load_cmap_video_keys(file_path))
+        index.save(cache_path, file_path)
+    return index
+
+
+def decrypted_file_location(
+    output_dir_path: Path, session_id: str, video_tag: str, filename: str
+) -> Path:
+    """The path where the decrypted file of a video is located.
+
+    Args:
+        output_dir_path (Path): the decrypted data root location
+        session_id (str): the id session of the encrypted file
+        video_tag (str): the associated video tag (e.g. ScreenCalibration)
+        filename (str): the video name (xxx.mp4.enc)
+
+    Returns: a path pointing to the decrypted file location
+
+    """
+    return output_dir_path.joinpath(
+        "decrypted_videos",
+        session_id,
+        video_tag + "_" + Path(filename).stem,
+    ).resolve()
+
+
 def find_decrypted_file(
     encrypted_filepath: Path,
     output_dir_path: Path,
@@ -71,11 +161,9 @@ def find_decrypted_file(
     Raises: FileExistsError
 
     """
-    decrypted_filepath = output_dir_path.joinpath(
-        "decrypted_videos",
-        session_id,
-        video_tag + "_" + encrypted_filepath.stem,
-    ).resolve()
+    decrypted_filepath = decrypted_file_location(
+        output_dir_path, session_id, video_tag, encrypted_filepath.name
+    )
     # If the decrypted file already exists, and we don't want to replace it,
     # raise exception
     if decrypted_filepath.exists() and not replace_files:
@@ -87,28 +175,43 @@ def find_decrypted_file(
     return decrypted_filepath
 
 
-def decrypt_encrypted_file(
-    encrypted_filepath: Path,
-    iv_filepath: Path,
-    decrypted_file_path: Path,
-    encryption_key: str,
-) -> None:
-    """Decrypts a video file and create a new (decrypted) file.
+def derive_key_and_iv(
+    iv_filepath: Path, encryption_key: str
+) -> Tuple[bytes, bytes]:
+    """Derives the AES key and iv of an encrypted video from its encryption
+    key and the salt stored in the associated iv file.
 
     Args:
-        encrypted_filepath (Path): a path pointing to the encrypted file
         iv_filepath (Path): a path pointing to the associated iv file
-        decrypted_file_path (Path): a path pointing to the output root location
         encryption_key (str): a string representing the encryption key
          associated with the file
 
-    Returns: nothing
+    Returns: a tuple that contains the AES key and the CBC iv
 
     """
-    # Retrieve iv from file
+    return derive_key_and_iv_from_salt(
+        iv_filepath.read_text(encoding="utf-8"), encryption_key
+    )
+
+
+def derive_key_and_iv_from_salt(
+    salt: str, encryption_key: str
+) -> Tuple[bytes, bytes]:
+    """Derives the AES key and iv of an encrypted video from its encryption
+    key and the content of the associated iv file.
+
+    Args:
+        salt (str): the content of the iv file, an hexadecimal string
+        encryption_key (str): a string representing the encryption key
+         associated with the file
+
+    Returns: a tuple that contains the AES key and the CBC iv
+
+    """
+    # Retrieve iv from file content
     iv_b: bytes = bytearray.fromhex(
         # We want the 32 first characters only (no escape characters!)
-        iv_filepath.read_text(encoding="utf-8")[:32]
+        salt[:32]
     )
     iv_b = iv_b.decode("unicode-escape").encode("raw_unicode_escape")
 
@@ -119,32 +222,51 @@ def decrypt_encrypted_file(
     pbkdf = PBKDF2(password=key, salt=iv_b, dkLen=48, count=1042)
 
     # Retrieve key and iv
-    key = pbkdf[:32]
-    iv_b = pbkdf[32:]
+    return pbkdf[:32], pbkdf[32:]
+
+
+def decrypt_encrypted_file(
+    encrypted_filepath: Path,
+    iv_filepath: Path,
+    decrypted_file_path: Path,
+    encryption_key: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    hasher=None,
+    pipelined: bool = False,
+    backend: str = "pycryptodome",
+) -> DecryptionStats:
+    """Decrypts a video file and create a new (decrypted) file.
+
+    Args:
+        encrypted_filepath (Path): a path pointing to the encrypted file
+        iv_filepath (Path): a path pointing to the associated iv file
+        decrypted_file_path (Path): a path pointing to the output root location
+        encryption_key (str): a string representing the encryption key
+         associated with the file
+        chunk_size (int): the number of bytes decrypted at once, the memory
+         used does not depend on the file size
+        hasher: an optional hashlib hash (or verification.StreamVerifier),
+         fed with the decrypted data
+        pipelined (bool): True to read, decrypt and write concurrently (see
+         streaming.pipelined_decrypt)
+        backend (str): the name of the decryption backend (see
+         streaming.BACKENDS)
+
+    Returns: the decryption statistics (bytes processed, throughput)
+
+    """
+    key, iv_b = derive_key_and_iv(iv_filepath, encryption_key)
 
     # Create the cipher
-    cipher = AES.new(key, AES.MODE_CBC, iv_b)
+    decryptor = get_backend(backend, key, iv_b)
 
-    # Open the new file for decrypted data
+    # Open the new file for decrypted data, and decrypt chunk by chunk
     with open(decrypted_file_path, mode="wb") as decrypted_file:
-        # Bytes buffer
-        buffer = b""
         with open(encrypted_filepath, "rb") as encrypted_file:
-            # Read the encrypted file, by lines
-            lines: list[bytes] = encrypted_file.readlines()
-
-            # Process each line...
-            line: bytes
-            for line in lines:
-                if buffer != b"":
-                    data = buffer + line
-                else:
-                    data = line
-                buffer = data[16 * (len(data) // 16):]  # fmt: skip
-                data = data[: 16 * (len(data) // 16)]
-                # Then decrypt this data and write it to the file
-                decrypted = cipher.decrypt(data)
-                decrypted_file.write(decrypted)
+            decrypt = pipelined_decrypt if pipelined else stream_decrypt
+            return decrypt(
+                encrypted_file, decrypted_file, decryptor, chunk_size, hasher
+            )
 
 
 def find_encrypted_file(
@@ -174,13 +296,137 @@ def find_encrypted_file(
     )
 
 
+class DecryptionResult:
+    """Outcome of the decryption of a single video of the C-MAP dataset.
+
+    Attributes:
+        session_id (str): the session ID of the video
+        filename (str): the encrypted video name (xxx.mp4.enc)
+        tag (str): the associated video tag (e.g. ScreenCalibration)
+        status (str): one of SUCCESS, SKIPPED, INVALID (decrypted, but
+         the decrypted data failed the integrity checks) or FAILED
+        bytes_read (int): number of encrypted bytes decrypted
+        elapsed (float): duration of the decryption, in seconds
+        error (str | None): the error message when the video was skipped,
+         invalid or could not be decrypted
+        decrypted_filepath (str | None): the location of the decrypted file
+        sha256 (str | None): the SHA-256 checksum of the decrypted file
+        read_time (float): time spent reading the encrypted file
+        decrypt_time (float): time spent decrypting
+        write_time (float): time spent writing the decrypted file
+        valid_container (bool | None): True when the decrypted file starts
+         with an MP4 'ftyp' box, None when it was not checked
+        valid_padding (bool | None): True when the decrypted file ends with
+         a valid PKCS7 padding, None when it was not checked
+    """
+
+    SUCCESS = "success"
+    SKIPPED = "skipped"
+    INVALID = "invalid"
+    FAILED = "failed"
+
+    __slots__ = (
+        "session_id",
+        "filename",
+        "tag",
+        "status",
+        "bytes_read",
+        "elapsed",
+        "error",
+        "decrypted_filepath",
+        "sha256",
+        "read_time",
+        "decrypt_time",
+        "write_time",
+        "valid_container",
+        "valid_padding",
+    )
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        session_id: str,
+        filename: str,
+        tag: str,
+        status: str,
+        bytes_read: int = 0,
+        elapsed: float = 0.0,
+        error: str | None = None,
+        decrypted_filepath: str | None = None,
+        sha256: str | None = None,
+        read_time: float = 0.0,
+        decrypt_time: float = 0.0,
+        write_time: float = 0.0,
+        valid_container: bool | None = None,
+        valid_padding: bool | None = None,
+    ):
+        self.session_id = session_id
+        self.filename = filename
+        self.tag = tag
+        self.status = status
+        self.bytes_read = bytes_read
+        self.elapsed = elapsed
+        self.error = error
+        self.decrypted_filepath = decrypted_filepath
+        self.sha256 = sha256
+        self.read_time = read_time
+        self.decrypt_time = decrypt_time
+        self.write_time = write_time
+        self.valid_container = valid_container
+        self.valid_padding = valid_padding
+
+    @property
+    def throughput(self) -> float:
+        """Decryption throughput, in bytes per second."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_read / self.elapsed
+
+    def asdict(self) -> dict:
+        """Convert the DecryptionResult object to a dictionary
+
+        Returns:
+            dict: The dictionary representation of the DecryptionResult
+        """
+        return {
+            "session_id": self.session_id,
+            "filename": self.filename,
+            "tag": self.tag,
+            "status": self.status,
+            "bytes_read": self.bytes_read,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "error": self.error,
+            "decrypted_filepath": self.decrypted_filepath,
+            "sha256": self.sha256,
+            "read_time": self.read_time,
+            "decrypt_time": self.decrypt_time,
+            "write_time": self.write_time,
+            "valid_container": self.valid_container,
+            "valid_padding": self.valid_padding,
+        }
+
+
+def _failed(row_df: pd.Series, ex: BaseException) -> DecryptionResult:
+    """The result of a video that could not be decrypted or verified."""
+    (session_id, filename, _, tag, _) = row_df.values
+    return DecryptionResult(
+        session_id,
+        filename,
+        tag,
+        DecryptionResult.FAILED,
+        error=f"{type(ex).__name__}: {ex}",
+    )
+
+
 def decrypt_videos_from_df_row(
     row_df: pd.Series,
     input_dir: Path,
     output_dir: Path,
     replace_files: bool,
     check_integrity: bool,
-) -> None:
+    pipelined: bool = False,
+) -> DecryptionResult:
     """
     The decryption process of a single line from the dataframe that contains
     all the information about the C-MAP dataset.
@@ -194,17 +440,20 @@ def decrypt_videos_from_df_row(
         decrypted file if they already exist, False otherwise
         check_integrity: a boolean that is True for the function to check if
         the input and output files are already existing
+        pipelined: a boolean that is True to read, decrypt and write the
+        video concurrently
 
-    Returns: nothing
+    Returns: the result of the decryption of the video
 
     """
     # Unpacking the line of the dataframe
     (session_id, filename, key, tag, filesize) = row_df.values
-    # Find the video file path to decrypt
-    encrypted_file_path, iv_file_path = find_encrypted_file(
-        input_dir, session_id, filename
-    )
+    partial_filepath = None
     try:
+        # Find the video file path to decrypt
+        encrypted_file_path, iv_file_path = find_encrypted_file(
+            input_dir, session_id, filename
+        )
         # Check if there is a file there...
         if not encrypted_file_path.exists() and check_integrity:
             raise FileNotFoundError(
@@ -232,21 +481,395 @@ def decrypt_videos_from_df_row(
             tag,
             replace_files,
         )
-        # We decrypt the video, and store it in the location defined by
-        # decrypted_filepath
-        decrypt_encrypted_file(
+        # We decrypt the video in a temporary file, renamed to the location
+        # defined by decrypted_filepath once complete: an interrupted
+        # decryption never leaves a truncated video behind
+        partial_filepath = decrypted_filepath.with_name(
+            decrypted_filepath.name + ".part"
+        )
+        # The decrypted data is checked while it is written
+        verifier = StreamVerifier()
+        stats = decrypt_encrypted_file(
             encrypted_file_path,
             iv_file_path,
-            decrypted_filepath,
+            partial_filepath,
             key,
+            hasher=verifier,
+            pipelined=pipelined,
+        )
+        os.replace(partial_filepath, decrypted_filepath)
+    except FileExistsError as ex:
+        return DecryptionResult(
+            session_id, filename, tag, DecryptionResult.SKIPPED, error=str(ex)
         )
     except (
-        FileNotFoundError,
+        OSError,
         AssertionError,
-        FileExistsError,
         UnicodeDecodeError,
+        ValueError,
     ) as ex:
-        print(ex)
+        return _failed(row_df, ex)
+    finally:
+        # A failed or interrupted decryption leaves no partial file behind
+        # (once renamed, there is none left to remove)
+        if partial_filepath is not None:
+            with suppress(OSError):
+                partial_filepath.unlink()
+    errors = verifier.errors()
+    return DecryptionResult(
+        session_id,
+        filename,
+        tag,
+        DecryptionResult.INVALID if errors else DecryptionResult.SUCCESS,
+        stats.bytes_read,
+        stats.elapsed,
+        error="; ".join(errors) or None,
+        decrypted_filepath=str(decrypted_filepath),
+        sha256=verifier.hexdigest(),
+        read_time=stats.read_time,
+        decrypt_time=stats.decrypt_time,
+        write_time=stats.write_time,
+        valid_container=verifier.valid_container,
+        valid_padding=verifier.valid_padding,
+    )
+
+
+def verify_decrypted_video(
+    row_df: pd.Series, output_dir: Path, sha256: str | None = None
+) -> DecryptionResult:
+    """Checks the already decrypted file of a video, without decrypting it
+    again.
+
+    Args:
+        row_df: a pandas Series with information about one encrypted video
+        output_dir: the folder where the decrypted videos are stored
+        sha256: the expected SHA-256 checksum of the decrypted file (e.g.
+        from the manifest), not checked when None
+
+    Returns: the result of the verification of the video, FAILED when the
+    decrypted file is missing or its checksum does not match
+
+    """
+    (session_id, filename, _, tag, _) = row_df.values
+    decrypted_filepath = decrypted_file_location(
+        output_dir, session_id, tag, filename
+    )
+    start = time.perf_counter()
+    try:
+        verifier = verify_file(decrypted_filepath)
+    except OSError as ex:
+        return _failed(row_df, ex)
+    errors = verifier.errors()
+    status = DecryptionResult.INVALID if errors else DecryptionResult.SUCCESS
+    if sha256 is not None and verifier.hexdigest() != sha256:
+        status = DecryptionResult.FAILED
+        errors.insert(0, "SHA-256 checksum does not match the manifest")
+    return DecryptionResult(
+        session_id,
+        filename,
+        tag,
+        status,
+        verifier.size,
+        time.perf_counter() - start,
+        error="; ".join(errors) or None,
+        decrypted_filepath=str(decrypted_filepath),
+        sha256=verifier.hexdigest(),
+        valid_container=verifier.valid_container,
+        valid_padding=verifier.valid_padding,
+    )
+
+
+def _imap_unordered(
+    function: Callable[..., DecryptionResult],
+    tasks: list[tuple[pd.Series, tuple]],
+    workers: int,
+    executor: str,
+) -> Iterator[tuple[pd.Series, DecryptionResult]]:
+    """Calls function on the arguments of each task, spreading them across a
+    pool of workers, and yields each task row with its result as soon as it
+    is available. A task that raises an unexpected error (e.g. a crashed
+    worker) fails on its own, without stopping the others."""
+    if workers <= 1:
+        for row, args in tasks:
+            try:
+                result = function(*args)
+            except Exception as ex:  # pylint: disable=broad-except
+                result = _failed(row, ex)
+            yield row, result
+        return
+    pool: Executor = (
+        ThreadPoolExecutor(max_workers=workers)
+        if executor == "thread"
+        else ProcessPoolExecutor(max_workers=workers)
+    )
+    with pool:
+        futures = {pool.submit(function, *args): row for row, args in tasks}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as ex:  # pylint: disable=broad-except
+                result = _failed(futures[future], ex)
+            yield futures[future], result
+
+
+def _iter_decryptions(
+    rows: list[tuple[pd.Series, bool]],
+    input_dir: Path,
+    output_dir: Path,
+    check_integrity: bool,
+    workers: int,
+    executor: str,
+    pipelined: bool,
+) -> Iterator[tuple[pd.Series, DecryptionResult]]:
+    """Decrypts the given rows, each with its own replace_files flag, and
+    yields them with their result as soon as they are decrypted."""
+    return _imap_unordered(
+        decrypt_videos_from_df_row,
+        [
+            (
+                row,
+                (
+                    row,
+                    input_dir,
+                    output_dir,
+                    replace_files,
+                    check_integrity,
+                    pipelined,
+                ),
+            )
+            for row, replace_files in rows
+        ],
+        workers,
+        executor,
+    )
+
+
+# pylint: disable=too-many-arguments, too-many-locals
+def decrypt_videos(
+    keys_df: pd.DataFrame,
+    input_dir: Path,
+    output_dir: Path,
+    replace_files: bool,
+    check_integrity: bool,
+    workers: int = 1,
+    executor: str = "process",
+    manifest: DecryptionManifest | None = None,
+    pipelined: bool = False,
+) -> pd.DataFrame:
+    """Decrypts all the videos listed in the C-MAP keys dataframe, spreading
+    them across a pool of workers.
+
+    When a manifest is given, the videos it records as already decrypted
+    from the same encrypted file and key are skipped, the others are
+    decrypted and recorded as soon as they succeed, so that an interrupted
+    run resumes where it stopped. replace_files still applies to them: when
+    it is False, a decrypted file the manifest does not know yet (e.g.
+    decrypted before the manifest was used) is checked and recorded instead
+    of being decrypted again, and one decrypted from a file that changed
+    since is kept and skipped.
+
+    Args:
+        keys_df: the dataframe loaded by load_cmap_video_keys()
+        input_dir: a Path pointing at the C-MAP data root folder
+        output_dir: the target folder, where to store the decrypted videos
+        replace_files: a boolean that is True when we want to replace the
+        decrypted file if they already exist, False otherwise
+        check_integrity: a boolean that is True for the function to check if
+        the input and output files are already existing
+        workers: the number of videos decrypted in parallel
+        executor: "process" or "thread", the kind of pool used when workers
+        is greater than 1
+        manifest: the manifest of the videos already decrypted
+        pipelined: a boolean that is True to read, decrypt and write each
+        video concurrently
+
+    Returns: a dataframe with one DecryptionResult per video
+
+    """
+    results: list[DecryptionResult] = []
+    rows: list[tuple[pd.Series, bool]] = []
+    adopted: list[pd.Series] = []
+    for _, row in keys_df.iterrows():
+        if manifest is None:
+            rows.append((row, replace_files))
+            continue
+        (session_id, filename, key, tag, _) = row.values
+        encrypted_file_path, _ = find_encrypted_file(
+            input_dir, session_id, filename
+        )
+        if manifest.is_up_to_date(
+            session_id, filename, encrypted_file_path, key
+        ):
+            results.append(
+                DecryptionResult(
+                    session_id,
+                    filename,
+                    tag,
+                    DecryptionResult.SKIPPED,
+                    error="Already decrypted (see manifest)",
+                )
+            )
+        elif (
+            replace_files
+            or not decrypted_file_location(
+                output_dir, session_id, tag, filename
+            ).exists()
+        ):
+            rows.append((row, replace_files))
+        elif manifest.entry_name(session_id, filename) in manifest.entries:
+            results.append(
+                DecryptionResult(
+                    session_id,
+                    filename,
+                    tag,
+                    DecryptionResult.SKIPPED,
+                    error="Changed since it was decrypted (see manifest), "
+                    "the decrypted file is kept as files are not replaced",
+                )
+            )
+        elif encrypted_file_path.exists():
+            adopted.append(row)
+        else:
+            rows.append((row, replace_files))
+
+    last_save = time.monotonic()
+    try:
+        # The decrypted files unknown to the manifest are checked, then
+        # recorded as they are
+        for row, result in _imap_unordered(
+            verify_decrypted_video,
+            [(row, (row, output_dir)) for row in adopted],
+            workers,
+            executor,
+        ):
+            if result.status == DecryptionResult.SUCCESS:
+                (session_id, filename, key, _, _) = row.values
+                manifest.record(
+                    session_id,
+                    filename,
+                    find_encrypted_file(input_dir, session_id, filename)[0],
+                    key,
+                    Path(result.decrypted_filepath),
+                    result.sha256,
+                )
+                result.status = DecryptionResult.SKIPPED
+                result.error = "Already decrypted, added to the manifest"
+            results.append(result)
+        for row, result in _iter_decryptions(
+            rows,
+            input_dir,
+            output_dir,
+            check_integrity,
+            workers,
+            executor,
+            pipelined,
+        ):
+            results.append(result)
+            if (
+                manifest is not None
+                and result.status == DecryptionResult.SUCCESS
+            ):
+                (session_id, filename, key, _, _) = row.values
+                manifest.record(
+                    session_id,
+                    filename,
+                    find_encrypted_file(input_dir, session_id, filename)[0],
+                    key,
+                    Path(result.decrypted_filepath),
+                    result.sha256,
+                )
+                if time.monotonic() - last_save > MANIFEST_SAVE_INTERVAL:
+                    manifest.save()
+                    last_save = time.monotonic()
+    finally:
+        if manifest is not None:
+            manifest.save()
+    return pd.DataFrame(
+        [result.asdict() for result in results],
+        columns=RESULT_COLUMNS,
+    )
+
+
+def verify_videos(
+    keys_df: pd.DataFrame,
+    output_dir: Path,
+    workers: int = 1,
+    executor: str = "process",
+    manifest: DecryptionManifest | None = None,
+) -> pd.DataFrame:
+    """Checks the already decrypted videos listed in the C-MAP keys
+    dataframe, spreading them across a pool of workers. Nothing is
+    decrypted.
+
+    Args:
+        keys_df: the dataframe loaded by load_cmap_video_keys()
+        output_dir: the folder where the decrypted videos are stored
+        workers: the number of videos checked in parallel
+        executor: "process" or "thread", the kind of pool used when workers
+        is greater than 1
+        manifest: the manifest of the decrypted videos, whose checksums are
+        compared to the decrypted files
+
+    Returns: a dataframe with one DecryptionResult per video
+
+    """
+    tasks = []
+    for _, row in keys_df.iterrows():
+        sha256 = None
+        if manifest is not None:
+            entry = manifest.entries.get(
+                manifest.entry_name(row["Session"], row["Filename"])
+            )
+            sha256 = entry.sha256 if entry is not None else None
+        tasks.append((row, (row, output_dir, sha256)))
+    return pd.DataFrame(
+        [
+            result.asdict()
+            for _, result in _imap_unordered(
+                verify_decrypted_video, tasks, workers, executor
+            )
+        ],
+        columns=RESULT_COLUMNS,
+    )
+
+
+def summarize_results(
+    results_df: pd.DataFrame, wall_time: float
+) -> pd.DataFrame:
+    """Aggregates the per-video results by status.
+
+    Args:
+        results_df: the dataframe returned by decrypt_videos()
+        wall_time: the total duration of the run, in seconds
+
+    Returns: a dataframe with, for each status, the number of videos, the
+    number of bytes decrypted, the throughput over the whole run and the
+    busy time of each decryption stage
+
+    """
+    summary = (
+        results_df.groupby("status")
+        .agg(
+            files=("filename", "count"),
+            bytes_read=("bytes_read", "sum"),
+            read_time=("read_time", "sum"),
+            decrypt_time=("decrypt_time", "sum"),
+            write_time=("write_time", "sum"),
+        )
+        .reindex(
+            [
+                DecryptionResult.SUCCESS,
+                DecryptionResult.SKIPPED,
+                DecryptionResult.INVALID,
+                DecryptionResult.FAILED,
+            ],
+            fill_value=0,
+        )
+    )
+    summary["throughput"] = (
+        summary["bytes_read"] / wall_time if wall_time > 0 else 0.0
+    )
+    return summary
 
 
 def args_parser() -> argparse.Namespace:
@@ -275,13 +898,75 @@ def args_parser() -> argparse.Namespace:
     parser.add_argument(
         "--cmap-root",
         type=Path,
-        default=CMAP_ROOT_LOC,
+        default=CMAP_ROOT_DIR,
     )
     parser.add_argument(
         "--output-dir",
         type=Path,
         default=CMAP_TARGET_DIR,
     )
+    parser.add_argument(
+        "--sessions",
+        help="only decrypt the videos of these session IDs",
+        nargs="+",
+        default=None,
+    )
+    parser.add_argument(
+        "--tags",
+        help="only decrypt the videos with these tags (e.g. "
+        "ScreenCalibration)",
+        nargs="+",
+        default=None,
+    )
+    parser.add_argument(
+        "--since",
+        help="only decrypt the videos of the sessions started at or after "
+        "this date (ISO format, e.g. 2021-11-09)",
+        type=datetime.fromisoformat,
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        help="the number of videos decrypted in parallel",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--executor",
+        help="the kind of pool used when --workers is greater than 1",
+        choices=["process", "thread"],
+        default="process",
+    )
+    parser.add_argument(
+        "--pipelined",
+        help="a flag that overlaps the reading, decryption and writing of "
+        "each video",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--verify-only",
+        help="a flag that only checks the already decrypted videos "
+        "(checksum, MP4 container and padding), without decrypting them",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="the manifest of the decrypted videos (defaults to "
+        f"{MANIFEST_FILENAME} in the output directory)",
+        type=Path,
+        default=None,
+    )
+    parser.add_argument(
+        "--no-manifest",
+        help="a flag that disables the manifest: every video is processed",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--report",
+        help="a .csv file where to save the result of each video",
+        type=Path,
+        default=None,
+    )
     return parser.parse_args()
 
 
@@ -299,21 +984,54 @@ def main(parsed_args: argparse.Namespace) -> None:
         Path("Videos keys/video_keys.csv")
     )
 
-    # Load the .csv file with the wrap function
-    keys_df: pd.DataFrame = load_cmap_video_keys(cmap_videos_keys_file_path)
+    # Load the index of the .csv file, and only keep the requested videos
+    keys_df: pd.DataFrame = load_video_key_index(
+        cmap_videos_keys_file_path, parsed_args.output_dir.resolve()
+    ).select(parsed_args.sessions, parsed_args.tags, parsed_args.since)
 
-    # Vectorize, for each line we decrypt the video and store it to the
-    # target_dir
-    keys_df.apply(
-        lambda x: decrypt_videos_from_df_row(
-            x,
+    manifest = None
+    if not parsed_args.no_manifest:
+        manifest = DecryptionManifest(
+            parsed_args.manifest
+            or parsed_args.output_dir.resolve().joinpath(MANIFEST_FILENAME)
+        )
+
+    start = time.perf_counter()
+    if parsed_args.verify_only:
+        results_df = verify_videos(
+            keys_df,
+            parsed_args.output_dir.resolve(),
+            parsed_args.workers,
+            parsed_args.executor,
+            manifest,
+        )
+    else:
+        # For each line we decrypt the video and store it to the target_dir
+        results_df = decrypt_videos(
+            keys_df,
             parsed_args.cmap_root.resolve(),
             parsed_args.output_dir.resolve(),
             parsed_args.overwrite,
             parsed_args.check_integrity,
-        ),
-        axis=1,
-    )
+            parsed_args.workers,
+            parsed_args.executor,
+            manifest,
+            parsed_args.pipelined,
+        )
+    wall_time = time.perf_counter() - start
+
+    failures = results_df[
+        results_df["status"].isin(
+            [DecryptionResult.INVALID, DecryptionResult.FAILED]
+        )
+    ]
+    for _, failure in failures.iterrows():
+        print(
+            f"{failure['session_id']}/{failure['filename']}: {failure['error']}"
+        )
+    print(summarize_results(results_df, wall_time).to_string())
+    if parsed_args.report is not None:
+        results_df.to_csv(parsed_args.report, index=False)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,13 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from src.decryption.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    DecryptionStats,
+    get_backend,
+    pipelined_decrypt,
+    stream_decrypt,
+)
 
 
 class FileDecryption:
@@ -18,7 +24,10 @@ class FileDecryption:
         salt: bytes | str,
         decrypted_filepath: Path,
         override=True,
-    ) -> None:
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        pipelined: bool = False,
+        backend: str = "cryptography",
+    ) -> DecryptionStats:
         """Decrypts a single encrypted file, using given key and salt, with AES
         algorithm in CBC mode, and write decrypted data to another given
         location. If the output file already exists, it is overriden only if the
@@ -31,8 +40,14 @@ class FileDecryption:
             decrypted_filepath: the file path for decrypted data
             override: a boolean indicating whether to override an already
             existing decrypted file.
+            chunk_size: the number of bytes decrypted at once, the memory
+            used does not depend on the file size.
+            pipelined: a boolean indicating whether to read, decrypt and
+            write concurrently (see streaming.pipelined_decrypt).
+            backend: the name of the decryption backend (see
+            streaming.BACKENDS).
 
-        Returns: None.
+        Returns: the decryption statistics (bytes processed, throughput).
 
         """
         # Files checks (is not a directory, exists, can be overriden)
@@ -76,21 +91,12 @@ class FileDecryption:
             salt = bytearray.fromhex(salt)
 
         # Create cipher decryptor
-        try:
-            decryptor = Cipher(
-                algorithms.AES(key), modes.CBC(salt)
-            ).decryptor()
-        except ValueError:
-            raise
+        decryptor = get_backend(backend, bytes(key), bytes(salt))
 
-        # Open input and output files, read/write bytes
+        # Open input and output files, decrypt chunk by chunk
         with open(encrypted_filepath, mode="rb") as encrypted_file:
             with open(decrypted_filepath, mode="wb") as decrypted_file:
-                # Decrypt data as a whole
-                # Warning: What if the file is too big? Look up cryptography
-                # update_into() function with fixed buffer size.
-                data: bytes = encrypted_file.read()
-                decrypted_data: bytes = (
-                    decryptor.update(data) + decryptor.finalize()
+                decrypt = pipelined_decrypt if pipelined else stream_decrypt
+                return decrypt(
+                    encrypted_file, decrypted_file, decryptor, chunk_size
                 )
-                decrypted_file.write(decrypted_data)
@@ -0,0 +1,244 @@
+"""Index of the C-MAP video keys by session and tag, so that a targeted
+decryption only touches the matching rows of video_keys.csv.
+
+The index is cached in the output directory as memory-mapped columns, so a
+run on an unchanged keys file neither parses it nor reads the rows it does
+not select.
+"""
+from __future__ import annotations
+
+import json
+import os
+from contextlib import suppress
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Sessions are named after their start date, e.g. 2021_11_09_14_20_56_267
+SESSION_DATE_FORMAT = "%Y_%m_%d_%H_%M_%S"
+SESSION_DATE_LENGTH = len("2021_11_09_14_20_56")
+INDEX_VERSION = 3
+# The cache of the index, a directory written in the output directory
+INDEX_DIRNAME = "video_keys.index"
+
+
+# The distinct values of a column, sorted, the offset of the positions of
+# each value, and the row positions grouped by value
+Groups = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def session_date(session_id: str) -> datetime | None:
+    """Parses the start date of a session from its ID.
+
+    Args:
+        session_id: the session ID
+
+    Returns: the start date of the session, or None when the session ID is
+    not a date
+
+    """
+    try:
+        return datetime.strptime(session_id[:SESSION_DATE_LENGTH], SESSION_DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def _groups(column: np.ndarray) -> Groups:
+    """Groups the row positions of a column of strings by value."""
+    positions = np.argsort(column, kind="stable").astype(np.int64)
+    sorted_column = column[positions]
+    first = np.ones(len(column), dtype=bool)
+    first[1:] = sorted_column[1:] != sorted_column[:-1]
+    starts = np.flatnonzero(first)
+    return sorted_column[starts], np.append(starts, len(column)), positions
+
+
+def _lookup(groups: Groups, values: Iterable[str]) -> np.ndarray:
+    """The sorted row positions of the rows holding one of the values."""
+    distinct, offsets, positions = groups
+    matches = []
+    for value in set(values):
+        group = int(np.searchsorted(distinct, value))
+        if group < len(distinct) and distinct[group] == value:
+            matches.append(positions[offsets[group] : offsets[group + 1]])
+    if not matches:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(matches))
+
+
+class VideoKeyIndex:
+    """The C-MAP video keys, with the row positions of each session and tag.
+
+    Attributes:
+        columns (dict[str, np.ndarray]): the columns of video_keys.csv, by
+         name, the text ones as arrays of strings
+        sessions (Groups): row positions of each session
+        tags (Groups): row positions of each video tag
+        dates (np.ndarray): start date of the session of each row (NaT when
+         the session ID is not a date)
+
+    The arrays of an index loaded from its cache are memory-mapped, so only
+    the selected rows are read.
+    """
+
+    __slots__ = ("columns", "sessions", "tags", "dates")
+
+    def __init__(self, keys_df: pd.DataFrame):
+        self.columns: dict[str, np.ndarray] = {
+            name: column.to_numpy()
+            if pd.api.types.is_numeric_dtype(column)
+            else column.to_numpy(dtype=str)
+            for name, column in keys_df.items()
+        }
+        self.sessions = _groups(self.columns["Session"])
+        self.tags = _groups(self.columns["Tag"])
+        self.dates = np.array(
+            [
+                np.datetime64(date) if date else np.datetime64("NaT")
+                for date in map(session_date, self.columns["Session"])
+            ],
+            dtype="datetime64[s]",
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def select(
+        self,
+        sessions: Iterable[str] | None = None,
+        tags: Iterable[str] | None = None,
+        since: datetime | None = None,
+    ) -> pd.DataFrame:
+        """Selects the rows matching all the given criteria.
+
+        Args:
+            sessions: the session IDs to keep, all when None
+            tags: the video tags to keep, all when None
+            since: only keep the sessions started at or after this date
+
+        Returns: the matching rows of the keys dataframe, in their original
+        order and indexed by their position
+
+        """
+        positions = np.arange(len(self))
+        if sessions is not None:
+            positions = _lookup(self.sessions, sessions)
+        if tags is not None:
+            positions = np.intersect1d(positions, _lookup(self.tags, tags))
+        if since is not None:
+            dates = self.dates[positions]
+            positions = positions[
+                ~np.isnat(dates) & (dates >= np.datetime64(since, "s"))
+            ]
+        return pd.DataFrame(
+            {name: column[positions] for name, column in self.columns.items()},
+            index=positions,
+        )
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        arrays = {
+            f"column_{number}": column
+            for number, column in enumerate(self.columns.values())
+        }
+        arrays["dates"] = self.dates
+        for name, groups in (("session", self.sessions), ("tag", self.tags)):
+            for part, array in zip(("values", "offsets", "positions"), groups):
+                arrays[f"{name}_{part}"] = array
+        return arrays
+
+    @staticmethod
+    def _header(csv_path: Path, rows: int, columns: list[str]) -> dict:
+        stat = csv_path.stat()
+        return {
+            "version": INDEX_VERSION,
+            "csv_path": str(csv_path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "rows": rows,
+            "columns": columns,
+        }
+
+    def save(self, cache_dir: Path, csv_path: Path) -> bool:
+        """Caches the index, keys included, in a directory only readable by
+        the current user, so that the keys file is not parsed again until it
+        changes. The cache is best-effort: it is not written when its
+        directory cannot be.
+
+        Args:
+            cache_dir: the directory of the cache (e.g. INDEX_DIRNAME in the
+             output directory)
+            csv_path: the path of the video_keys.csv the index was built from
+
+        Returns: whether the cache was written
+
+        """
+        header_path = cache_dir.joinpath("header.json")
+        tmp_path = cache_dir.joinpath("tmp")
+        try:
+            cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            os.chmod(cache_dir, 0o700)
+            # The header is written last: the cache is invalid until then
+            header_path.unlink(missing_ok=True)
+            for name, array in self._arrays().items():
+                with open(tmp_path, "wb") as array_file:
+                    np.save(array_file, array, allow_pickle=False)
+                os.replace(tmp_path, cache_dir.joinpath(f"{name}.npy"))
+            header = self._header(csv_path, len(self), list(self.columns))
+            tmp_path.write_text(json.dumps(header), encoding="utf-8")
+            os.replace(tmp_path, header_path)
+        except (OSError, ValueError):
+            with suppress(OSError):
+                tmp_path.unlink()
+            return False
+        return True
+
+    @staticmethod
+    def from_cache(cache_dir: Path, csv_path: Path) -> VideoKeyIndex | None:
+        """Loads the cached index of a keys file, without parsing it. The
+        arrays are memory-mapped and loaded without unpickling, so a
+        corrupted or planted file is only ignored.
+
+        Args:
+            cache_dir: the directory of the cache
+            csv_path: the path of video_keys.csv
+
+        Returns: the index, or None when there is no usable cache or the keys
+        file changed since it was cached
+
+        """
+
+        def load(name: str) -> np.ndarray:
+            return np.load(
+                cache_dir.joinpath(f"{name}.npy"), mmap_mode="r", allow_pickle=False
+            )
+
+        try:
+            header = json.loads(
+                cache_dir.joinpath("header.json").read_text(encoding="utf-8")
+            )
+            rows, names = header["rows"], header["columns"]
+            if header != VideoKeyIndex._header(csv_path, rows, names):
+                return None
+            index = VideoKeyIndex.__new__(VideoKeyIndex)
+            index.columns = {
+                name: load(f"column_{number}") for number, name in enumerate(names)
+            }
+            index.dates = load("dates")
+            index.sessions = tuple(
+                load(f"session_{part}") for part in ("values", "offsets", "positions")
+            )
+            index.tags = tuple(
+                load(f"tag_{part}") for part in ("values", "offsets", "positions")
+            )
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return None
+        consistent = all(len(column) == rows for column in index.columns.values())
+        for distinct, offsets, positions in (index.sessions, index.tags):
+            consistent &= len(offsets) == len(distinct) + 1
+            consistent &= len(positions) == rows and offsets[-1] == rows
+        if not consistent or len(index.dates) != rows:
+            return None
+        return index
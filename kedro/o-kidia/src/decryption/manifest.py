@@ -0,0 +1,175 @@
+"""Manifest of the videos already decrypted, persisted next to the decrypted
+data so that a run only processes the new or changed videos, and an
+interrupted run resumes where it stopped.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_FILENAME = "decryption_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def key_id(encryption_key: str) -> str:
+    """Returns a short identifier of an encryption key, so that the key
+    itself is never written to the manifest."""
+    return hashlib.sha256(encryption_key.encode("utf-8")).hexdigest()[:16]
+
+
+class ManifestEntry:
+    """Information recorded for a decrypted video.
+
+    Attributes:
+        source_size (int): size of the encrypted file, in bytes
+        source_mtime (float): modification time of the encrypted file
+        key_id (str): identifier of the encryption key (see key_id())
+        decrypted_filepath (str): location of the decrypted file
+        sha256 (str): SHA-256 checksum of the decrypted file
+    """
+
+    __slots__ = (
+        "source_size",
+        "source_mtime",
+        "key_id",
+        "decrypted_filepath",
+        "sha256",
+    )
+
+    def __init__(
+        self,
+        source_size: int,
+        source_mtime: float,
+        key_id: str,
+        decrypted_filepath: str,
+        sha256: str,
+    ):
+        self.source_size = source_size
+        self.source_mtime = source_mtime
+        self.key_id = key_id
+        self.decrypted_filepath = decrypted_filepath
+        self.sha256 = sha256
+
+    def asdict(self) -> dict:
+        """Convert the ManifestEntry object to a dictionary
+
+        Returns:
+            dict: The dictionary representation of the ManifestEntry object
+        """
+        return {
+            "source_size": self.source_size,
+            "source_mtime": self.source_mtime,
+            "key_id": self.key_id,
+            "decrypted_filepath": self.decrypted_filepath,
+            "sha256": self.sha256,
+        }
+
+
+class DecryptionManifest:
+    """Persisted record of the decrypted videos, indexed by session ID and
+    encrypted file name.
+
+    Attributes:
+        path (Path): location of the manifest file
+        entries (dict[str, ManifestEntry]): the decrypted videos
+    """
+
+    __slots__ = ("path", "entries")
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, ManifestEntry] = {}
+        if path.exists():
+            content = json.loads(path.read_text(encoding="utf-8"))
+            self.entries = {
+                name: ManifestEntry(**entry)
+                for name, entry in content.get("entries", {}).items()
+            }
+
+    @staticmethod
+    def entry_name(session_id: str, filename: str) -> str:
+        """The name under which a video is recorded in the manifest."""
+        return f"{session_id}/{filename}"
+
+    def is_up_to_date(
+        self,
+        session_id: str,
+        filename: str,
+        encrypted_filepath: Path,
+        encryption_key: str,
+    ) -> bool:
+        """Checks whether a video was already decrypted from the same
+        encrypted file and key, and its decrypted file still exists.
+
+        Args:
+            session_id: the session ID of the video
+            filename: the video name (xxx.mp4.enc)
+            encrypted_filepath: the path pointing to the encrypted file
+            encryption_key: the encryption key of the video
+
+        Returns: True when the video does not need to be decrypted again
+
+        """
+        entry = self.entries.get(self.entry_name(session_id, filename))
+        if entry is None or not encrypted_filepath.exists():
+            return False
+        stat = encrypted_filepath.stat()
+        return (
+            entry.source_size == stat.st_size
+            and entry.source_mtime == stat.st_mtime
+            and entry.key_id == key_id(encryption_key)
+            and Path(entry.decrypted_filepath).exists()
+        )
+
+    # pylint: disable=too-many-arguments
+    def record(
+        self,
+        session_id: str,
+        filename: str,
+        encrypted_filepath: Path,
+        encryption_key: str,
+        decrypted_filepath: Path,
+        sha256: str,
+    ) -> None:
+        """Records a successfully decrypted video.
+
+        Args:
+            session_id: the session ID of the video
+            filename: the video name (xxx.mp4.enc)
+            encrypted_filepath: the path pointing to the encrypted file
+            encryption_key: the encryption key of the video
+            decrypted_filepath: the path pointing to the decrypted file
+            sha256: the SHA-256 checksum of the decrypted file
+
+        Returns: nothing
+
+        """
+        stat = encrypted_filepath.stat()
+        self.entries[self.entry_name(session_id, filename)] = ManifestEntry(
+            stat.st_size,
+            stat.st_mtime,
+            key_id(encryption_key),
+            str(decrypted_filepath),
+            sha256,
+        )
+
+    def save(self) -> None:
+        """Writes the manifest to disk. The file is replaced atomically, so
+        an interruption never leaves a truncated manifest."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "version": MANIFEST_VERSION,
+                    "entries": {
+                        name: entry.asdict() for name, entry in self.entries.items()
+                    },
+                },
+                indent=1,
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,126 @@
+"""Random access to AES-CBC encrypted files, without decrypting them to disk.
+
+In CBC mode, a block only depends on its own ciphertext and on the ciphertext
+of the previous block, which is its iv. Reading any range of the plain data
+therefore only requires decrypting the blocks that overlap it.
+"""
+from __future__ import annotations
+
+import io
+import os
+from typing import BinaryIO
+
+from src.decryption.streaming import BLOCK_SIZE, get_backend, read_full
+
+
+class DecryptedFile(io.RawIOBase):
+    """A read-only, seekable file-like object over the plain data of an
+    AES-CBC encrypted file, decrypting only the blocks actually read.
+
+    Like the rest of the decryption package, the plain data is not unpadded,
+    and trailing bytes that do not form a complete block are ignored.
+
+    Attributes:
+        encrypted_file: the encrypted file, opened in binary mode and seekable
+        key: the AES key
+        iv: the CBC initialization vector
+        backend: the name of the decryption backend (see streaming.BACKENDS)
+        size: the size of the plain data
+    """
+
+    def __init__(
+        self,
+        encrypted_file: BinaryIO,
+        key: bytes,
+        iv: bytes,
+        backend: str = "cryptography",
+    ):
+        super().__init__()
+        # Fails early on invalid key, iv or backend
+        get_backend(backend, key, iv)
+        self.encrypted_file = encrypted_file
+        self.key = key
+        self.iv = iv
+        self.backend = backend
+        self.size = BLOCK_SIZE * (encrypted_file.seek(0, os.SEEK_END) // BLOCK_SIZE)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        output = memoryview(buffer).cast("B")
+        start = self._position
+        end = min(self.size, start + len(output))
+        if start >= end:
+            return 0
+        first_block = start // BLOCK_SIZE
+        last_block = -(-end // BLOCK_SIZE)
+        # The iv of the first block is the ciphertext of the block before it
+        if first_block == 0:
+            iv = self.iv
+            self.encrypted_file.seek(0)
+        else:
+            self.encrypted_file.seek((first_block - 1) * BLOCK_SIZE)
+            iv = self.encrypted_file.read(BLOCK_SIZE)
+        encrypted = memoryview(bytearray((last_block - first_block) * BLOCK_SIZE))
+        read_full(self.encrypted_file, encrypted)
+        decrypted = memoryview(bytearray(len(encrypted) + BLOCK_SIZE))
+        get_backend(self.backend, self.key, iv).decrypt_into(encrypted, decrypted)
+        offset = start - first_block * BLOCK_SIZE
+        output[: end - start] = decrypted[offset : offset + end - start]
+        self._position = end
+        return end - start
+
+    def close(self) -> None:
+        if not self.closed:
+            self.encrypted_file.close()
+        super().close()
+
+
+def open_decrypted(
+    encrypted_file: BinaryIO,
+    key: bytes,
+    iv: bytes,
+    backend: str = "cryptography",
+    buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+) -> io.BufferedReader:
+    """Opens a buffered, seekable reader over the plain data of an encrypted
+    file (see DecryptedFile).
+
+    Args:
+        encrypted_file: the encrypted file, opened in binary mode and seekable
+        key: the AES key
+        iv: the CBC initialization vector
+        backend: the name of the decryption backend
+        buffer_size: the read-ahead size, i.e. the minimum amount of data
+         decrypted at once
+
+    Returns: a buffered reader, to be closed by the caller
+
+    """
+    return io.BufferedReader(
+        DecryptedFile(encrypted_file, key, iv, backend), buffer_size
+    )
@@ -0,0 +1,372 @@
+"""Shared streaming core used by every AES-CBC decryption entry point.
+
+The encrypted file is processed through a fixed-size chunk loop, reusing the
+same input and output buffers for the whole file, so the memory footprint
+stays constant whatever the size of the video being decrypted.
+
+The pipelined variant overlaps the disk and the CPU: a reader thread, the
+decryption stage and a writer thread are connected by queues, and a fixed pool
+of buffers circulates between them. Both backends release the GIL while
+decrypting, so the three stages really run concurrently.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import BinaryIO
+
+from Crypto.Cipher import AES
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+# AES works on 128 bits blocks
+BLOCK_SIZE = 16
+# 1 MiB, a multiple of BLOCK_SIZE
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Number of chunks in flight between two stages of the pipelined decryption
+DEFAULT_PIPELINE_DEPTH = 4
+
+
+class CryptographyBackend:
+    """AES-CBC decryption backed by the `cryptography` package, decrypting
+    directly into a pre-allocated buffer with update_into().
+
+    Attributes:
+        decryptor: the cryptography CipherContext
+    """
+
+    __slots__ = ("decryptor",)
+
+    name = "cryptography"
+
+    def __init__(self, key: bytes, iv: bytes):
+        self.decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+
+    def decrypt_into(self, data: memoryview, output: memoryview) -> int:
+        """Decrypts data into output, and returns the number of bytes
+        written. Incomplete trailing blocks are kept by the decryptor until
+        the next call."""
+        return self.decryptor.update_into(data, output)
+
+    def finalize(self) -> bytes:
+        """Returns the remaining decrypted bytes. Raises a ValueError when the
+        encrypted data was not a multiple of the block size."""
+        return self.decryptor.finalize()
+
+
+class PyCryptodomeBackend:
+    """AES-CBC decryption backed by PyCryptodome, decrypting directly into
+    a pre-allocated buffer with the output argument of decrypt().
+
+    Trailing bytes that do not form a complete block are dropped.
+
+    Attributes:
+        cipher: the PyCryptodome CBC cipher
+    """
+
+    __slots__ = ("cipher",)
+
+    name = "pycryptodome"
+
+    def __init__(self, key: bytes, iv: bytes):
+        self.cipher = AES.new(key, AES.MODE_CBC, iv)
+
+    def decrypt_into(self, data: memoryview, output: memoryview) -> int:
+        """Decrypts the complete blocks of data into output, and returns the
+        number of bytes written."""
+        size = BLOCK_SIZE * (len(data) // BLOCK_SIZE)
+        if size:
+            self.cipher.decrypt(data[:size], output=output[:size])
+        return size
+
+    def finalize(self) -> bytes:
+        """Nothing is buffered by PyCryptodome."""
+        return b""
+
+
+BACKENDS = {
+    CryptographyBackend.name: CryptographyBackend,
+    PyCryptodomeBackend.name: PyCryptodomeBackend,
+}
+
+
+def get_backend(name: str, key: bytes, iv: bytes):
+    """Instantiates the decryption backend registered under the given name.
+
+    Args:
+        name: the backend name (see BACKENDS)
+        key: the AES key
+        iv: the CBC initialization vector
+
+    Returns: a backend exposing decrypt_into() and finalize()
+
+    Raises: ValueError when the backend is unknown
+
+    """
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown decryption backend '{name}', expected one of "
+            f"{tuple(BACKENDS)}"
+        )
+    return BACKENDS[name](key, iv)
+
+
+class DecryptionStats:
+    """Counters gathered while decrypting a file.
+
+    Attributes:
+        bytes_read (int): number of encrypted bytes read
+        bytes_written (int): number of decrypted bytes written
+        elapsed (float): wall-clock duration of the decryption, in seconds
+        read_time (float): time spent reading the encrypted file
+        decrypt_time (float): time spent decrypting
+        write_time (float): time spent writing (and hashing) the decrypted
+         data
+    """
+
+    __slots__ = (
+        "bytes_read",
+        "bytes_written",
+        "elapsed",
+        "read_time",
+        "decrypt_time",
+        "write_time",
+    )
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        bytes_read: int = 0,
+        bytes_written: int = 0,
+        elapsed: float = 0.0,
+        read_time: float = 0.0,
+        decrypt_time: float = 0.0,
+        write_time: float = 0.0,
+    ):
+        self.bytes_read = bytes_read
+        self.bytes_written = bytes_written
+        self.elapsed = elapsed
+        self.read_time = read_time
+        self.decrypt_time = decrypt_time
+        self.write_time = write_time
+
+    @property
+    def throughput(self) -> float:
+        """Decryption throughput, in encrypted bytes per second."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_read / self.elapsed
+
+    @property
+    def bottleneck(self) -> str:
+        """The stage with the largest busy time: "read", "decrypt" or
+        "write"."""
+        return max(
+            ("read", self.read_time),
+            ("decrypt", self.decrypt_time),
+            ("write", self.write_time),
+            key=lambda stage: stage[1],
+        )[0]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.bytes_read / 1e6:.1f} MB decrypted in {self.elapsed:.2f} s "
+            f"({self.throughput / 1e6:.1f} MB/s, busy read "
+            f"{self.read_time:.2f} s / decrypt {self.decrypt_time:.2f} s / "
+            f"write {self.write_time:.2f} s)"
+        )
+
+
+def read_full(file: BinaryIO, buffer: memoryview) -> int:
+    """Fills the buffer from the file, retrying on short reads. Returns the
+    number of bytes read, which is smaller than the buffer size only at the
+    end of the file."""
+    size = 0
+    while size < len(buffer):
+        read = file.readinto(buffer[size:])
+        if not read:
+            break
+        size += read
+    return size
+
+
+def _round_chunk_size(chunk_size: int) -> int:
+    return BLOCK_SIZE * max(1, -(-chunk_size // BLOCK_SIZE))
+
+
+def stream_decrypt(
+    encrypted_file: BinaryIO,
+    decrypted_file: BinaryIO,
+    backend,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    hasher=None,
+) -> DecryptionStats:
+    """Decrypts encrypted_file into decrypted_file, chunk by chunk.
+
+    Args:
+        encrypted_file: a binary file opened for reading
+        decrypted_file: a binary file opened for writing
+        backend: a decryption backend (see BACKENDS)
+        chunk_size: the number of bytes read at each iteration, rounded up to
+         a multiple of the AES block size
+        hasher: an optional object exposing update(bytes) (e.g. a hashlib
+         hash), fed with the decrypted data as it is written
+
+    Returns: the decryption statistics
+
+    """
+    chunk_size = _round_chunk_size(chunk_size)
+    # Both buffers are allocated once and reused for the whole file. The
+    # output one has an extra block as required by update_into()
+    in_buffer = memoryview(bytearray(chunk_size))
+    out_buffer = memoryview(bytearray(chunk_size + BLOCK_SIZE))
+    stats = DecryptionStats()
+    start = time.perf_counter()
+    while True:
+        tick = time.perf_counter()
+        size = read_full(encrypted_file, in_buffer)
+        stats.read_time += time.perf_counter() - tick
+        if not size:
+            break
+        stats.bytes_read += size
+        tick = time.perf_counter()
+        written = backend.decrypt_into(in_buffer[:size], out_buffer)
+        stats.decrypt_time += time.perf_counter() - tick
+        _write(decrypted_file, out_buffer[:written], hasher, stats)
+        if size < chunk_size:
+            break
+    remaining = backend.finalize()
+    if remaining:
+        _write(decrypted_file, remaining, hasher, stats)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _write(decrypted_file: BinaryIO, data, hasher, stats: DecryptionStats) -> None:
+    tick = time.perf_counter()
+    decrypted_file.write(data)
+    if hasher is not None:
+        hasher.update(data)
+    stats.bytes_written += len(data)
+    stats.write_time += time.perf_counter() - tick
+
+
+# pylint: disable=too-many-arguments, too-many-locals, too-many-statements
+def pipelined_decrypt(
+    encrypted_file: BinaryIO,
+    decrypted_file: BinaryIO,
+    backend,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    hasher=None,
+    depth: int = DEFAULT_PIPELINE_DEPTH,
+) -> DecryptionStats:
+    """Decrypts encrypted_file into decrypted_file like stream_decrypt(), but
+    reads, decrypts and writes concurrently: a reader thread and a writer
+    thread run on each side of the decryption, which runs in the calling
+    thread.
+
+    The stages exchange buffers from two fixed pools of depth buffers each
+    (one for the encrypted chunks, one for the decrypted chunks), which also
+    bound the queues between them: at most 2 * depth chunks are in memory.
+
+    Args:
+        encrypted_file: a binary file opened for reading
+        decrypted_file: a binary file opened for writing
+        backend: a decryption backend (see BACKENDS)
+        chunk_size: the number of bytes read at each iteration, rounded up to
+         a multiple of the AES block size
+        hasher: an optional object exposing update(bytes), fed with the
+         decrypted data as it is written (in the writer thread)
+        depth: the number of buffers of each pool
+
+    Returns: the decryption statistics, with the busy time of each stage
+
+    """
+    chunk_size = _round_chunk_size(chunk_size)
+    free_in: queue.Queue = queue.Queue()
+    free_out: queue.Queue = queue.Queue()
+    for _ in range(max(1, depth)):
+        free_in.put(memoryview(bytearray(chunk_size)))
+        free_out.put(memoryview(bytearray(chunk_size + BLOCK_SIZE)))
+    # None marks the end of the stream in both queues
+    to_decrypt: queue.Queue = queue.Queue()
+    to_write: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    stats = DecryptionStats()
+
+    def read_stage() -> None:
+        try:
+            while not stop.is_set():
+                buffer = free_in.get()
+                tick = time.perf_counter()
+                size = read_full(encrypted_file, buffer)
+                stats.read_time += time.perf_counter() - tick
+                if not size:
+                    break
+                stats.bytes_read += size
+                to_decrypt.put((buffer, size))
+                if size < chunk_size:
+                    break
+        except BaseException as error:  # pylint: disable=broad-except
+            errors.append(error)
+            stop.set()
+        finally:
+            to_decrypt.put(None)
+
+    def write_stage() -> None:
+        while True:
+            item = to_write.get()
+            if item is None:
+                break
+            data, buffer = item
+            # After an error, the chunks are only drained so that the other
+            # stages never block on an empty pool
+            if not stop.is_set():
+                try:
+                    _write(decrypted_file, data, hasher, stats)
+                except BaseException as error:  # pylint: disable=broad-except
+                    errors.append(error)
+                    stop.set()
+            if buffer is not None:
+                free_out.put(buffer)
+
+    reader = threading.Thread(target=read_stage, daemon=True)
+    writer = threading.Thread(target=write_stage, daemon=True)
+    start = time.perf_counter()
+    reader.start()
+    writer.start()
+    item = ()
+    try:
+        while True:
+            item = to_decrypt.get()
+            if item is None:
+                break
+            buffer, size = item
+            if not stop.is_set():
+                out_buffer = free_out.get()
+                tick = time.perf_counter()
+                written = backend.decrypt_into(buffer[:size], out_buffer)
+                stats.decrypt_time += time.perf_counter() - tick
+                to_write.put((out_buffer[:written], out_buffer))
+            free_in.put(buffer)
+        if not stop.is_set():
+            remaining = backend.finalize()
+            if remaining:
+                to_write.put((remaining, None))
+    except BaseException as error:
+        errors.append(error)
+        stop.set()
+        # Release the reader, which may be waiting for a free buffer
+        while item is not None:
+            if item:
+                free_in.put(item[0])
+            item = to_decrypt.get()
+    finally:
+        to_write.put(None)
+        writer.join()
+        reader.join()
+    stats.elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return stats
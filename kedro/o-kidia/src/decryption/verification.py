@@ -0,0 +1,105 @@
+"""Integrity checks of the decrypted videos, computed on the fly while the
+decrypted data is written, or by reading back an already decrypted file.
+
+Three checks are made:
+    - the SHA-256 checksum of the decrypted data
+    - the container: an MP4 file starts with an 'ftyp' box, whose type is
+      stored in bytes 4 to 8
+    - the padding: the encrypted data is padded with PKCS7, which the
+      decryption keeps, so a wrong key or a truncated file is detected by an
+      invalid last block
+"""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from src.decryption.streaming import BLOCK_SIZE, DEFAULT_CHUNK_SIZE, read_full
+
+MP4_BOX_TYPE = slice(4, 8)
+MP4_FILE_TYPE = b"ftyp"
+
+
+class StreamVerifier:
+    """Checks the decrypted data as it is streamed. It exposes update(), so
+    it can be given as the hasher of streaming.stream_decrypt().
+
+    Attributes:
+        hasher: the SHA-256 hash of the data seen so far
+        header (bytes): the first bytes of the data
+        tail (bytes): the last block of the data
+        size (int): the number of bytes seen so far
+    """
+
+    __slots__ = ("hasher", "header", "tail", "size")
+
+    def __init__(self):
+        self.hasher = hashlib.sha256()
+        self.header = b""
+        self.tail = b""
+        self.size = 0
+
+    def update(self, data) -> None:
+        """Feeds the next decrypted bytes."""
+        if not len(data):
+            return
+        self.hasher.update(data)
+        if len(self.header) < MP4_BOX_TYPE.stop:
+            self.header += bytes(data[: MP4_BOX_TYPE.stop - len(self.header)])
+        if len(data) >= BLOCK_SIZE:
+            self.tail = bytes(data[-BLOCK_SIZE:])
+        else:
+            self.tail = (self.tail + bytes(data))[-BLOCK_SIZE:]
+        self.size += len(data)
+
+    def hexdigest(self) -> str:
+        """The SHA-256 checksum of the data, as a hexadecimal string."""
+        return self.hasher.hexdigest()
+
+    @property
+    def valid_container(self) -> bool:
+        """True when the data starts like an MP4 file."""
+        return self.header[MP4_BOX_TYPE] == MP4_FILE_TYPE
+
+    @property
+    def valid_padding(self) -> bool:
+        """True when the data ends with a valid PKCS7 padding."""
+        if self.size % BLOCK_SIZE or len(self.tail) < BLOCK_SIZE:
+            return False
+        padding = self.tail[-1]
+        return 1 <= padding <= BLOCK_SIZE and self.tail[-padding:] == bytes(
+            [padding] * padding
+        )
+
+    def errors(self) -> list[str]:
+        """Lists the failed checks, empty when the data is valid."""
+        errors = []
+        if not self.valid_container:
+            errors.append(
+                f"Not an MP4 file (expected an '{MP4_FILE_TYPE.decode()}' "
+                f"box, found {self.header[MP4_BOX_TYPE]!r})"
+            )
+        if not self.valid_padding:
+            errors.append("Invalid PKCS7 padding (wrong key or truncated file)")
+        return errors
+
+
+def verify_file(filepath: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamVerifier:
+    """Reads back a decrypted file and checks it.
+
+    Args:
+        filepath: the path pointing to the decrypted file
+        chunk_size: the number of bytes read at once
+
+    Returns: the verifier, fed with the whole file
+
+    """
+    verifier = StreamVerifier()
+    buffer = memoryview(bytearray(chunk_size))
+    with open(filepath, "rb") as file:
+        while True:
+            size = read_full(file, buffer)
+            if not size:
+                break
+            verifier.update(buffer[:size])
+    return verifier
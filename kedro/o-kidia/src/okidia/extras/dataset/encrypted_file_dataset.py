@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import io
+from copy import deepcopy
+from pathlib import PurePosixPath
+from typing import Any, Dict
+
+import fsspec
+from kedro.io import AbstractDataSet
+from kedro.io.core import DataSetError, get_filepath_str, get_protocol_and_path
+
+from src.decryption.cmap_decryption import derive_key_and_iv_from_salt
+from src.decryption.seekable import open_decrypted
+
+
+class EncryptedFileDataSet(AbstractDataSet):
+    """Read-only dataset over an AES-CBC encrypted file (.okiv, .okid or
+    C-MAP .mp4.enc), decrypted on read: loading returns a seekable binary
+    file-like object that only decrypts the blocks actually read, so a video
+    reader or a hash check can start at any offset without a plain copy of
+    the file on disk.
+
+    Two key schemes are supported:
+        - key and salt are the AES key and iv, as hexadecimal strings (as
+          for FileDecryption.decrypt_single_file)
+        - key is the C-MAP encryption key and iv_filepath the associated iv
+          file, on the same filesystem as the encrypted file, the AES key
+          and iv are derived with PBKDF2 (as for
+          cmap_decryption.decrypt_encrypted_file)
+
+    Example catalog entry:
+
+        session_video:
+          type: okidia.extras.dataset.encrypted_file_dataset.EncryptedFileDataSet
+          filepath: data/01_raw/videos/2021_11_09_14_20_56_267/recording.mp4.enc
+          iv_filepath: data/01_raw/videos/2021_11_09_14_20_56_267/recording.iv
+          key: ${video_key}
+
+    The file-like object returned by load() must be closed by the caller.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        filepath: str,
+        key: str,
+        salt: str | None = None,
+        iv_filepath: str | None = None,
+        backend: str = "cryptography",
+        buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+        credentials: Dict[str, Any] = None,
+        fs_args: Dict[str, Any] = None,
+    ):
+        if (salt is None) == (iv_filepath is None):
+            raise DataSetError(
+                "Exactly one of 'salt' or 'iv_filepath' must be given to "
+                "decrypt the file"
+            )
+        _credentials = deepcopy(credentials) or {}
+        _fs_args = deepcopy(fs_args) or {}
+        protocol, path = get_protocol_and_path(filepath)
+        self._protocol = protocol
+        self._fs = fsspec.filesystem(protocol, **_credentials, **_fs_args)
+        self._filepath = PurePosixPath(path)
+        self._iv_filepath = None
+        if iv_filepath is not None:
+            iv_protocol, iv_path = get_protocol_and_path(iv_filepath)
+            # The iv file is opened with the filesystem, and the credentials,
+            # of the encrypted file
+            if iv_protocol != protocol:
+                raise DataSetError(
+                    f"The iv file must be on the same filesystem as the "
+                    f"encrypted file, got '{iv_protocol}' instead of '{protocol}'"
+                )
+            self._iv_filepath = PurePosixPath(iv_path)
+        self._key = key
+        self._salt = salt
+        self._backend = backend
+        self._buffer_size = buffer_size
+
+    def _key_and_iv(self) -> tuple[bytes, bytes]:
+        if self._salt is not None:
+            return bytes.fromhex(self._key), bytes.fromhex(self._salt)
+        with self._fs.open(
+            get_filepath_str(self._iv_filepath, self._protocol), mode="r"
+        ) as iv_file:
+            return derive_key_and_iv_from_salt(iv_file.read(), self._key)
+
+    def _load(self) -> io.BufferedReader:
+        key, iv = self._key_and_iv()
+        encrypted_file = self._fs.open(
+            get_filepath_str(self._filepath, self._protocol), mode="rb"
+        )
+        try:
+            return open_decrypted(
+                encrypted_file, key, iv, self._backend, self._buffer_size
+            )
+        except Exception:
+            encrypted_file.close()
+            raise
+
+    def _save(self, data: Any) -> None:
+        raise DataSetError(f"{type(self).__name__} is a read-only dataset")
+
+    def _exists(self) -> bool:
+        return self._fs.exists(get_filepath_str(self._filepath, self._protocol))
+
+    def _describe(self) -> Dict[str, Any]:
+        # The key is never described
+        return {
+            "filepath": self._filepath,
+            "protocol": self._protocol,
+            "iv_filepath": self._iv_filepath,
+            "backend": self._backend,
+        }
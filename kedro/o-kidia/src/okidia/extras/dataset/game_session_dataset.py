@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from pathlib import PurePosixPath
+from typing import Any, Dict
+
+import fsspec
+from kedro.io import AbstractDataSet
+from kedro.io.core import DataSetError, get_filepath_str, get_protocol_and_path
+
+# Imported relatively: the catalog loads this dataset from the okidia package,
+# whose nodes must receive the GameSession of that package
+from ...pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+    binary,
+)
+from .s3_ingest import file_etag
+
+
+class GameSessionDataSet(AbstractDataSet):
+    """Dataset of a game session log stored in a compact binary form: an
+    uncompressed .npz file holding the columns of the digit inputs (see
+    DigitInputArray) and a JSON header with the rest of the log (metadata,
+    challenges, events, calibration points, videos).
+
+    Loading returns a GameSession: the digit inputs, which are most of a
+    log, are read as NumPy arrays instead of being decoded from JSON and
+    parsed into objects. The events stay in the header, their fields
+    depending on the game.
+
+    Saving takes the JSON of a log, as loaded from a JSONDataSet.
+
+    The files of a dataset only written with validated logs (see
+    validate_game_session()) can be loaded with trusted=True, skipping the
+    type checks of the GameSession constructors.
+
+    The sessions loaded by the nodes are cached (see GameSessionCache), keyed
+    by the fingerprint of their file (see fingerprint()).
+
+    Example catalog entry:
+
+        validated_json_dataset:
+          type: PartitionedDataSet
+          path: data/02_intermediate/logs
+          dataset:
+            type: okidia.extras.dataset.game_session_dataset.GameSessionDataSet
+            trusted: true
+          filename_suffix: .npz
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        lazy: bool = False,
+        trusted: bool = False,
+        credentials: Dict[str, Any] = None,
+        fs_args: Dict[str, Any] = None,
+    ):
+        _credentials = deepcopy(credentials) or {}
+        _fs_args = deepcopy(fs_args) or {}
+        protocol, path = get_protocol_and_path(filepath)
+        self._protocol = protocol
+        if protocol == "file":
+            _fs_args.setdefault("auto_mkdir", True)
+        self._fs = fsspec.filesystem(protocol, **_credentials, **_fs_args)
+        self._filepath = PurePosixPath(path)
+        self._lazy = lazy
+        self._trusted = trusted
+
+    @property
+    def trusted(self) -> bool:
+        """Whether the files are loaded without checking their types"""
+        return self._trusted
+
+    @staticmethod
+    def encode(log: dict) -> bytes:
+        """Converts the JSON of a log to the binary form (see binary.encode())."""
+        return binary.encode(log)
+
+    @staticmethod
+    def decode(source: bytes, lazy: bool = False, trusted: bool = False) -> GameSession:
+        """Builds the GameSession of a log in the binary form (see
+        binary.decode()).
+
+        Raises:
+            DataSetError: When the file is of another version of the format
+        """
+        try:
+            return binary.decode(source, lazy, trusted)
+        except ValueError as exc:
+            raise DataSetError(str(exc)) from exc
+
+    def read_source(self) -> bytes:
+        """Reads the file, without decoding it (see decode())."""
+        with self._fs.open(
+            get_filepath_str(self._filepath, self._protocol), mode="rb"
+        ) as fs_file:
+            return fs_file.read()
+
+    def fingerprint(self) -> str:
+        """A fingerprint of the file, changing whenever it is written: its
+        ETag, or its size and modification time (see file_etag()), read
+        without opening the file."""
+        return file_etag(
+            self._fs.info(get_filepath_str(self._filepath, self._protocol))
+        )
+
+    def _load(self) -> GameSession:
+        return self.decode(self.read_source(), self._lazy, self._trusted)
+
+    def _save(self, data: dict) -> None:
+        if not isinstance(data, dict):
+            raise DataSetError(
+                f"{type(self).__name__} saves the JSON of a log, got {type(data)}"
+            )
+        content = self.encode(data)
+        with self._fs.open(
+            get_filepath_str(self._filepath, self._protocol), mode="wb"
+        ) as fs_file:
+            fs_file.write(content)
+
+    def _exists(self) -> bool:
+        return self._fs.exists(get_filepath_str(self._filepath, self._protocol))
+
+    def _describe(self) -> Dict[str, Any]:
+        return {
+            "filepath": self._filepath,
+            "protocol": self._protocol,
+            "lazy": self._lazy,
+            "trusted": self._trusted,
+        }
@@ -1,6 +1,14 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
 import kedro.extras.datasets.json
+from kedro.extras.datasets.json import JSONDataSet
 from kedro.io import PartitionedDataSet
 
+from src.okidia.extras.dataset.s3_ingest import (
+    DEFAULT_MAX_WORKERS,
+    ConcurrentDownloader,
+)
 from src.utils.definitions import S3_SERVER_ENDPOINT
 
 
@@ -10,17 +18,65 @@ class PipelineTestDataset(PartitionedDataSet):
     arguments) and can be called to list all elements that:
         - are found under path
         - finished with extension filename_suffix
+
+    Loading ingests the partitions into a local cache first: the archive is
+    listed and downloaded concurrently (max_workers requests in flight, over
+    a shared connection pool), and the partitions whose ETag did not change
+    since the previous load are read from the cache. The returned loaders
+    then only read local files.
     """
-    def __init__(self, key: str, secret: str):
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        key: str,
+        secret: str,
+        path: str = "s3://archives/TestData/S3 files/",
+        endpoint_url: str = S3_SERVER_ENDPOINT,
+        cache_dir: str = "data/01_raw/s3_cache",
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
         super().__init__(
-            path="s3://archives/TestData/S3 files/",
+            path=path,
             dataset=kedro.extras.datasets.json.JSONDataSet,
             filename_suffix=".json",
             fs_args={
                 "key": key,
                 "secret": secret,
                 "client_kwargs": {
-                    "endpoint_url": S3_SERVER_ENDPOINT,
+                    "endpoint_url": endpoint_url,
                 },
+                # One pooled connection per concurrent request
+                "config_kwargs": {"max_pool_connections": max_workers},
             },
-        )
\ No newline at end of file
+        )
+        self._downloader = ConcurrentDownloader(
+            self._filesystem, Path(cache_dir), max_workers
+        )
+        self._partition_infos: List[Dict[str, Any]] = None
+
+    def _list_partition_infos(self) -> List[Dict[str, Any]]:
+        if self._partition_infos is None:
+            self._partition_infos = self._downloader.list_files(
+                self._filesystem._strip_protocol(  # pylint: disable=protected-access
+                    self._normalized_path
+                ),
+                self._filename_suffix,
+            )
+        return self._partition_infos
+
+    def _list_partitions(self) -> List[str]:
+        return [info["name"] for info in self._list_partition_infos()]
+
+    def _load(self) -> Dict[str, Callable[[], Any]]:
+        local_paths = self._downloader.download(self._list_partition_infos())
+        partitions = {}
+        for remote_path, local_path in local_paths.items():
+            partitions[self._path_to_partition(remote_path)] = JSONDataSet(
+                filepath=str(local_path)
+            ).load
+        return partitions
+
+    def _invalidate_caches(self) -> None:
+        super()._invalidate_caches()
+        self._partition_infos = None
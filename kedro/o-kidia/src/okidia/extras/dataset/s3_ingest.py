@@ -0,0 +1,243 @@
+"""Bulk ingest of remote files (e.g. the O-Kidia S3 archive) into a local
+cache: the remote tree is listed and downloaded concurrently, and files whose
+ETag did not change since the last ingest are never downloaded again.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from fsspec import AbstractFileSystem
+
+DEFAULT_MAX_WORKERS = 16
+
+
+def file_etag(info: Dict[str, Any]) -> str:
+    """Returns the ETag of a remote file, from its fsspec info. Filesystems
+    without ETag (e.g. local or memory ones, used in tests) fall back to the
+    size and modification time of the file."""
+    etag = info.get("ETag") or info.get("etag")
+    if etag:
+        return str(etag).strip('"')
+    modified = info.get("mtime", info.get("LastModified", info.get("created")))
+    return f"{info['size']}-{modified}"
+
+
+class ETagCache:
+    """Local copies of remote files, each stored next to the ETag of the
+    version it was downloaded from.
+
+    The cache mirrors the remote tree: remote_dir/file.json is stored as
+    cache_dir/remote_dir/file.json, and its ETag as
+    cache_dir/remote_dir/file.json.etag.
+
+    When max_size is given, the least recently used files are evicted as
+    soon as the cache grows over it. The modification time of a cached file
+    records its last use.
+
+    Attributes:
+        cache_dir (Path): the root folder of the cache
+        max_size (int | None): the maximum size of the cache, in bytes, or
+         None for an unbounded cache
+    """
+
+    __slots__ = ("cache_dir", "max_size")
+
+    ETAG_SUFFIX = ".etag"
+    PART_SUFFIX = ".part"
+
+    def __init__(self, cache_dir: Path, max_size: int | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+
+    def local_path(self, remote_path: str) -> Path:
+        """The location of the local copy of a remote file."""
+        return self.cache_dir.joinpath(remote_path.lstrip("/"))
+
+    def _etag_path(self, local_path: Path) -> Path:
+        return local_path.with_name(local_path.name + self.ETAG_SUFFIX)
+
+    def get(self, remote_path: str, etag: str | None) -> Path | None:
+        """Returns the local copy of a remote file, or None when it is not
+        cached or was cached from another version.
+
+        Args:
+            remote_path: the path of the remote file, without protocol
+            etag: the ETag of the remote file, or None to accept any cached
+             version (e.g. when the remote is not reachable)
+
+        Returns: the local copy, marked as the most recently used, or None
+
+        """
+        local_path = self.local_path(remote_path)
+        etag_path = self._etag_path(local_path)
+        try:
+            if etag is not None and etag_path.read_text(encoding="utf-8") != etag:
+                return None
+            os.utime(local_path)
+        except FileNotFoundError:
+            return None
+        return local_path
+
+    @contextmanager
+    def writer(self, remote_path: str, etag: str) -> Iterator[BinaryIO]:
+        """Opens a new version of a remote file for writing. The version is
+        only added to the cache when the block exits without error, so an
+        interrupted download is never mistaken for a cached file.
+
+        Args:
+            remote_path: the path of the remote file, without protocol
+            etag: the ETag of the remote file (see file_etag())
+
+        Returns: the binary file where to write the content of the remote
+        file
+
+        """
+        local_path = self.local_path(remote_path)
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = local_path.with_name(local_path.name + self.PART_SUFFIX)
+        try:
+            with open(tmp_path, "wb") as tmp_file:
+                yield tmp_file
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        self._commit(tmp_path, local_path, etag)
+
+    def _commit(self, tmp_path: Path, local_path: Path, etag: str) -> None:
+        os.replace(tmp_path, local_path)
+        self._etag_path(local_path).write_text(etag, encoding="utf-8")
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def fetch(self, fs: AbstractFileSystem, remote_path: str, etag: str) -> Path:
+        """Downloads a remote file into the cache, unless it is already
+        cached with the same ETag.
+
+        Args:
+            fs: the filesystem of the remote file
+            remote_path: the path of the remote file, without protocol
+            etag: the ETag of the remote file (see file_etag())
+
+        Returns: the local copy of the remote file
+
+        """
+        cached = self.get(remote_path, etag)
+        if cached is not None:
+            return cached
+        local_path = self.local_path(remote_path)
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = local_path.with_name(local_path.name + self.PART_SUFFIX)
+        fs.get_file(remote_path, str(tmp_path))
+        self._commit(tmp_path, local_path, etag)
+        return local_path
+
+    def size(self) -> int:
+        """The total size of the cached files, in bytes."""
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self) -> List[Tuple[float, Path, int]]:
+        entries = []
+        for etag_path in self.cache_dir.rglob("*" + self.ETAG_SUFFIX):
+            local_path = etag_path.with_name(etag_path.name[: -len(self.ETAG_SUFFIX)])
+            try:
+                stat = local_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, local_path, stat.st_size))
+        return entries
+
+    def evict(self, max_size: int) -> None:
+        """Removes the least recently used files until the cache is not
+        larger than max_size bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, _, size in entries)
+        for _, local_path, size in entries:
+            if total <= max_size:
+                break
+            # The file may be evicted concurrently by another process
+            self._etag_path(local_path).unlink(missing_ok=True)
+            local_path.unlink(missing_ok=True)
+            total -= size
+
+
+class ConcurrentDownloader:
+    """Lists and downloads a remote tree with a pool of threads, so that the
+    ingest is bounded by the bandwidth rather than by the round trips.
+
+    With s3fs, all the threads share the connection pool of the filesystem,
+    whose size should be at least max_workers (max_pool_connections in
+    config_kwargs).
+
+    Attributes:
+        fs (AbstractFileSystem): the remote filesystem
+        cache (ETagCache): the local cache of the downloaded files
+        max_workers (int): the number of concurrent requests
+    """
+
+    __slots__ = ("fs", "cache", "max_workers")
+
+    def __init__(
+        self,
+        fs: AbstractFileSystem,
+        cache_dir: Path,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.fs = fs
+        self.cache = ETagCache(cache_dir)
+        self.max_workers = max_workers
+
+    def list_files(self, path: str, suffix: str = "") -> List[Dict[str, Any]]:
+        """Lists the files under path, each folder being listed as soon as
+        its parent is, concurrently with its siblings.
+
+        Args:
+            path: the remote folder, without protocol
+            suffix: only keep the files with this suffix (e.g. ".json")
+
+        Returns: the fsspec info of each file, sorted by name
+
+        """
+        files = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # The folder listed by each pending request
+            pending = {pool.submit(self.fs.ls, path, detail=True): path}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder = pending.pop(future).rstrip("/")
+                    for info in future.result():
+                        name = info["name"]
+                        if info["type"] == "directory":
+                            pending[pool.submit(self.fs.ls, name, detail=True)] = name
+                        # S3 may list the placeholder object of the folder
+                        elif name.rstrip("/") != folder and name.endswith(suffix):
+                            files.append(info)
+        return sorted(files, key=lambda info: info["name"])
+
+    def download(self, infos: List[Dict[str, Any]]) -> Dict[str, Path]:
+        """Downloads the given files into the cache, skipping those already
+        cached with the same ETag.
+
+        Args:
+            infos: the fsspec info of the files, as returned by list_files()
+
+        Returns: the local copy of each file, by remote path
+
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                info["name"]: pool.submit(
+                    self.cache.fetch, self.fs, info["name"], file_etag(info)
+                )
+                for info in infos
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def ingest(self, path: str, suffix: str = "") -> Dict[str, Path]:
+        """Lists then downloads the files under path (see list_files() and
+        download())."""
+        return self.download(self.list_files(path, suffix))
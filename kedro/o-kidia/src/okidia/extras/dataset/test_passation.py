@@ -1,36 +1,124 @@
-from typing import Dict, Any
+from __future__ import annotations
 
-from fs_s3fs import S3FS
+import json
+from copy import deepcopy
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict
+
+import fsspec
 from kedro.io import AbstractDataSet
-from kedro.io.core import get_protocol_and_path
+from kedro.io.core import DataSetError, get_protocol_and_path
+
+from src.okidia.extras.dataset.s3_ingest import ETagCache, file_etag
+
+# Size of each ranged request to the remote filesystem
+DEFAULT_BLOCK_SIZE = 4 << 20
+# Maximum size of the local cache of passations
+DEFAULT_CACHE_SIZE = 2 << 30
 
 
 class TestPassation(AbstractDataSet):
     """Subclass of AbstractDataSet to represent one sample of data in the
-    PipelineTestDataset.
-    TODO implement _load, and eventually _save, _describe or
-     PipelineTestDataset._load() to work with this class.
+    PipelineTestDataset: the JSON log of one passation, stored on our
+    O-Kidia S3 server.
+
+    The log is streamed with ranged requests of block_size bytes, each chunk
+    being written to a local LRU cache as it arrives, and parsed from the
+    cached file once complete by the C decoder of the json module: it has no
+    incremental parser, but only the cached file is read, so the download
+    does not hold a copy of the log in memory. The cache is keyed by the
+    ETag of the remote file, so reloading an unchanged passation only costs
+    a metadata request, or no request at all in offline mode, where only the
+    cached passations can be loaded.
+
+    Example catalog entry:
+
+        passation:
+          type: okidia.extras.dataset.test_passation.TestPassation
+          filepath: s3://archives/TestData/S3 files/2022_03_01/passation.json
+          fs_args:
+            key: ${s3_key}
+            secret: ${s3_secret}
+            client_kwargs:
+              endpoint_url: https://s3.fr-lyo.jaguar-network.com/
     """
+
+    # Not a test class, despite its name
+    __test__ = False
+
+    # pylint: disable=too-many-arguments
     def __init__(
-            self,
-            filepath: str,
-            fs_args: Dict[str, Any] = None,
+        self,
+        filepath: str,
+        fs_args: Dict[str, Any] = None,
+        cache_dir: str = "data/01_raw/passation_cache",
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        offline: bool = False,
     ):
         super().__init__()
 
-        self._fs = S3FS(
-            bucket_name="",
-            aws_access_key_id=fs_args["key"],
-            aws_secret_access_key=fs_args["secret"],
-            endpoint_url=fs_args["client_kwargs"]["endpoint_url"],
-        )
-        _, self._filepath = get_protocol_and_path(filepath)
+        _fs_args = deepcopy(fs_args) or {}
+        protocol, path = get_protocol_and_path(filepath)
+        self._protocol = protocol
+        self._fs = fsspec.filesystem(protocol, **_fs_args)
+        self._filepath = PurePosixPath(path)
+        self._cache = ETagCache(Path(cache_dir), cache_size)
+        self._block_size = block_size
+        self._offline = offline
 
     def _load(self) -> Any:
-        ...
+        remote_path = str(self._filepath)
+        if self._offline:
+            cached = self._cache.get(remote_path, None)
+            if cached is None:
+                raise DataSetError(
+                    f"The passation {remote_path} is not cached, and cannot "
+                    f"be downloaded in offline mode"
+                )
+        else:
+            etag = file_etag(self._fs.info(remote_path))
+            cached = self._cache.get(remote_path, etag)
+        if cached is not None:
+            with open(cached, "rb") as cached_file:
+                return json.load(cached_file)
+        return self._download(remote_path, etag)
+
+    def _download(self, remote_path: str, etag: str) -> Any:
+        with self._cache.writer(remote_path, etag) as cached_file:
+            with self._fs.open(
+                remote_path,
+                mode="rb",
+                block_size=self._block_size,
+                cache_type="none",
+            ) as remote_file:
+                while True:
+                    chunk = remote_file.read(self._block_size)
+                    if not chunk:
+                        break
+                    cached_file.write(chunk)
+            cached_file.flush()
+            # Parsed before leaving the block, so that an invalid log is
+            # not cached. The encoding (UTF-8, with or without a byte order
+            # mark) is detected by json.load()
+            with open(cached_file.name, "rb") as downloaded_file:
+                return json.load(downloaded_file)
 
     def _save(self, data: Any) -> None:
-        ...
+        raise DataSetError(f"{type(self).__name__} is a read-only dataset")
+
+    def _exists(self) -> bool:
+        remote_path = str(self._filepath)
+        if self._cache.get(remote_path, None) is not None:
+            return True
+        return not self._offline and self._fs.exists(remote_path)
 
     def _describe(self) -> Dict[str, Any]:
-        ...
\ No newline at end of file
+        # The credentials are never described
+        return {
+            "filepath": self._filepath,
+            "protocol": self._protocol,
+            "cache_dir": self._cache.cache_dir,
+            "cache_size": self._cache.max_size,
+            "offline": self._offline,
+        }
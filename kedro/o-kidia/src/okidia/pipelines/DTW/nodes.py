@@ -8,6 +8,7 @@ from __future__ import annotations
 from typing import Callable
 import numpy as np
 from ..load_cmap_dataset.data_manipulation.game_session import GameSession
+from ..load_cmap_dataset.data_manipulation.game_session.cache import load_game_session
 #implementing dtw score between two participants 
 from tslearn.metrics import dtw
 
@@ -22,10 +23,10 @@ def dtw_score_similarity_matrix(validated_dataset: dict[str,Callable])-> dict[st
     similarity_matrix={}
     n=len(validated_dataset.items())
     L=[np.zeros((n,n)) for num_challenge in range(14)]
-    for i, (key1, data_loading_func1) in enumerate(validated_dataset.items()):
-        for j, (key2, data_loading_func2) in enumerate(validated_dataset.items()):
-            game_session1 = GameSession.from_dict(data_loading_func1())
-            game_session2 = GameSession.from_dict(data_loading_func2())
+    # Each session is parsed once, not once per pair
+    game_sessions = [load_game_session(key, data_loading_func, lazy=True) for key, data_loading_func in validated_dataset.items()]
+    for i, game_session1 in enumerate(game_sessions):
+        for j, game_session2 in enumerate(game_sessions):
             A=dtw_score_challenge(game_session1,game_session2)
             for num_challenge in range(14):
                 L[num_challenge][i,j]=A[num_challenge]
@@ -11,6 +11,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 
 from ..load_cmap_dataset.data_manipulation.game_session import GameSession
+from ..load_cmap_dataset.data_manipulation.game_session.cache import load_game_session
 
 
 def plot_challenge(game_session: GameSession, challenge: int, ax=None):
@@ -23,7 +24,7 @@ def plot_challenge(game_session: GameSession, challenge: int, ax=None):
 def plot_game_session(validated_dataset: dict[str, Callable]) -> dict[str,Callable] :
     png_dataset={}
     for key, data_loading_func in validated_dataset.items():
-        game_session = GameSession.from_dict(data_loading_func())
+        game_session = load_game_session(key, data_loading_func)
         key=key[:-4]+"png"
         fig, axis = plt.subplots(5, 3)
         fig.set_size_inches(20, 20)
@@ -8,7 +8,9 @@ from copy import deepcopy
 import string
 import sys
 sys.path.insert(0,"c:\\Users\\lenovo\\Documents\\GitHub\\kedro\\o-kidia")
-from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import GameSession
+from ..load_cmap_dataset.data_manipulation.game_session import GameSession
+from ..load_cmap_dataset.data_manipulation.game_session.cache import load_game_session
+from ...extras.dataset.game_session_dataset import GameSessionDataSet
 from typing import Callable, Dict
 import pandas as pd 
 import numpy as np
@@ -33,7 +35,7 @@ import tensorflow as tf
 def create_heatmap(validated_json_dataset: Dict[str, Callable]) -> Dict[str,Callable]:
     images={}
     for key , data_loading_funct in validated_json_dataset.items():
-        game_session = GameSession.from_dict(data_loading_funct())
+        game_session = load_game_session(key, data_loading_funct)
         for challenge in range(0,14):
             #curve = pd.DataFrame.from_records([{"x_model": point[0], "y_model": point[1]} for point in game_session.sorted_activities[0].challenges[challenge].curve_points()])
             key_ch=key[:-5]+"_"+str(challenge)+'.png'
@@ -83,7 +85,7 @@ def vgg19(heatmap_dataset: Dict[str, Callable]) -> Dict[str,Callable]:
     return features
 
 def dataFrame_Similarity_perChallenge(num_challenge: int, M):   
-    id_participant=[GameSession.from_json(os.path.join("data","02_intermediate", "logs", str(i+1)+".json")).student_id for i in range(60)]
+    id_participant=[GameSessionDataSet(os.path.join("data","02_intermediate", "logs", str(i+1)+".json.npz"), lazy=True).load().student_id for i in range(60)]
     best_score=0
     nbr_clusters=0
     silhouette_coefficients=[]
@@ -48,3 +48,11 @@ class TouchInputsEmptyError(Exception):
     """
 
     pass
+
+
+class DuplicateGameSessionError(Exception):
+    """
+    Raised when a log holds the same game session as another one.
+    """
+
+    pass
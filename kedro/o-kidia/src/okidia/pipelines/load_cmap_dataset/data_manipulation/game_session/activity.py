@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from ..exceptions import ChallengesEmptyError, DigitInputsEmptyError
 from .challenge import Challenge
-from .digit_input import DigitInput
+from .digit_input import DigitInputArray
 from .enums import ActivityEnum
+from .fingerprint import fingerprint
 from .video import Video
 
 
@@ -14,10 +15,14 @@ class Activity:
         game_name (str): The name of the game the user played (e.g. "Dj Crocos", "Crocos Factory", ...)
         start_ts (float): The timestamp of the start of the activity
         end_ts (float): The timestamp of the end of the activity
-        digit_inputs (list): A list of all digit-tracking events during the activity
+        digit_inputs (DigitInputArray): All the digit-tracking events during the activity sorted by ts
         challenges (list): A list of all challenges of the activity sorted by start_ts
         video (Video): The video of the activity
 
+    With lazy=True, the digit inputs and the events of the challenges are
+    only parsed when first accessed, then kept. With trusted=True, the types
+    of the arguments are not checked, as they were already validated (see
+    validate_game_session()).
 
     Raises:
         TypeError: When either type for game_name, start_ts, end_ts, video, digit_inputs or challenges is not a string, float, dict or list
@@ -27,7 +32,9 @@ class Activity:
         "game_name",
         "start_ts",
         "end_ts",
-        "digit_inputs",
+        "_digit_inputs",
+        "_digit_inputs_payload",
+        "_trusted",
         "challenges",
         "video",
     )
@@ -39,25 +46,34 @@ class Activity:
         start_ts: float,
         end_ts: float,
         video: dict,
-        digit_inputs: list,
+        digit_inputs: list | DigitInputArray,
         challenges: list,
+        lazy: bool = False,
+        trusted: bool = False,
     ):
-        if not isinstance(game_name, str):
-            raise TypeError(f"Expected a string for 'game_name', got {type(game_name)}")
+        if not trusted:
+            if not isinstance(game_name, str):
+                raise TypeError(
+                    f"Expected a string for 'game_name', got {type(game_name)}"
+                )
 
-        if not isinstance(start_ts, float):
-            raise TypeError(f"Expected a float for 'start_ts', got {type(start_ts)}")
+            if not isinstance(start_ts, float):
+                raise TypeError(
+                    f"Expected a float for 'start_ts', got {type(start_ts)}"
+                )
 
-        if not isinstance(end_ts, float):
-            raise TypeError(f"Expected a float for 'end_ts', got {type(end_ts)}")
+            if not isinstance(end_ts, float):
+                raise TypeError(f"Expected a float for 'end_ts', got {type(end_ts)}")
 
-        if not isinstance(digit_inputs, list):
-            raise TypeError(
-                f"Expected a list for 'digit_inputs', got {type(digit_inputs)}"
-            )
+            if not isinstance(digit_inputs, (list, DigitInputArray)):
+                raise TypeError(
+                    f"Expected a list for 'digit_inputs', got {type(digit_inputs)}"
+                )
 
-        if not isinstance(challenges, list):
-            raise TypeError(f"Expected a list for 'challenges', got {type(challenges)}")
+            if not isinstance(challenges, list):
+                raise TypeError(
+                    f"Expected a list for 'challenges', got {type(challenges)}"
+                )
 
         if not digit_inputs:
             raise DigitInputsEmptyError("No digit inputs provided for this activity")
@@ -69,20 +85,21 @@ class Activity:
         self.start_ts = start_ts
         self.end_ts = end_ts
 
-        if not isinstance(digit_inputs[0], DigitInput):
-            digit_inputs = list(
-                map(lambda digit_input: DigitInput(**digit_input), digit_inputs)
-            )
-        self.digit_inputs: list[DigitInput] = sorted(
-            digit_inputs, key=lambda digit_input: digit_input.ts
-        )
+        self._digit_inputs: DigitInputArray | None = None
+        self._digit_inputs_payload = digit_inputs
+        self._trusted = trusted
+        if not lazy:
+            self._parse_digit_inputs()
 
         if not isinstance(challenges[0], Challenge):
             # if python 3.9 is used, this can be replaced with map(lambda challenge: Challenge(**challenge | **dict(activity=self)), challenges)
             challenges = list(
                 map(
                     lambda challenge_input: Challenge.from_activity(
-                        **{**challenge_input, **dict(activity=self)}
+                        **{
+                            **challenge_input,
+                            **dict(activity=self, lazy=lazy, trusted=trusted),
+                        }
                     ),
                     challenges,
                 )
@@ -91,28 +108,55 @@ class Activity:
             challenges, key=lambda challenge: challenge.start_ts
         )
 
-        self.video = Video(**video)
+        self.video = Video(**video, trusted=trusted)
+
+    def _parse_digit_inputs(self) -> None:
+        # The digit inputs are stored as columns, an activity holding
+        # thousands of them
+        self._digit_inputs = DigitInputArray.from_digit_inputs(
+            self._digit_inputs_payload, trusted=self._trusted
+        )
+        self._digit_inputs_payload = None
+
+    @property
+    def digit_inputs(self) -> DigitInputArray | list:
+        if self._digit_inputs is None:
+            self._parse_digit_inputs()
+        return self._digit_inputs
+
+    @digit_inputs.setter
+    def digit_inputs(self, digit_inputs: DigitInputArray | list) -> None:
+        self._digit_inputs = digit_inputs
+        self._digit_inputs_payload = None
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Activity):
             return False
-        return (
+        return self is other or (
             self.game_name == other.game_name
             and self.start_ts == other.start_ts
             and self.end_ts == other.end_ts
-            and len(self.digit_inputs) == len(other.digit_inputs)
-            and len(self.challenges) == len(other.challenges)
-            and all(
-                digit_input == other_digit_input
-                for digit_input, other_digit_input in zip(
-                    self.digit_inputs, other.digit_inputs
-                )
-            )
-            and all(
-                challenge == other_challenge
-                for challenge, other_challenge in zip(self.challenges, other.challenges)
-            )
             and self.video == other.video
+            and self.challenges == other.challenges
+            and self.digit_inputs == other.digit_inputs
+        )
+
+    def fingerprint(self) -> str:
+        """The content fingerprint of the activity (see fingerprint.py),
+        hashing its current content at each call, in linear time"""
+        digit_inputs = self.digit_inputs
+        if not isinstance(digit_inputs, DigitInputArray):
+            digit_inputs = DigitInputArray.from_digit_inputs(digit_inputs, sort=False)
+        video = self.video
+        return fingerprint(
+            [
+                self.game_name.value,
+                self.start_ts,
+                self.end_ts,
+                None if video is None else [video.start_ts, video.stop_ts, video.path],
+                [challenge.fingerprint() for challenge in self.challenges],
+            ],
+            digit_inputs.fingerprint(),
         )
 
     def copy(self):
@@ -126,8 +170,13 @@ class Activity:
                 stop_ts=self.video.stop_ts,
                 path=self.video.path,
             ),
-            digit_inputs=self.digit_inputs,
+            # The digit inputs not parsed yet are left for the copy to parse
+            digit_inputs=self._digit_inputs_payload
+            if self._digit_inputs is None
+            else self._digit_inputs,
             challenges=self.challenges,
+            lazy=self._digit_inputs is None,
+            trusted=self._trusted,
         )
         return activity
 
@@ -143,7 +192,7 @@ class Activity:
             "end_ts": self.end_ts,
         }
 
-    def get_digit_inputs(self, from_ts: float, to_ts: float) -> list[DigitInput]:
+    def get_digit_inputs(self, from_ts: float, to_ts: float) -> DigitInputArray:
         """Get the digit inputs of the activity between the given timestamps
 
         Args:
@@ -151,10 +200,11 @@ class Activity:
             to_ts (float): The timestamp of the end of the range
 
         Returns:
-            list: The digit inputs of the activity between the given timestamps
+            DigitInputArray: The digit inputs of the activity between the given timestamps, sharing the columns of the activity
         """
-        return [
-            digit_input
-            for digit_input in self.digit_inputs
-            if from_ts <= digit_input.ts <= to_ts
-        ]
+        digit_inputs = self.digit_inputs
+        # e.g. the empty list of a copy without digit inputs
+        if not isinstance(digit_inputs, DigitInputArray):
+            digit_inputs = DigitInputArray.from_digit_inputs(digit_inputs)
+        # The digit inputs are sorted by ts, a binary search finds the range
+        return digit_inputs.between(from_ts, to_ts)
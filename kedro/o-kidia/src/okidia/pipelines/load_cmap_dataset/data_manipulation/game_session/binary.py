@@ -0,0 +1,138 @@
+"""Compact binary form of a game session log: an uncompressed .npz file
+holding the columns of the digit inputs (see DigitInputArray) and a JSON
+header with the rest of the log (metadata, challenges, events, calibration
+points, videos).
+
+The digit inputs, which are most of a log, are read as NumPy arrays instead
+of being decoded from JSON and parsed into objects. The events stay in the
+header, their fields depending on the game.
+
+This is the format of GameSessionDataSet, decoded here so that the cache and
+the cohort scorer can read its files without depending on the dataset.
+"""
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import Any, BinaryIO, Callable
+
+import numpy as np
+
+from .digit_input import DigitInputArray
+from .game_session import GameSession
+
+# Version of the binary format, stored in the header
+FORMAT_VERSION = 1
+# The columns of a DigitInputArray stored in the file
+_COLUMNS = ("ts", "touch_count", "offsets", "finger_id", "x", "y", "phase_code")
+
+
+def _map_digit_inputs(log: dict, function: Callable[[Any], Any]) -> dict:
+    """Returns a shallow copy of a log where the digit inputs of each activity
+    and calibration item are replaced by function(digit_inputs), in the order
+    of the log."""
+
+    def replace(item: Any) -> Any:
+        if isinstance(item, dict) and "digit_inputs" in item:
+            return {**item, "digit_inputs": function(item["digit_inputs"])}
+        return item
+
+    log = dict(log)
+    if isinstance(log.get("screenCalibration"), list):
+        log["screenCalibration"] = list(map(replace, log["screenCalibration"]))
+    activities = log.get("activities")
+    if isinstance(activities, list):
+        log["activities"] = list(map(replace, activities))
+    elif isinstance(activities, dict):
+        log["activities"] = replace(activities)
+    return log
+
+
+def encode(log: dict) -> bytes:
+    """Converts the JSON of a log to the binary form.
+
+    Raises:
+        TypeError: When the digit inputs are not valid (see
+         DigitInputArray.from_digit_inputs())
+    """
+    arrays = []
+
+    def store(digit_inputs: list) -> int:
+        arrays.append(DigitInputArray.from_digit_inputs(digit_inputs))
+        return len(arrays) - 1
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "log": _map_digit_inputs(log, store),
+        "phases": [list(array.phases) for array in arrays],
+    }
+    columns = {
+        f"{index}_{column}": getattr(array, column)
+        for index, array in enumerate(arrays)
+        for column in _COLUMNS
+    }
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+        **columns,
+    )
+    return buffer.getvalue()
+
+
+def _read_header(npz: Any) -> dict:
+    header = json.loads(npz["header"].tobytes())
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported game session format version "
+            f"{header.get('format_version')}, expected {FORMAT_VERSION}"
+        )
+    return header
+
+
+def read_log(file: str | Path | BinaryIO) -> dict:
+    """Reads the JSON of a log in the binary form without its digit inputs,
+    e.g. to read its metadata without building the session.
+
+    Args:
+        file: the path of the file, or the file
+
+    Raises:
+        ValueError: When the file is of another version of the format
+
+    Returns: the log, the digit inputs being replaced by their index in the
+    file
+    """
+    with np.load(file) as npz:
+        return _read_header(npz)["log"]
+
+
+def decode(source: bytes, lazy: bool = False, trusted: bool = False) -> GameSession:
+    """Builds the GameSession of a log in the binary form.
+
+    Args:
+        source: the content of the file
+        lazy: whether the events are parsed lazily (see GameSession)
+        trusted: whether the log was validated, its types not being
+         checked again (see GameSession)
+
+    Raises:
+        ValueError: When the file is of another version of the format
+
+    Returns: the session, the digit inputs sharing the arrays of the file
+    """
+    with np.load(io.BytesIO(source)) as npz:
+        header = _read_header(npz)
+        arrays = [
+            DigitInputArray(
+                *(npz[f"{index}_{column}"] for column in _COLUMNS),
+                phases=tuple(phases),
+            )
+            for index, phases in enumerate(header["phases"])
+        ]
+    return GameSession.from_dict(
+        _map_digit_inputs(header["log"], arrays.__getitem__),
+        lazy=lazy,
+        trusted=trusted,
+    )
@@ -0,0 +1,170 @@
+"""Process-wide cache of parsed game sessions, shared by the nodes of all the
+pipelines: a partition of a dataset of logs is parsed once per run, however
+many nodes (or nested loops) need its GameSession.
+
+The sessions of a GameSessionDataSet are keyed by partition ID and by the
+fingerprint of their file (see GameSessionDataSet.fingerprint()), so a hit
+does not read the file, and a partition whose file changed between two loads
+is parsed again. The data of other loaders is parsed at each call, as there
+is no telling whether it changed without loading it.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Tuple
+
+from .game_session import GameSession
+
+if TYPE_CHECKING:
+    from .....extras.dataset.game_session_dataset import GameSessionDataSet
+
+# Maximum number of cached sessions
+DEFAULT_MAX_ENTRIES = 256
+# Maximum total size of the logs of the cached sessions
+DEFAULT_MAX_BYTES = 2 << 30
+
+# The partition ID and the fingerprint of its file
+CacheKey = Tuple[str, str]
+
+
+def _game_session_dataset(load: Callable[[], Any]) -> GameSessionDataSet | None:
+    """The GameSessionDataSet of a loader of a PartitionedDataSet, or None when
+    the loader is not the load() method of a GameSessionDataSet"""
+    # Imported here, as the dataset imports this package
+    # pylint: disable=import-outside-toplevel
+    from .....extras.dataset.game_session_dataset import GameSessionDataSet
+
+    dataset = getattr(load, "__self__", None)
+    if (
+        isinstance(dataset, GameSessionDataSet)
+        and getattr(load, "__func__", None) is GameSessionDataSet.load
+    ):
+        return dataset
+    return None
+
+
+class GameSessionCache:
+    """LRU cache of the GameSession parsed from each partition of a dataset.
+
+    The least recently used sessions are evicted as soon as there are more
+    than max_entries of them, or their logs are larger than max_bytes in
+    total (the size of the log being a proxy for the size of the session).
+
+    The sessions are cached lazy, and parsed completely for the callers
+    asking for a session which is not (see GameSession.parse()), so that the
+    lazy and the other callers share them. The cached sessions are shared:
+    the nodes must not modify them.
+
+    Attributes:
+        max_entries (int): the maximum number of cached sessions
+        max_bytes (int | None): the maximum total size of the logs of the
+         cached sessions, in bytes, or None for no bound
+        hits (int): the number of sessions found in the cache
+        misses (int): the number of sessions parsed
+    """
+
+    __slots__ = (
+        "max_entries",
+        "max_bytes",
+        "hits",
+        "misses",
+        "_entries",
+        "_size",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # The session and the size of its log, by key, the most recently
+        # used last
+        self._entries: OrderedDict[CacheKey, tuple[GameSession, int]] = OrderedDict()
+        self._size = 0
+        # The nodes may run in threads (ThreadRunner)
+        self._lock = threading.Lock()
+
+    def get(
+        self, partition_id: str, load: Callable[[], Any], lazy: bool = False
+    ) -> GameSession:
+        """Returns the session of a partition, parsing it on a cache miss.
+
+        Only the partitions of a GameSessionDataSet are cached, a hit costing
+        the metadata of the file. The data returned by other loaders is
+        parsed at each call, a GameSession being returned as is.
+
+        Args:
+            partition_id: the ID of the partition in its dataset
+            load: the loading function of the partition, returning the JSON
+             of the log or its GameSession
+            lazy: whether the session may be lazy (see GameSession)
+
+        Returns: the session of the partition, shared with the other callers
+
+        """
+        dataset = _game_session_dataset(load)
+        if dataset is None:
+            data = load()
+            with self._lock:
+                self.misses += 1
+            if isinstance(data, GameSession):
+                # Already parsed, e.g. by a custom dataset
+                return data
+            return GameSession.from_dict(data, lazy=lazy)
+        key = (partition_id, dataset.fingerprint())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            game_session = entry[0]
+        else:
+            source = dataset.read_source()
+            game_session = dataset.decode(source, True, dataset.trusted)
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (game_session, len(source))
+                    self._size += len(source)
+                    self._evict()
+        if not lazy:
+            game_session.parse()
+        return game_session
+
+    def _evict(self) -> None:
+        # The most recent session is kept, even when larger than max_bytes
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+
+    def clear(self) -> None:
+        """Removes all the cached sessions."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# The cache shared by all the nodes of the process
+GAME_SESSION_CACHE = GameSessionCache()
+
+
+def load_game_session(
+    partition_id: str, load: Callable[[], Any], lazy: bool = False
+) -> GameSession:
+    """Returns the session of a partition from the process-wide cache (see
+    GameSessionCache.get())."""
+    return GAME_SESSION_CACHE.get(partition_id, load, lazy)
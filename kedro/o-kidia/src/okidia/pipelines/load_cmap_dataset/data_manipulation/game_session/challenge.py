@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from typing import TYPE_CHECKING, Iterator
 
 import numpy as np
@@ -7,12 +8,150 @@ from tslearn.metrics import dtw_path
 
 from ..exceptions import ChallengeIsTrainingError, EventInputsEmptyError
 from .enums import ActivityEnum
-from .event_input import EventInput
+from .event_input import EventIndex, EventInput, _event_input
+from .fingerprint import fingerprint
 
 if TYPE_CHECKING:
     from .activity import Activity
 
 
+class ChallengeScorer:
+    """The score of a challenge computed event by event: the events of
+    result_codes are added in the order of their timestamps, so the score of
+    a challenge being played is updated in O(1) for each new event (see
+    GameSessionBuilder). The default scorer counts the completed challenges.
+
+    The errors are raised by add(), for the first event that cannot be
+    scored.
+    """
+
+    __slots__ = ("ends", "timeouts")
+
+    # The result codes of the events changing the score
+    result_codes: tuple[int, ...] = (303, 200)
+
+    def __init__(self):
+        self.ends = 0
+        self.timeouts = 0
+
+    def add(self, event: EventInput) -> None:
+        """Adds the next event of result_codes"""
+        if event.result_code == 303:
+            self.ends += 1
+        else:
+            self.timeouts += 1
+
+    def score(self) -> list[int | float]:
+        """The score of the challenge, given its events added so far"""
+        return [self.ends - self.timeouts]
+
+
+class DJCrocosScorer(ChallengeScorer):
+    __slots__ = ("has_failed", "success", "current_try", "continuous")
+
+    result_codes = (302, 101, 303, 1, 2, 3)
+
+    # pylint: disable=super-init-not-called
+    def __init__(self):
+        self.has_failed = False
+        # A success is acounted for when the player didn't fail and the player didn't timeout
+        self.success = 0
+        self.current_try = -1
+        self.continuous = [0 for _ in range(DJCrocosChallenge.nb_games)]
+
+    def add(self, event: EventInput) -> None:
+        if event.result_code == 302:
+            self.has_failed = False
+            self.current_try += 1
+        elif event.result_code == 101:
+            self.has_failed = True
+        elif event.result_code == 303 and not self.has_failed:
+            self.success += 1
+        elif event.result_code in [1, 2, 3]:
+            if not self.has_failed:
+                self.continuous[self.current_try] += 1
+
+    def score(self) -> tuple[float, float, float]:
+        nb_games = DJCrocosChallenge.nb_games
+        max_continuous = sum(self.continuous)
+        score = (self.success / nb_games) + (
+            max_continuous / DJCrocosChallenge.max_continuous_notes
+        )
+        return (
+            score,
+            self.success / nb_games,
+            max_continuous / DJCrocosChallenge.max_continuous_notes,
+        )
+
+
+class CrocosFactoryScorer(ChallengeScorer):
+    __slots__ = ("success",)
+
+    result_codes = (1, 2, 3)
+
+    # pylint: disable=super-init-not-called
+    def __init__(self):
+        self.success = 0
+
+    def add(self, event: EventInput) -> None:
+        self.success += 1
+
+    def score(self) -> tuple[float, int]:
+        return self.success / CrocosFactoryChallenge.nb_games, self.success
+
+
+class _AnswersScorer(ChallengeScorer):
+    """The right and wrong answers of a challenge, as sets of object names"""
+
+    __slots__ = ("right_answer", "wrong_answer")
+
+    # The result codes adding or removing a right or a wrong answer
+    right_adds: tuple[int, ...] = ()
+    wrong_adds: tuple[int, ...] = ()
+    right_removes: tuple[int, ...] = ()
+
+    # pylint: disable=super-init-not-called
+    def __init__(self):
+        self.right_answer = set()
+        self.wrong_answer = set()
+
+    def add(self, event: EventInput) -> None:
+        if event.result_code in self.right_adds:
+            self.right_answer.add(event.object_name)
+        elif event.result_code in self.wrong_adds:
+            self.wrong_answer.add(event.object_name)
+        elif event.result_code in self.right_removes:
+            self.right_answer.remove(event.object_name)
+        else:
+            self.wrong_answer.remove(event.object_name)
+
+
+class CrocosSpotScorer(_AnswersScorer):
+    __slots__ = ()
+
+    result_codes = (1, 2, 3, 102, 103, 104, 105, 4, 101)
+    right_adds = (1, 2, 3)
+    wrong_adds = (102, 103, 104, 105)
+    right_removes = (101,)
+
+    def score(self) -> tuple[float, int]:
+        answers = len(self.right_answer) - len(self.wrong_answer)
+        return max(0, answers) / CrocosSpotChallenge.nb_games, answers
+
+
+class CrocosVocabuloScorer(_AnswersScorer):
+    __slots__ = ()
+
+    result_codes = (1, 2, 101, 102, 3, 4, 103, 104)
+    right_adds = (1, 101)
+    wrong_adds = (2, 102)
+    right_removes = (3, 103)
+
+    def score(self) -> tuple[int, int]:
+        answers = len(self.right_answer) - len(self.wrong_answer)
+        return max(0, answers), answers
+
+
 class Challenge:
     """A challenge of an activity (can be a level of an activity) with a
     start time, stop time and a list of events
@@ -24,6 +163,13 @@ class Challenge:
         training (bool): Whether the level is a training level or not
         events (list): A list of all events in the challenge (when a child
          touch outside an object, no log is created) sorted by timestamp
+        event_index (EventIndex): The index of the events by result code
+         and object name
+
+    With lazy=True, the events are only parsed when first accessed (through
+    events, sorted_events or event_index), then kept. With trusted=True, the
+    types of the arguments and of the events are not checked, as they were
+    already validated (see validate_game_session()).
 
     Raises:
         TypeError: When either type for start_ts, stop_ts, current_challenge,
@@ -35,11 +181,18 @@ class Challenge:
         "end_ts",
         "current_challenge",
         "training",
-        "events",
+        "_events",
+        "_event_index",
+        "_events_payload",
+        "_trusted",
         "activity",
         "state",
     )
 
+    # The scorer of the challenges of this type, None when their score
+    # cannot be computed event by event
+    scorer: type[ChallengeScorer] | None = ChallengeScorer
+
     def __init__(
         self,
         start_ts: float,
@@ -49,23 +202,28 @@ class Challenge:
         events: list,
         activity: Activity = None,
         state: list = [],
+        lazy: bool = False,
+        trusted: bool = False,
     ):
-        if not isinstance(start_ts, float):
-            raise TypeError(f"Expected a float for 'start_ts', got {type(start_ts)}")
+        if not trusted:
+            if not isinstance(start_ts, float):
+                raise TypeError(
+                    f"Expected a float for 'start_ts', got {type(start_ts)}"
+                )
 
-        if not isinstance(end_ts, float):
-            raise TypeError(f"Expected a float for 'end_ts', got {type(end_ts)}")
+            if not isinstance(end_ts, float):
+                raise TypeError(f"Expected a float for 'end_ts', got {type(end_ts)}")
 
-        if not isinstance(current_challenge, int):
-            raise TypeError(
-                f"Expected an int for 'current_challenge', got {type(current_challenge)}"
-            )
+            if not isinstance(current_challenge, int):
+                raise TypeError(
+                    f"Expected an int for 'current_challenge', got {type(current_challenge)}"
+                )
 
-        if not isinstance(training, bool):
-            raise TypeError(f"Expected a bool for 'training', got {type(training)}")
+            if not isinstance(training, bool):
+                raise TypeError(f"Expected a bool for 'training', got {type(training)}")
 
-        if not isinstance(events, list):
-            raise TypeError(f"Expected a list for 'events', got {type(events)}")
+            if not isinstance(events, list):
+                raise TypeError(f"Expected a list for 'events', got {type(events)}")
 
         if start_ts > end_ts:
             raise ValueError(
@@ -85,14 +243,12 @@ class Challenge:
         self.current_challenge = current_challenge
         self.training = training
 
-        if not isinstance(events[0], EventInput):
-            events = list(map(lambda e: EventInput(**e), events))
-
-        # All events have now a timestamp so we can sort them
-        self.events: list[EventInput] = sorted(
-            events,
-            key=lambda e: e.ts,
-        )
+        self._events: list[EventInput] | None = None
+        self._event_index: EventIndex | None = None
+        self._events_payload = events
+        self._trusted = trusted
+        if not lazy:
+            self._parse_events()
         self.state: list[dict] = state
         # TODO: Remove this when the activity is not needed anymore
         self.activity = activity
@@ -105,34 +261,18 @@ class Challenge:
         training: bool,
         events: list,
         activity: Activity,
+        lazy: bool = False,
+        trusted: bool = False,
     ):
-        if activity.game_name is ActivityEnum.CROCOS_MAZE:
-            return CrocosMazeChallenge(
-                start_ts, end_ts, current_challenge, training, events, activity
-            )
-        elif activity.game_name is ActivityEnum.DJ_CROCOS:
-            return DJCrocosChallenge(
-                start_ts, end_ts, current_challenge, training, events, activity
-            )
-        elif activity.game_name is ActivityEnum.CROCOS_FACTORY:
-            return CrocosFactoryChallenge(
-                start_ts, end_ts, current_challenge, training, events, activity
-            )
-        elif activity.game_name is ActivityEnum.CROCOS_SPOT:
-            return CrocosSpotChallenge(
-                start_ts, end_ts, current_challenge, training, events, activity
-            )
-        elif activity.game_name is ActivityEnum.CROCOS_VOCABULO:
-            return CrocosVocabuloChallenge(
-                start_ts, end_ts, current_challenge, training, events, activity
-            )
-        return Challenge(
+        return CHALLENGE_TYPES.get(activity.game_name, Challenge)(
             start_ts,
             end_ts,
             current_challenge,
             training,
             events,
             activity,
+            lazy=lazy,
+            trusted=trusted,
         )
 
     @staticmethod
@@ -150,34 +290,73 @@ class Challenge:
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Challenge):
             return False
-        return (
+        return self is other or (
             self.start_ts == other.start_ts
             and self.end_ts == other.end_ts
             and self.current_challenge == other.current_challenge
             and self.training == other.training
-            and len(self.events) == len(other.events)
-            and all(
-                event == other_event
-                for event, other_event in zip(self.events, other.events)
-            )
+            and self.events == other.events
+        )
+
+    def fingerprint(self) -> str:
+        """The content fingerprint of the challenge (see fingerprint.py),
+        hashing its current content at each call, in linear time"""
+        return fingerprint(
+            [self.start_ts, self.end_ts, self.current_challenge, self.training],
+            self.event_index.fingerprint(),
+        )
+
+    def _parse_events(self) -> None:
+        events = self._events_payload
+        if not isinstance(events[0], EventInput):
+            if self._trusted:
+                events = [_event_input(**event) for event in events]
+            else:
+                events = list(map(lambda e: EventInput(**e), events))
+
+        # All events have now a timestamp so we can sort them
+        self._events = sorted(
+            events,
+            key=lambda e: e.ts,
         )
+        self._event_index = EventIndex(self._events)
+        self._events_payload = None
+
+    @property
+    def events(self) -> list[EventInput]:
+        if self._events is None:
+            self._parse_events()
+        return self._events
+
+    @property
+    def event_index(self) -> EventIndex:
+        if self._event_index is None:
+            self._parse_events()
+        return self._event_index
 
     @property
     def sorted_events(self) -> list[EventInput]:
-        return sorted(self.events, key=lambda e: e.ts)
+        # The events are sorted once for all when they are parsed
+        return self.events
 
     def score(self) -> list[int | float]:
-        """The score of the challenge, by default counts the completed challenges
+        """The score of the challenge, computed by its scorer (by default,
+        counts the completed challenges)
 
         Returns:
-            int: The score of the challenge
+            list | tuple: The score of the challenge, followed by the score
+             components
         """
-        events_end = sum(map(lambda e: e.result_code == 303, self.sorted_events))
-        timeout_events = sum(map(lambda e: e.result_code == 200, self.sorted_events))
-        return [events_end - timeout_events]
+        scorer = self.scorer()
+        for event in self.event_index.with_result_code(*scorer.result_codes):
+            scorer.add(event)
+        return scorer.score()
 
 
 class CrocosMazeChallenge(Challenge):
+    # The score is computed from the digit inputs once the curve is drawn
+    scorer = None
+
     def __init__(
         self,
         start_ts: float,
@@ -186,7 +365,10 @@ class CrocosMazeChallenge(Challenge):
         training: bool,
         events: list,
         activity: Activity,
+        lazy: bool = False,
+        trusted: bool = False,
     ):
+        # Splitting the states from the events does not parse them
         filtered_events: list = []
         state: list = []
         for event in events:
@@ -201,6 +383,8 @@ class CrocosMazeChallenge(Challenge):
             events,
             activity,
             state,
+            lazy,
+            trusted,
         )
 
     def constant_elapsed_time(self, point: int) -> float:
@@ -243,24 +427,33 @@ class CrocosMazeChallenge(Challenge):
             Iterator[Tuple[float, float]]: The digit points related to the
              curve points of the challenge
         """
-        start_ts: float | None = None
-        end_ts: float | None = None
-        for event in self.sorted_events:
-            if event.object_name == "Cursor":
-                start_ts = event.ts
-            elif event.result_code == 303:
-                end_ts = event.ts
-                break
-        if start_ts is None or end_ts is None:
+        index = self.event_index
+        # The curve ends with the first end event (not on the cursor)
+        end = next(
+            (
+                position
+                for position in index.positions(303)
+                if index.object_name[position] != "Cursor"
+            ),
+            None,
+        )
+        if end is None:
             return None
+        # and starts with the last touch of the cursor before it
+        cursor = index.object_name_positions.get("Cursor", ())
+        before_end = bisect_left(cursor, end)
+        if not before_end:
+            return None
+        start_ts = index.events[cursor[before_end - 1]].ts
+        end_ts = index.events[end].ts
 
         if self.activity:
-            for digit_input in self.activity.get_digit_inputs(start_ts, end_ts):
-                yield (
-                    digit_input.touches[0].relative_position_x,
-                    digit_input.touches[0].relative_position_y,
-                    digit_input.ts - start_ts,
-                )
+            digit_inputs = self.activity.get_digit_inputs(start_ts, end_ts).asdict()
+            yield from zip(
+                digit_inputs["x"].tolist(),
+                digit_inputs["y"].tolist(),
+                (digit_inputs["ts"] - start_ts).tolist(),
+            )
 
     @staticmethod
     def compute_activity_score(scores: list[list[int | float]]) -> float:
@@ -289,6 +482,8 @@ class CrocosMazeChallenge(Challenge):
 
 
 class DJCrocosChallenge(Challenge):
+    scorer = DJCrocosScorer
+
     # Maximum continuous number of notes that can be played in a challenge
     max_continuous_notes = 3 + 5 + 7 + 9
     # Four tries to complete the challenge
@@ -306,38 +501,10 @@ class DJCrocosChallenge(Challenge):
         """
         return sum(map(lambda s: s[0], scores))
 
-    def score(self) -> tuple[float, float, float]:
-        """The score of the challenge
-
-        Returns:
-            Tuple[int]: The score of the challenge, followed by the score components
-        """
-        has_failed = False
-        # A success is acounted for when the player didn't fail and the player didn't timeout
-        success = 0
-        current_try = -1
-        continuous = [0 for _ in range(self.nb_games)]
-        for e in self.sorted_events:
-            if e.result_code == 302:
-                has_failed = False
-                current_try += 1
-            elif e.result_code == 101:
-                has_failed = True
-            elif e.result_code == 303 and not has_failed:
-                success += 1
-            elif e.result_code in [1, 2, 3]:
-                if not has_failed:
-                    continuous[current_try] += 1
-        max_continuous = sum(continuous)
-        score = (success / self.nb_games) + (max_continuous / self.max_continuous_notes)
-        return (
-            score,
-            success / self.nb_games,
-            max_continuous / self.max_continuous_notes,
-        )
-
 
 class CrocosFactoryChallenge(Challenge):
+    scorer = CrocosFactoryScorer
+
     # Number of experiments to complete the challenge
     nb_games = 3
 
@@ -355,21 +522,10 @@ class CrocosFactoryChallenge(Challenge):
         nb_games = CrocosFactoryChallenge.nb_games * 8
         return success / nb_games
 
-    def score(self) -> tuple[float, int]:
-        """The score of the challenge
-
-        Returns:
-            Tuple[int]: The score of the challenge, followed by the score components
-        """
-        success = 0
-        for e in self.sorted_events:
-            if e.result_code in [1, 2, 3]:
-                success += 1
-
-        return success / CrocosFactoryChallenge.nb_games, success
-
 
 class CrocosSpotChallenge(Challenge):
+    scorer = CrocosSpotScorer
+
     # Number of pairs to select per challenge
     nb_games = 12
 
@@ -387,33 +543,10 @@ class CrocosSpotChallenge(Challenge):
             CrocosSpotChallenge.nb_games * 3
         )
 
-    def score(self) -> tuple[float, int]:
-        """The score of the challenge
-
-        Returns:
-            Tuple[int]: The score of the challenge, followed by the score components
-        """
-        right_answer = set()
-        wrong_answer = set()
-        for e in self.sorted_events:
-            if e.result_code in [1, 2, 3, 102, 103, 104, 105]:
-                if e.result_code in [1, 2, 3]:
-                    right_answer.add(e.object_name)
-                else:
-                    wrong_answer.add(e.object_name)
-            elif e.result_code in [4, 101]:
-                if e.result_code == 4:
-                    wrong_answer.remove(e.object_name)
-                elif e.result_code == 101:
-                    right_answer.remove(e.object_name)
-        score = (
-            max(0, (len(right_answer) - len(wrong_answer)))
-            / CrocosSpotChallenge.nb_games
-        )
-        return score, len(right_answer) - len(wrong_answer)
-
 
 class CrocosVocabuloChallenge(Challenge):
+    scorer = CrocosVocabuloScorer
+
     # Number words/images to guess during the game
     nb_games = 28
 
@@ -431,24 +564,12 @@ class CrocosVocabuloChallenge(Challenge):
             CrocosVocabuloChallenge.nb_games
         )
 
-    def score(self) -> tuple[int, int]:
-        """The score of the challenge
 
-        Returns:
-            Tuple[int]: The score of the challenge, followed by the score components
-        """
-        right_answer = set()
-        wrong_answer = set()
-        for e in self.sorted_events:
-            if e.result_code in [1, 2, 101, 102]:
-                if e.result_code in [1, 101]:
-                    right_answer.add(e.object_name)
-                else:
-                    wrong_answer.add(e.object_name)
-            elif e.result_code in [3, 4, 103, 104]:
-                if e.result_code in [3, 103]:
-                    right_answer.remove(e.object_name)
-                else:
-                    wrong_answer.remove(e.object_name)
-        score = max(0, (len(right_answer) - len(wrong_answer)))
-        return score, len(right_answer) - len(wrong_answer)
+# The type of the challenges of each activity, the others being Challenge
+CHALLENGE_TYPES: dict[ActivityEnum, type[Challenge]] = {
+    ActivityEnum.CROCOS_MAZE: CrocosMazeChallenge,
+    ActivityEnum.DJ_CROCOS: DJCrocosChallenge,
+    ActivityEnum.CROCOS_FACTORY: CrocosFactoryChallenge,
+    ActivityEnum.CROCOS_SPOT: CrocosSpotChallenge,
+    ActivityEnum.CROCOS_VOCABULO: CrocosVocabuloChallenge,
+}
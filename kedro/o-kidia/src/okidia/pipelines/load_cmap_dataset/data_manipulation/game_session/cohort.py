@@ -0,0 +1,354 @@
+"""Scoring of a whole cohort of game sessions: the sessions of a directory of
+logs, or of a partitioned dataset, are scored in a pool of processes into one
+table of the scores of every activity and challenge.
+
+Each session is identified by its partition ID (its path relative to the
+directory, without the suffix) and by a fingerprint of its log, so the table
+of a previous run can be updated by scoring only the new or modified
+sessions.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping, Tuple, Union
+
+import pandas as pd
+from kedro.extras.datasets.json import JSONDataSet
+from kedro.io.core import get_filepath_str
+
+from . import binary
+from .cache import _game_session_dataset
+from .game_session import GameSession
+
+logger = logging.getLogger(__name__)
+
+# The columns of the score table: a row per activity (the challenge being
+# missing) followed by a row per challenge of the activity, or a single row
+# with the error of a session that cannot be scored
+SCORE_COLUMNS = [
+    "session",
+    "fingerprint",
+    "student_id",
+    "activity",
+    "challenge",
+    "score",
+    "error",
+]
+
+# The maximum number of sessions scored at once by a process
+CHUNK_SIZE = 16
+
+
+def _decode_json(source: bytes, lazy: bool) -> GameSession:
+    return GameSession.from_dict(json.loads(source), lazy=lazy)
+
+
+# The decoding function of the logs of a directory, by suffix
+_DECODERS = {".json": _decode_json, ".npz": binary.decode}
+
+# The size of the chunks of the logs read to fingerprint them
+READ_SIZE = 1 << 20
+
+Sessions = Union[str, Path, Mapping[str, Callable[[], Any]]]
+# The content of a log and the function decoding it into a GameSession
+Source = Tuple[bytes, Callable[[bytes, bool], GameSession]]
+# A session to score: its ID, the fingerprint of its log, and the function
+# reading its log, called by the process scoring it
+Task = Tuple[str, str, Callable[[], Source]]
+
+
+def _decode_pickle(source: bytes, lazy: bool) -> GameSession:
+    data = pickle.loads(source)
+    if isinstance(data, GameSession):
+        return data
+    return GameSession.from_dict(data, lazy=lazy)
+
+
+def _source(content: bytes, decode: Callable[[bytes, bool], GameSession]) -> Source:
+    return content, decode
+
+
+def _file_source(load: Callable[[], Any]) -> Source | None:
+    """Reads the file of a loader of a PartitionedDataSet, without decoding
+    it, when the loader is the load() method of a GameSessionDataSet or of a
+    JSONDataSet (with the default open arguments), so that the fingerprint
+    of a partition is the one of its file, as for a directory.
+
+    Returns: the source of the partition, or None for other loaders
+    """
+    dataset = _game_session_dataset(load)
+    if dataset is not None:
+        return dataset.read_source(), partial(
+            type(dataset).decode, trusted=dataset.trusted
+        )
+    dataset = getattr(load, "__self__", None)
+    # JSONDataSet has no public access to its file
+    # pylint: disable=protected-access
+    if (
+        not isinstance(dataset, JSONDataSet)
+        or getattr(load, "__func__", None) is not JSONDataSet.load
+        or set(dataset._fs_open_args_load) - {"mode"}
+    ):
+        return None
+    load_path = get_filepath_str(dataset._get_load_path(), dataset._protocol)
+    with dataset._fs.open(load_path, mode="rb") as fs_file:
+        return fs_file.read(), _decode_json
+
+
+def _read_file(path: Path, decode: Callable[[bytes, bool], GameSession]) -> Source:
+    return path.read_bytes(), decode
+
+
+def _fingerprint(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _file_fingerprint(path: Path) -> str:
+    """The fingerprint of a file, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(partial(file.read, READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _directory_tasks(directory: str | Path) -> Iterator[Task]:
+    """The logs (.json or .npz files) of a directory and its subdirectories,
+    by partition ID"""
+    directory = Path(directory)
+    for path in sorted(directory.rglob("*")):
+        decode = _DECODERS.get(path.suffix)
+        if decode is not None and path.is_file():
+            partition_id = path.relative_to(directory).with_suffix("").as_posix()
+            yield partition_id, _file_fingerprint(path), partial(
+                _read_file, path, decode
+            )
+
+
+def _loader_source(load: Callable[[], Any]) -> Source:
+    """The source of a partition of a PartitionedDataSet: the file itself for
+    a JSONDataSet or a GameSessionDataSet, else its data"""
+    file_source = _file_source(load)
+    if file_source is not None:
+        return file_source
+    return pickle.dumps(load(), protocol=pickle.HIGHEST_PROTOCOL), _decode_pickle
+
+
+def _partition_tasks(loaders: Mapping[str, Callable[[], Any]]) -> Iterator[Task]:
+    """The partitions of a PartitionedDataSet. The file of a partition is
+    read again by the process scoring it, only its fingerprint being kept,
+    while the data of the other loaders is sent to the process."""
+    for partition_id, load in loaders.items():
+        file_source = _file_source(load)
+        if file_source is not None:
+            yield partition_id, _fingerprint(file_source[0]), partial(
+                _loader_source, load
+            )
+        else:
+            content, decode = _loader_source(load)
+            yield partition_id, _fingerprint(content), partial(_source, content, decode)
+
+
+def _error_row(session: str, fingerprint: str, student_id, exc: Exception) -> tuple:
+    return (
+        session,
+        fingerprint,
+        student_id,
+        None,
+        None,
+        None,
+        f"{type(exc).__name__}: {exc}",
+    )
+
+
+def score_sources(tasks: list[Task]) -> list[list[tuple]]:
+    """Scores sessions, their challenges being scored at once (see
+    GameSession.score_many())
+
+    Args:
+        tasks (list): The ID of each session, the fingerprint of its log, and
+         the function reading its log: the content and the function decoding
+         it
+
+    Returns:
+        list: The rows of each session in the score table (see SCORE_COLUMNS)
+    """
+    results: list[list[tuple]] = [[] for _ in tasks]
+    decoded, game_sessions = [], []
+    for position, (session, fingerprint, read) in enumerate(tasks):
+        try:
+            content, decode = read()
+            game_sessions.append(decode(content, False))
+            decoded.append(position)
+        except Exception as exc:  # pylint: disable=broad-except
+            # One bad log must not stop the scoring of the cohort
+            results[position].append(_error_row(session, fingerprint, None, exc))
+    for position, game_session, scores in zip(
+        decoded, game_sessions, GameSession.score_many(game_sessions)
+    ):
+        session, fingerprint, _ = tasks[position]
+        student_id = game_session.student_id
+        if isinstance(scores, Exception):
+            results[position].append(
+                _error_row(session, fingerprint, student_id, scores)
+            )
+            continue
+        activity_scores, challenge_scores = scores
+        challenges = {}
+        for activity, challenge, score in challenge_scores.itertuples(index=False):
+            challenges.setdefault(activity, []).append((challenge, score))
+        rows = results[position]
+        for activity, score in activity_scores.itertuples(index=False):
+            rows.append((session, fingerprint, student_id, activity, None, score, None))
+            rows.extend(
+                (session, fingerprint, student_id, activity, challenge, score, None)
+                for challenge, score in challenges.get(activity, ())
+            )
+    return results
+
+
+def _score_sources(tasks: list[Task], workers: int | None) -> list[list[tuple]]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    # The sessions are scored in chunks, bounding the memory of each process
+    size = max(1, min(CHUNK_SIZE, -(-len(tasks) // workers)))
+    chunks = [tasks[start : start + size] for start in range(0, len(tasks), size)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(score_sources, chunks))
+    else:
+        results = list(map(score_sources, chunks))
+    return [rows for result in results for rows in result]
+
+
+def score_cohort(
+    sessions: Sessions,
+    previous: pd.DataFrame | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """Scores the sessions of a cohort
+
+    Args:
+        sessions (str | Path | Mapping): A directory of .json or .npz logs, or
+         the loading function of each partition of a PartitionedDataSet
+        previous (pd.DataFrame, optional): The score table of a previous run.
+         Its sessions whose log has not changed are not scored again, and its
+         sessions missing from sessions are kept. Defaults to None.
+        workers (int | None, optional): The number of processes scoring the
+         sessions, 1 to score them in the current process. Defaults to None,
+         for one process per CPU.
+
+    Returns:
+        pd.DataFrame: The score table (see SCORE_COLUMNS), sorted by session
+    """
+    if isinstance(sessions, (str, Path)):
+        candidates = _directory_tasks(sessions)
+    else:
+        candidates = _partition_tasks(sessions)
+    if previous is None:
+        previous = pd.DataFrame(columns=SCORE_COLUMNS)
+    scored = set(zip(previous["session"], previous["fingerprint"]))
+
+    # Only the fingerprints of the logs are kept until they are scored, each
+    # process reading the logs it scores
+    tasks, count = [], 0
+    for partition_id, fingerprint, read in candidates:
+        count += 1
+        if (partition_id, fingerprint) not in scored:
+            tasks.append((partition_id, fingerprint, read))
+    logger.info(
+        "Scoring %d of %d sessions (%d already scored)",
+        len(tasks),
+        count,
+        count - len(tasks),
+    )
+
+    rows = [row for result in _score_sources(tasks, workers) for row in result]
+    for row in rows:
+        if row[-1] is not None:
+            logger.warning("The session %s cannot be scored: %s", row[0], row[-1])
+    rescored = {partition_id for partition_id, _, _ in tasks}
+    table = pd.concat(
+        [
+            previous[~previous["session"].isin(rescored)],
+            pd.DataFrame(rows, columns=SCORE_COLUMNS),
+        ],
+        ignore_index=True,
+    )
+    # The rows of each session stay in the order of its activities
+    return table.sort_values("session", kind="stable", ignore_index=True)
+
+
+def read_scores(path: str | Path) -> pd.DataFrame:
+    """Reads a score table written by write_scores()"""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(
+        path,
+        dtype={"session": str, "fingerprint": str, "student_id": str, "activity": str},
+    )
+
+
+def write_scores(table: pd.DataFrame, path: str | Path) -> None:
+    """Writes a score table, in Parquet when the path ends with .parquet,
+    else in CSV"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def main(
+    directory: Path,
+    output_file: Path,
+    workers: int | None = None,
+    incremental: bool = False,
+) -> None:
+    previous = None
+    if incremental and output_file.exists():
+        previous = read_scores(output_file)
+    table = score_cohort(directory, previous, workers)
+    write_scores(table, output_file)
+    print(
+        f"Scores of {table['session'].nunique()} sessions saved to {output_file} "
+        f"({table.drop_duplicates('session')['error'].notna().sum()} not scored)"
+    )
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser("Cohort scores")
+    parser.add_argument("directory", type=Path, help="The directory of the logs")
+    parser.add_argument(
+        "--output-file",
+        "-o",
+        type=Path,
+        required=True,
+        help="The score table to write, .csv or .parquet",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        help="The number of processes, one per CPU by default",
+    )
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help="Only score the sessions new or modified since the output file was written",
+    )
+    args = parser.parse_args()
+    main(**vars(args))
@@ -1,6 +1,14 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+from itertools import accumulate, chain
+from operator import itemgetter
+from typing import Iterable, Iterator
+
+import numpy as np
+
 from ..exceptions import TouchInputsEmptyError
+from .fingerprint import fingerprint, float_column
 
 
 class TouchInput:
@@ -34,22 +42,24 @@ class TouchInput:
         relativePosition_x: float,
         relativePosition_y: float,
         phase: str,
+        trusted: bool = False,
     ):
-        if not isinstance(fingerId, int):
-            raise TypeError(f"Expected an int for 'fingerId', got {type(fingerId)}")
+        if not trusted:
+            if not isinstance(fingerId, int):
+                raise TypeError(f"Expected an int for 'fingerId', got {type(fingerId)}")
 
-        if not isinstance(relativePosition_x, float):
-            raise TypeError(
-                f"Expected a float for 'relativePosition_x', got {type(relativePosition_x)}"
-            )
+            if not isinstance(relativePosition_x, float):
+                raise TypeError(
+                    f"Expected a float for 'relativePosition_x', got {type(relativePosition_x)}"
+                )
 
-        if not isinstance(relativePosition_y, float):
-            raise TypeError(
-                f"Expected a float for 'relativePosition_y', got {type(relativePosition_y)}"
-            )
+            if not isinstance(relativePosition_y, float):
+                raise TypeError(
+                    f"Expected a float for 'relativePosition_y', got {type(relativePosition_y)}"
+                )
 
-        if not isinstance(phase, str):
-            raise TypeError(f"Expected a string for 'phase', got {type(phase)}")
+            if not isinstance(phase, str):
+                raise TypeError(f"Expected a string for 'phase', got {type(phase)}")
 
         self.finger_id = fingerId
         self.relative_position_x = relativePosition_x
@@ -81,25 +91,30 @@ class DigitInput:
 
     __slots__ = ("ts", "touch_count", "touches")
 
-    def __init__(self, ts: float, touchCount: int, touches: list):
-        if not isinstance(ts, float):
-            raise TypeError(f"Expected a float for 'ts', got {type(ts)}")
+    def __init__(
+        self, ts: float, touchCount: int, touches: list, trusted: bool = False
+    ):
+        if not trusted:
+            if not isinstance(ts, float):
+                raise TypeError(f"Expected a float for 'ts', got {type(ts)}")
 
-        if not isinstance(touchCount, int):
-            raise TypeError(f"Expected an int for 'touchCount', got {type(touchCount)}")
+            if not isinstance(touchCount, int):
+                raise TypeError(
+                    f"Expected an int for 'touchCount', got {type(touchCount)}"
+                )
 
-        if not isinstance(touches, list):
-            raise TypeError(f"Expected a list for 'touches', got {type(touches)}")
+            if not isinstance(touches, list):
+                raise TypeError(f"Expected a list for 'touches', got {type(touches)}")
 
-        if not touches:
-            raise TouchInputsEmptyError("The list of touches cannot be empty")
+            if not touches:
+                raise TouchInputsEmptyError("The list of touches cannot be empty")
 
         self.ts = ts
         self.touch_count = touchCount
 
         self.touches = touches
         if not isinstance(self.touches[0], TouchInput):
-            self.touches = list(map(lambda x: TouchInput(**x), touches))
+            self.touches = [TouchInput(**touch, trusted=trusted) for touch in touches]
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, DigitInput):
@@ -133,3 +148,497 @@ class DigitInput:
             "finger_id": self.touches[0].finger_id,
             "phase": self.touches[0].phase,
         }
+
+
+def _touch_input(
+    finger_id: int, relative_position_x: float, relative_position_y: float, phase: str
+) -> TouchInput:
+    """Builds a TouchInput from already checked values, without the checks of
+    TouchInput()"""
+    touch = TouchInput.__new__(TouchInput)
+    touch.finger_id = finger_id
+    touch.relative_position_x = relative_position_x
+    touch.relative_position_y = relative_position_y
+    touch.phase = phase
+    return touch
+
+
+def _digit_input_fields(
+    digit_input: dict | DigitInput,
+) -> tuple[float, int, list[tuple[int, float, float, str]]]:
+    """Reads the timestamp, the touch count and the touches of a digit input,
+    given as a DigitInput or as its raw dictionary.
+
+    Raw dictionaries are checked like DigitInput() checks its arguments, but
+    without building any object. Any dictionary that DigitInput() would not
+    accept as is goes through DigitInput(), so that the same errors are
+    raised.
+    """
+    if type(digit_input) is dict and len(digit_input) == 3:
+        ts = digit_input.get("ts")
+        touch_count = digit_input.get("touchCount")
+        touches = digit_input.get("touches")
+        if (
+            isinstance(ts, float)
+            and isinstance(touch_count, int)
+            and isinstance(touches, list)
+            and touches
+        ):
+            rows = []
+            for touch in touches:
+                if type(touch) is not dict or len(touch) != 4:
+                    break
+                row = (
+                    touch.get("fingerId"),
+                    touch.get("relativePosition_x"),
+                    touch.get("relativePosition_y"),
+                    touch.get("phase"),
+                )
+                if not (
+                    isinstance(row[0], int)
+                    and isinstance(row[1], float)
+                    and isinstance(row[2], float)
+                    and isinstance(row[3], str)
+                ):
+                    break
+                rows.append(row)
+            else:
+                return ts, touch_count, rows
+
+    if not isinstance(digit_input, DigitInput):
+        digit_input = DigitInput(**digit_input, trusted=False)
+    return (
+        digit_input.ts,
+        digit_input.touch_count,
+        [
+            (
+                touch.finger_id,
+                touch.relative_position_x,
+                touch.relative_position_y,
+                touch.phase,
+            )
+            for touch in digit_input.touches
+        ],
+    )
+
+
+_touch_fields = itemgetter(
+    "fingerId", "relativePosition_x", "relativePosition_y", "phase"
+)
+
+
+def _trusted_digit_input_columns(
+    digit_inputs: list[dict],
+) -> tuple[list, list, list, list[tuple[int, float, float, str]]]:
+    """Reads the timestamps, touch counts, offsets and touches of raw digit
+    inputs already validated (see validate_game_session()), column by column
+    and without any check"""
+    touches = [digit_input["touches"] for digit_input in digit_inputs]
+    return (
+        [digit_input["ts"] for digit_input in digit_inputs],
+        [digit_input["touchCount"] for digit_input in digit_inputs],
+        list(accumulate(map(len, touches), initial=0)),
+        list(map(_touch_fields, chain.from_iterable(touches))),
+    )
+
+
+class DigitInputArray(Sequence):
+    """Columnar storage of a stream of digit inputs: one NumPy array per
+    field instead of one DigitInput object per event.
+
+    The touches of all the digit inputs are stored one after the other, the
+    touches of the i-th digit input being those between offsets[i] and
+    offsets[i + 1]. The phases are stored as codes into the phases tuple.
+
+    The array behaves as a read-only sequence of DigitInput: indexing it with
+    an integer returns a DigitInputView, built on demand, while slices,
+    boolean masks and arrays of indices return a new DigitInputArray.
+
+    Attributes:
+        ts (np.ndarray): The timestamp of each digit input
+        touch_count (np.ndarray): The touch count of each digit input
+        offsets (np.ndarray): The index of the first touch of each digit
+         input, followed by the total number of touches
+        finger_id (np.ndarray): The finger id of each touch
+        x (np.ndarray): The relative x coordinate of each touch
+        y (np.ndarray): The relative y coordinate of each touch
+        phase_code (np.ndarray): The phase of each touch, as an index into
+         phases
+        phases (tuple): The names of the phases
+    """
+
+    __slots__ = (
+        "ts",
+        "touch_count",
+        "offsets",
+        "finger_id",
+        "x",
+        "y",
+        "phase_code",
+        "phases",
+    )
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        ts: np.ndarray,
+        touch_count: np.ndarray,
+        offsets: np.ndarray,
+        finger_id: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        phase_code: np.ndarray,
+        phases: tuple[str, ...],
+    ):
+        self.ts = ts
+        self.touch_count = touch_count
+        self.offsets = offsets
+        self.finger_id = finger_id
+        self.x = x
+        self.y = y
+        self.phase_code = phase_code
+        self.phases = phases
+
+    @staticmethod
+    def from_digit_inputs(
+        digit_inputs: Iterable[dict | DigitInput],
+        sort: bool = True,
+        trusted: bool = False,
+    ) -> DigitInputArray:
+        """Builds the columns from digit inputs, given as DigitInput objects or
+        as raw dictionaries (as found in the JSON of a game session)
+
+        Args:
+            digit_inputs (Iterable): The digit inputs
+            sort (bool, optional): If True, the digit inputs are sorted by
+             timestamp (the order of equal timestamps is kept). Defaults to
+             True.
+            trusted (bool, optional): If True, raw dictionaries are read
+             without being checked, as they were already validated. Defaults
+             to False.
+
+        Raises:
+            TypeError: When a digit input or a touch is not valid, as raised
+             by DigitInput and TouchInput
+            TouchInputsEmptyError: When a digit input has no touch
+
+        Returns:
+            DigitInputArray: The digit inputs
+        """
+        array = digit_inputs
+        if (
+            trusted
+            and isinstance(digit_inputs, list)
+            and all(type(digit_input) is dict for digit_input in digit_inputs)
+        ):
+            ts, touch_count, offsets, touches = _trusted_digit_input_columns(
+                digit_inputs
+            )
+        elif not isinstance(array, DigitInputArray):
+            ts, touch_count, offsets, touches = [], [], [0], []
+            for digit_input in digit_inputs:
+                input_ts, input_touch_count, input_touches = _digit_input_fields(
+                    digit_input
+                )
+                ts.append(input_ts)
+                touch_count.append(input_touch_count)
+                offsets.append(offsets[-1] + len(input_touches))
+                touches.extend(input_touches)
+        if not isinstance(array, DigitInputArray):
+            finger_id, x, y, phase = zip(*touches) if touches else ((),) * 4
+            phases: dict[str, int] = {}
+            array = DigitInputArray(
+                ts=np.array(ts, dtype=np.float64),
+                touch_count=np.array(touch_count, dtype=np.int64),
+                offsets=np.array(offsets, dtype=np.int64),
+                finger_id=np.array(finger_id, dtype=np.int64),
+                x=np.array(x, dtype=np.float64),
+                y=np.array(y, dtype=np.float64),
+                phase_code=np.array(
+                    [phases.setdefault(name, len(phases)) for name in phase],
+                    dtype=np.int16,
+                ),
+                phases=tuple(phases),
+            )
+        if sort and np.any(array.ts[1:] < array.ts[:-1]):
+            array = array[np.argsort(array.ts, kind="stable")]
+        return array
+
+    @staticmethod
+    def concatenate(
+        arrays: Iterable[DigitInputArray | Sequence[DigitInput]],
+    ) -> DigitInputArray:
+        """Concatenates digit inputs, keeping their order
+
+        Args:
+            arrays (Iterable): The digit inputs to concatenate, as
+             DigitInputArray or as sequences of DigitInput (e.g. lists)
+
+        Returns:
+            DigitInputArray: The concatenated digit inputs
+        """
+        arrays = [
+            array
+            if isinstance(array, DigitInputArray)
+            else DigitInputArray.from_digit_inputs(array, sort=False)
+            for array in arrays
+        ]
+        # The phase codes of each array are mapped onto the merged phases
+        phases: dict[str, int] = {}
+        phase_codes = []
+        for array in arrays:
+            mapping = np.array(
+                [phases.setdefault(phase, len(phases)) for phase in array.phases],
+                dtype=np.int16,
+            )
+            phase_codes.append(mapping[array.phase_code])
+        offsets = [np.zeros(1, dtype=np.int64)]
+        for array in arrays:
+            offsets.append(array.offsets[1:] - array.offsets[0] + offsets[-1][-1])
+        return DigitInputArray(
+            ts=np.concatenate([np.empty(0)] + [array.ts for array in arrays]),
+            touch_count=np.concatenate(
+                [np.empty(0, dtype=np.int64)] + [array.touch_count for array in arrays]
+            ),
+            offsets=np.concatenate(offsets),
+            finger_id=np.concatenate(
+                [np.empty(0, dtype=np.int64)]
+                + [array.finger_id[array.touch_slice] for array in arrays]
+            ),
+            x=np.concatenate(
+                [np.empty(0)] + [array.x[array.touch_slice] for array in arrays]
+            ),
+            y=np.concatenate(
+                [np.empty(0)] + [array.y[array.touch_slice] for array in arrays]
+            ),
+            phase_code=np.concatenate(
+                [np.empty(0, dtype=np.int16)]
+                + [
+                    phase_code[array.touch_slice]
+                    for array, phase_code in zip(arrays, phase_codes)
+                ]
+            ),
+            phases=tuple(phases),
+        )
+
+    @property
+    def touch_slice(self) -> slice:
+        """The slice of the touch columns holding the touches of the digit
+        inputs (the columns can be shared with a larger array)"""
+        return slice(self.offsets[0], self.offsets[-1])
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("digit input index out of range")
+            return DigitInputView(self, int(index))
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                # Contiguous digit inputs share the columns of the array
+                stop = max(start, stop)
+                return DigitInputArray(
+                    ts=self.ts[start:stop],
+                    touch_count=self.touch_count[start:stop],
+                    offsets=self.offsets[start : stop + 1],
+                    finger_id=self.finger_id,
+                    x=self.x,
+                    y=self.y,
+                    phase_code=self.phase_code,
+                    phases=self.phases,
+                )
+            index = np.arange(start, stop, step)
+        return self.take(index)
+
+    def index_range(self, from_ts: float, to_ts: float) -> slice:
+        """Finds the digit inputs between two timestamps with a binary search,
+        the digit inputs being sorted by ts
+
+        Args:
+            from_ts (float): The timestamp of the start of the range
+            to_ts (float): The timestamp of the end of the range, included
+
+        Returns:
+            slice: The indices of the digit inputs between the timestamps
+        """
+        return slice(
+            int(np.searchsorted(self.ts, from_ts, side="left")),
+            int(np.searchsorted(self.ts, to_ts, side="right")),
+        )
+
+    def between(self, from_ts: float, to_ts: float) -> DigitInputArray:
+        """The digit inputs between two timestamps (included), found in
+        O(log n) as the digit inputs are sorted by ts. The result shares the
+        columns of this array.
+
+        Args:
+            from_ts (float): The timestamp of the start of the range
+            to_ts (float): The timestamp of the end of the range
+
+        Returns:
+            DigitInputArray: The digit inputs between the timestamps
+        """
+        return self[self.index_range(from_ts, to_ts)]
+
+    def take(self, indices) -> DigitInputArray:
+        """Selects digit inputs
+
+        Args:
+            indices (array_like): The indices of the digit inputs, or a boolean
+             mask
+
+        Returns:
+            DigitInputArray: The selected digit inputs, with their own columns
+        """
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        starts = self.offsets[:-1][indices]
+        counts = self.offsets[1:][indices] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        touches = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+        return DigitInputArray(
+            ts=self.ts[indices],
+            touch_count=self.touch_count[indices],
+            offsets=offsets,
+            finger_id=self.finger_id[touches],
+            x=self.x[touches],
+            y=self.y[touches],
+            phase_code=self.phase_code[touches],
+            phases=self.phases,
+        )
+
+    def __iter__(self) -> Iterator[DigitInputView]:
+        for index in range(len(self)):
+            yield DigitInputView(self, index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, DigitInputArray):
+            phases = np.array(self.phases, dtype=object)
+            other_phases = np.array(other.phases, dtype=object)
+            return (
+                len(self) == len(other)
+                and np.array_equal(self.ts, other.ts)
+                and np.array_equal(self.touch_count, other.touch_count)
+                and np.array_equal(np.diff(self.offsets), np.diff(other.offsets))
+                and np.array_equal(
+                    self.finger_id[self.touch_slice], other.finger_id[other.touch_slice]
+                )
+                and np.array_equal(self.x[self.touch_slice], other.x[other.touch_slice])
+                and np.array_equal(self.y[self.touch_slice], other.y[other.touch_slice])
+                and np.array_equal(
+                    phases[self.phase_code[self.touch_slice]],
+                    other_phases[other.phase_code[other.touch_slice]],
+                )
+            )
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(
+                digit_input == other_digit_input
+                for digit_input, other_digit_input in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"DigitInputArray(<{len(self)} digit inputs>)"
+
+    def fingerprint(self) -> str:
+        """The content fingerprint of the digit inputs, the same for equal
+        digit inputs (see fingerprint.py)"""
+        touches = self.touch_slice
+        # The phases are hashed by name, as their codes depend on the order in
+        # which they were met
+        phase_code = self.phase_code[touches]
+        used = np.unique(phase_code).tolist()
+        names = sorted(self.phases[code] for code in used)
+        rank = np.zeros(len(self.phases), dtype=np.int16)
+        rank[used] = [names.index(self.phases[code]) for code in used]
+        return fingerprint(
+            float_column(self.ts),
+            self.touch_count.astype(np.int64),
+            np.diff(self.offsets).astype(np.int64),
+            self.finger_id[touches].astype(np.int64),
+            float_column(self.x[touches]),
+            float_column(self.y[touches]),
+            names,
+            rank[phase_code],
+        )
+
+    def asdict(self) -> dict[str, np.ndarray]:
+        """Convert the digit inputs to a dictionary of columns, keeping only
+        the first touch of each digit input like DigitInput.asdict()
+
+        Returns:
+            dict: The columns of the digit inputs
+        """
+        first_touches = self.offsets[:-1]
+        return {
+            "ts": self.ts,
+            "touch_count": self.touch_count,
+            "x": self.x[first_touches],
+            "y": self.y[first_touches],
+            "finger_id": self.finger_id[first_touches],
+            "phase": np.array(self.phases, dtype=object)[
+                self.phase_code[first_touches]
+            ],
+        }
+
+
+class DigitInputView(DigitInput):
+    """A DigitInput read on demand from a DigitInputArray. The view is
+    read-only, and its touches are built each time they are accessed.
+
+    Attributes:
+        array (DigitInputArray): The digit inputs holding this one
+        index (int): The index of this digit input in the array
+    """
+
+    __slots__ = ("array", "index")
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, array: DigitInputArray, index: int):
+        self.array = array
+        self.index = index
+
+    def __reduce__(self):
+        # The fields of DigitInput are properties of the view
+        return DigitInputView, (self.array, self.index)
+
+    @property
+    def ts(self) -> float:
+        return float(self.array.ts[self.index])
+
+    @property
+    def touch_count(self) -> int:
+        return int(self.array.touch_count[self.index])
+
+    @property
+    def touches(self) -> list[TouchInput]:
+        array = self.array
+        start, stop = array.offsets[self.index : self.index + 2]
+        return [
+            _touch_input(finger_id, x, y, array.phases[phase_code])
+            for finger_id, x, y, phase_code in zip(
+                array.finger_id[start:stop].tolist(),
+                array.x[start:stop].tolist(),
+                array.y[start:stop].tolist(),
+                array.phase_code[start:stop].tolist(),
+            )
+        ]
+
+    def asdict(self):
+        array = self.array
+        first_touch = array.offsets[self.index]
+        return {
+            "ts": self.ts,
+            "touch_count": self.touch_count,
+            "x": float(array.x[first_touch]),
+            "y": float(array.y[first_touch]),
+            "finger_id": int(array.finger_id[first_touch]),
+            "phase": array.phases[array.phase_code[first_touch]],
+        }
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+from typing import Iterable
+
+import numpy as np
+
 from .enums import EventTypeEnum
+from .fingerprint import fingerprint, float_column
 
 
 class EventInput:
@@ -81,3 +86,146 @@ class EventInput:
             and self.object_name == other.object_name
             and self.args == other.args
         )
+
+
+def _event_input(
+    event_type: str,
+    ts: float,
+    result_code: int | None = None,
+    object_name: str | None = None,
+    **kwargs,
+) -> EventInput:
+    """Builds an EventInput from an event already validated (see
+    validate_game_session()), without the checks of EventInput()"""
+    event = EventInput.__new__(EventInput)
+    event.event_type = EventTypeEnum(event_type)
+    event.ts = ts
+    event.result_code = result_code if isinstance(result_code, int) else None
+    event.object_name = object_name if event.event_type is EventTypeEnum.INPUT else None
+    event.args = kwargs
+    return event
+
+
+class EventIndex:
+    """An index of the events of a challenge, built once from the events
+    sorted by timestamp, to look them up by result code or by object name
+    without sorting or scanning them again.
+
+    The index is immutable: its arrays are read-only and it should not be
+    modified once built.
+
+    Attributes:
+        events (tuple): The events sorted by timestamp
+        ts (np.ndarray): The timestamp of each event
+        result_code (np.ndarray): The result code of each event, or
+         NO_RESULT_CODE when it has none
+        object_name (np.ndarray): The object name of each event, or None
+        result_code_positions (dict): The positions of the events of each
+         result code, in increasing order
+        object_name_positions (dict): The positions of the events of each
+         object name, in increasing order
+    """
+
+    __slots__ = (
+        "events",
+        "ts",
+        "result_code",
+        "object_name",
+        "result_code_positions",
+        "object_name_positions",
+    )
+
+    NO_RESULT_CODE = -1
+
+    def __init__(self, sorted_events: Iterable[EventInput]):
+        self.events: tuple[EventInput, ...] = tuple(sorted_events)
+        self.ts = np.array([event.ts for event in self.events], dtype=np.float64)
+        self.result_code = np.array(
+            [
+                self.NO_RESULT_CODE if event.result_code is None else event.result_code
+                for event in self.events
+            ],
+            dtype=np.int64,
+        )
+        self.object_name = np.array(
+            [event.object_name for event in self.events], dtype=object
+        )
+        for array in (self.ts, self.result_code, self.object_name):
+            array.flags.writeable = False
+
+        result_code_positions: dict[int, list[int]] = {}
+        object_name_positions: dict[str, list[int]] = {}
+        for position, event in enumerate(self.events):
+            if event.result_code is not None:
+                result_code_positions.setdefault(event.result_code, []).append(position)
+            if event.object_name is not None:
+                object_name_positions.setdefault(event.object_name, []).append(position)
+        self.result_code_positions: dict[int, tuple[int, ...]] = {
+            code: tuple(positions) for code, positions in result_code_positions.items()
+        }
+        self.object_name_positions: dict[str, tuple[int, ...]] = {
+            name: tuple(positions) for name, positions in object_name_positions.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def fingerprint(self) -> str:
+        """The content fingerprint of the events, the same for equal events
+        (see fingerprint.py)"""
+        return fingerprint(
+            float_column(self.ts),
+            [
+                [
+                    event.event_type.value,
+                    event.result_code,
+                    event.object_name,
+                    event.args,
+                ]
+                for event in self.events
+            ],
+        )
+
+    def positions(self, *result_codes: int) -> list[int]:
+        """The positions of the events with one of the given result codes
+
+        Args:
+            result_codes (int): The result codes to look up
+
+        Returns:
+            list: The positions of the events, in increasing order (i.e. by
+             timestamp)
+        """
+        if len(result_codes) == 1:
+            return list(self.result_code_positions.get(result_codes[0], ()))
+        return sorted(
+            position
+            for code in set(result_codes)
+            for position in self.result_code_positions.get(code, ())
+        )
+
+    def with_result_code(self, *result_codes: int) -> list[EventInput]:
+        """The events with one of the given result codes, sorted by timestamp"""
+        return [self.events[position] for position in self.positions(*result_codes)]
+
+    def with_object_name(self, object_name: str) -> list[EventInput]:
+        """The events on the given object, sorted by timestamp"""
+        return [
+            self.events[position]
+            for position in self.object_name_positions.get(object_name, ())
+        ]
+
+    def count(self, *result_codes: int) -> int:
+        """The number of events with one of the given result codes"""
+        return sum(
+            len(self.result_code_positions.get(code, ())) for code in set(result_codes)
+        )
+
+    def first(self, *result_codes: int) -> EventInput | None:
+        """The first event with one of the given result codes, or None"""
+        positions = [
+            self.result_code_positions[code][0]
+            for code in set(result_codes)
+            if code in self.result_code_positions
+        ]
+        return self.events[min(positions)] if positions else None
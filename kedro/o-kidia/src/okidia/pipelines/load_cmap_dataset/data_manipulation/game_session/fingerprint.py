@@ -0,0 +1,49 @@
+"""Content fingerprints of game sessions: a hash of what the __eq__ methods
+of GameSession, ScreenCalibration, Activity and Challenge compare, computed
+from the columns of the digit inputs and of the events instead of object by
+object.
+
+Two objects have the same fingerprint when they are equal, whatever the form
+of their log (JSON or binary, lazy or not, with reordered keys), so the
+fingerprint can be used as a cache key, or to find the same session uploaded
+twice. It is computed on demand and not kept, as the objects can be modified;
+they are compared by __eq__ and are not hashable.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+
+import numpy as np
+
+# The size of the fingerprints, in bytes (their hex form being twice longer)
+DIGEST_SIZE = 16
+
+
+def fingerprint(*parts) -> str:
+    """Hashes the parts of the content of an object
+
+    Args:
+        parts: NumPy arrays, hashed with their dtype and their bytes, and
+         JSON values (e.g. the fingerprints of the nested objects)
+
+    Returns:
+        str: The fingerprint, in hex
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            header = f"{part.dtype.str}:{part.size}"
+        else:
+            part = json.dumps(part, sort_keys=True, separators=(",", ":")).encode()
+            header = f"json:{len(part)}"
+        # The headers keep the parts apart
+        digest.update(header.encode())
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def float_column(values) -> np.ndarray:
+    """A float64 column, -0.0 being hashed as 0.0 as they are equal"""
+    return np.asarray(values, dtype=np.float64) + 0.0
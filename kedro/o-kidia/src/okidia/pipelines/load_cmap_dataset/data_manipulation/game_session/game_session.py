@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import os
 from argparse import ArgumentParser
-from functools import reduce
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from json import load, loads
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Callable, Iterable, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
 from ..exceptions import ScreenCalibrationOrActivitiesEmptyError
 from .activity import Activity
+from .challenge import Challenge
+from .digit_input import DigitInputArray
 from .enums import ActivityEnum, PhaseEnum
-from .event_input import EventInput
+from .fingerprint import fingerprint
+from .phases import segment_phases
+from .scoring import score_challenges
 from .screen_calibration import ScreenCalibration
 
 
@@ -104,6 +111,8 @@ class GameSession:
         screen_calibration (ScreenCalibration | None): Screen calibration metadata
         activities (dict[Activity]): List of Activity objects
         copying (bool): True if the user is copying the game, False otherwise. Allows to ignore the validation of the game session
+        lazy (bool): If True, only the metadata of the session and the headers of the activities and challenges are parsed, the digit inputs and events being parsed when first accessed
+        trusted (bool): If True, the types of the log are not checked by the objects of the session, as it was already validated (see validate_game_session())
 
     Raises:
         TypeError: When either type for student_id, device_name, device_type, device_model, soft_configuration_name or resolution is not a string
@@ -137,8 +146,10 @@ class GameSession:
         screenCalibration: list | None = None,
         activities: list | dict | None = None,
         copying: bool = False,
+        lazy: bool = False,
+        trusted: bool = False,
     ):
-        if not copying:
+        if not copying and not trusted:
             self.valid_session(
                 student_id,
                 device_name,
@@ -165,7 +176,9 @@ class GameSession:
         # When we copy a game session, we don't pass the screen calibration
         # and activities (shallow)
         if not copying and screenCalibration is not None:
-            self.screen_calibration = ScreenCalibration(screenCalibration)
+            self.screen_calibration = ScreenCalibration(
+                screenCalibration, lazy, trusted
+            )
         else:
             self.screen_calibration = None
 
@@ -176,11 +189,14 @@ class GameSession:
                 self.activities = {
                     activity.game_name: activity
                     for activity in map(
-                        lambda activity: Activity(**activity), activities
+                        lambda activity: Activity(
+                            **activity, lazy=lazy, trusted=trusted
+                        ),
+                        activities,
                     )
                 }
             else:
-                activity = Activity(**activities)
+                activity = Activity(**activities, lazy=lazy, trusted=trusted)
                 self.activities = {activity.game_name: activity}
         else:
             self.activities = {}
@@ -252,26 +268,110 @@ class GameSession:
             )
 
     @staticmethod
-    def from_json(path: str | Path) -> GameSession:
+    def from_json(
+        path: str | Path, lazy: bool = False, trusted: bool = False
+    ) -> GameSession:
         with open(path) as f:
             data = load(f)
-        return GameSession(**data)
+        return GameSession(**data, lazy=lazy, trusted=trusted)
 
     @staticmethod
-    def from_raw(content) -> GameSession:
+    def from_raw(content, lazy: bool = False, trusted: bool = False) -> GameSession:
         data = loads(content)
-        return GameSession(**data)
+        return GameSession(**data, lazy=lazy, trusted=trusted)
 
     @staticmethod
-    def from_files(paths) -> GameSession:
-        return reduce(
-            lambda a, b: a | b if a is not None else b,
-            map(GameSession.from_json, paths),
+    def from_files(
+        paths: Iterable[str | Path], lazy: bool = False, workers: int | None = 1
+    ) -> GameSession:
+        """Loads the logs of a student, e.g. one file per activity, and merges
+        them into one game session (see merge())
+
+        Args:
+            paths (Iterable): The paths of the JSON logs
+            lazy (bool, optional): Whether the sessions are lazy. Defaults to
+             False.
+            workers (int | None, optional): The number of processes loading
+             the logs, None for one process per CPU. Starting the processes
+             only pays off for many large logs. Defaults to 1, to load them in
+             the current process.
+
+        Returns:
+            GameSession: The merged game session
+        """
+        return GameSession.merge(
+            _load_all(partial(GameSession.from_json, lazy=lazy), list(paths), workers)
         )
 
     @staticmethod
-    def from_dict(content: dict) -> GameSession:
-        return GameSession(**content)
+    def merge(game_sessions: Iterable[GameSession]) -> GameSession:
+        """Merges game sessions of the same student in a single pass, like
+        chaining them with | but without copying the session at each step
+
+        The metadata is that of the first session, and the screen calibration
+        that of the first session having one. An activity replaces the
+        activity of the same name of the previous sessions.
+
+        Args:
+            game_sessions (Iterable): The game sessions to merge, in order
+
+        Raises:
+            TypeError: When an element is not a game session
+            ValueError: When there is no game session, or when the student_id
+             of the game sessions do not match
+
+        Returns:
+            GameSession: A new game session with the merged data, activities
+             and screen calibration are a shallow copy of the original
+        """
+        merged = None
+        activities: dict[ActivityEnum, Activity] = {}
+        for game_session in game_sessions:
+            if not isinstance(game_session, GameSession):
+                raise TypeError(
+                    f"Expected a GameSession object, got {type(game_session)}"
+                )
+            if merged is None:
+                merged = game_session.copy()
+            elif merged.student_id != game_session.student_id:
+                raise ValueError(
+                    f"Cannot merge two game session with different student_id, '{merged.student_id}' != '{game_session.student_id}'"
+                )
+            elif merged.screen_calibration is None:
+                merged.screen_calibration = game_session.screen_calibration
+            activities.update(game_session.activities)
+        if merged is None:
+            raise ValueError("No game session to merge")
+        merged.activities = activities
+        return merged
+
+    @staticmethod
+    def group_by_student(
+        game_sessions: Iterable[GameSession],
+    ) -> dict[str, GameSession]:
+        """Merges the game sessions of each student (see merge())
+
+        Args:
+            game_sessions (Iterable): The game sessions of any students, those
+             of each student being merged in their order
+
+        Returns:
+            dict: The merged game session of each student, by student_id in
+             the order of their first session
+        """
+        groups: dict[str, list[GameSession]] = {}
+        for game_session in game_sessions:
+            groups.setdefault(game_session.student_id, []).append(game_session)
+        return {
+            student_id: GameSession.merge(sessions)
+            for student_id, sessions in groups.items()
+        }
+
+    @staticmethod
+    def from_dict(
+        content: dict, lazy: bool = False, trusted: bool = False
+    ) -> GameSession:
+        return GameSession(**content, lazy=lazy, trusted=trusted)
 
     def get_activity(
         self,
@@ -309,6 +409,22 @@ class GameSession:
         """
         return sorted(self.activities.values(), key=lambda activity: activity.start_ts)
 
+    def parse(self) -> GameSession:
+        """Parses the digit inputs and the events a lazy session has not
+        parsed yet, so it is then as if it was not lazy
+
+        Returns:
+            GameSession: The session itself
+        """
+        # pylint: disable=pointless-statement
+        if self.screen_calibration is not None:
+            self.screen_calibration.digit_inputs
+        for activity in self.activities.values():
+            activity.digit_inputs
+            for challenge in activity.challenges:
+                challenge.events
+        return self
+
     def copy(self) -> GameSession:
         """Returns a shallow copy of the object"""
         game_session = GameSession(
@@ -342,15 +458,7 @@ class GameSession:
         """
         if not isinstance(other, GameSession):
             raise TypeError(f"Expected a GameSession object, got {type(other)}")
-        if self.student_id != other.student_id:
-            raise ValueError(
-                f"Cannot merge two game session with different student_id, '{self.student_id}' != '{other.student_id}'"
-            )
-        game_session = self.copy()
-        if game_session.screen_calibration is None:
-            game_session.screen_calibration = other.screen_calibration
-        game_session.activities = {**self.activities, **other.activities}
-        return game_session
+        return GameSession.merge((self, other))
 
     def __eq__(self, other: object) -> bool:
         """Checks if two game sessions are equal
@@ -363,7 +471,7 @@ class GameSession:
         """
         if not isinstance(other, GameSession):
             return False
-        return (
+        return self is other or (
             self.student_id == other.student_id
             and self.device_name == other.device_name
             and self.device_type == other.device_type
@@ -376,6 +484,42 @@ class GameSession:
             and self.activities == other.activities
         )
 
+    def fingerprint(self) -> str:
+        """Returns the content fingerprint of the game session, the same for
+        equal sessions whatever the form of their log, e.g. to find the same
+        session uploaded twice or as a cache key of the results computed from
+        it.
+
+        The fingerprint is not kept: each call hashes every digit input and
+        event again (parsing them when the session is lazy), in time linear in
+        the size of the session, so that it always matches the current
+        content. Sessions can be modified (e.g. by merge()) and are therefore
+        not hashable: compute the fingerprint of a session once it is no
+        longer modified to use it as a key.
+
+        Returns:
+            str: The fingerprint, in hex
+        """
+        return fingerprint(
+            [
+                self.student_id,
+                self.device_name,
+                self.device_type,
+                self.device_model,
+                self.device_uid,
+                self.soft_version,
+                self.soft_configuration_name,
+                self.resolution.to_str(),
+                None
+                if self.screen_calibration is None
+                else self.screen_calibration.fingerprint(),
+                sorted(
+                    [game_name.value, activity.fingerprint()]
+                    for game_name, activity in self.activities.items()
+                ),
+            ]
+        )
+
     def _activities_dataframe(self):
         """Returns a pandas dataframe of the activities
 
@@ -390,15 +534,11 @@ class GameSession:
         Returns:
             pd.DataFrame: A pandas dataframe of the digit inputs
         """
-        digit_inputs = [
-            digit_input.asdict() for digit_input in self.screen_calibration.digit_inputs
-        ]
-        digit_inputs += [
-            digit_input.asdict()
-            for activity in self.sorted_activities
-            for digit_input in activity.digit_inputs
-        ]
-        return pd.DataFrame(digit_inputs)
+        digit_inputs = DigitInputArray.concatenate(
+            [self.screen_calibration.digit_inputs]
+            + [activity.digit_inputs for activity in self.sorted_activities]
+        )
+        return pd.DataFrame(digit_inputs.asdict())
 
     def _phases_dataframe(self):
         """Returns a pandas dataframe of the phases for each activity
@@ -406,111 +546,47 @@ class GameSession:
         Returns:
             pd.DataFrame: A pandas dataframe of the phases
         """
-        # We initialize the phases with screen calibration
-        phases = [
-            {
-                "activity": "ScreenCalib",
-                "challenge": None,
-                "phase": None,
-                # We use the first digit input of the screen calibration as the start_ts of the phase
-                "start_ts": self.screen_calibration.digit_inputs[0].ts,
-                # We use the first digit input of the first activity as the end_ts of the phase
-                "end_ts": self.sorted_activities[0].digit_inputs[0].ts,
-            }
-        ]
-        # the last event emitted during an activity
-        last_end_event: EventInput = None
-        for activity in self.sorted_activities:
-            # Before each activity, there is a main menu phase when the user select an activity to play
-            phases.append(
-                {
-                    "activity": "MainMenu",
-                    "challenge": None,
-                    "phase": None,
-                    # the start of the main menu is either the last event emitted during the last activity
-                    # or the start of the first digit input of the activity
-                    "start_ts": last_end_event.ts
-                    if last_end_event
-                    else activity.digit_inputs[0].ts,
-                    # the main menu ends when the user select an activity to play (when the activity starts)
-                    "end_ts": activity.start_ts,
-                }
-            )
-            # the last event emitted during a challenge
-            last_challenge_end_event: EventInput = None
-            for challenge in activity.challenges:
-                # We need to retrieve the common events starting and ending the challenge
-                # Since it's a list of events, we can loop once and search for them
-                start_event = None
-                last_error_code = None
-                for event in challenge.sorted_events:
-                    if event.result_code == 302:
-                        start_event = event
-                        phases.append(
-                            {
-                                "activity": activity.game_name.value,
-                                "challenge": challenge.current_challenge,
-                                "phase": PhaseEnum.DEMO
-                                if challenge.training
-                                else PhaseEnum.READING,
-                                # the start of the demo or reading phase is the end of the last event for this challenge or the start of the activity
-                                "start_ts": last_challenge_end_event.ts
-                                if last_challenge_end_event
-                                else activity.start_ts,
-                                # the phase ends when the challenge starts (when the start event is emitted)
-                                "end_ts": start_event.ts,
-                            }
-                        )
-                    elif event.result_code in [200, 303,] and last_error_code not in [
-                        200,
-                        303,
-                    ]:
-                        last_challenge_end_event = event
-                        phases.append(
-                            {
-                                "activity": activity.game_name.value,
-                                "challenge": challenge.current_challenge,
-                                "phase": PhaseEnum.TRAINING
-                                if challenge.training
-                                else PhaseEnum.PLAYING,
-                                # The start of the training or playing phase is the start of the challenge (when the start event is emitted)
-                                "start_ts": start_event.ts,
-                                # The phase ends when the challenge ends (when the end event is emitted)
-                                "end_ts": last_challenge_end_event.ts,
-                            }
-                        )
-                    if event.result_code in [200, 302, 303]:
-                        last_error_code = event.result_code
-                # Usually, there should be a start and end event for each challenge, but just in case,  we check if we have found both events
-                if start_event is None or last_challenge_end_event is None:
-                    raise ValueError(
-                        f"Missing start or end event for challenge {challenge.current_challenge} in activity {activity.game_name.value}"
-                    )
-            # the last event emitted during an activity is the last challenge end event
-            last_end_event = last_challenge_end_event
-        return pd.DataFrame(phases)
+        return segment_phases([self]).drop(columns="session")
 
     def to_dataframe(self):
-        """Returns a pandas dataframe of the game session"""
+        """Returns a pandas dataframe of the game session: the digit inputs,
+        each with the activity, challenge and phase it belongs to (missing
+        when it is in none of the phases)"""
         # We retrieve the dataframes for the different phases of the game session and the digit inputs
         df_phases = self._phases_dataframe()
         df_digits = self._digit_inputs_dataframe()
-        # We build an interval index between the start and end timestamps of each phase [start_ts, end_ts)
-        idx_phases = pd.IntervalIndex.from_arrays(
-            df_phases["start_ts"], df_phases["end_ts"], closed="left"
+        df_digits.rename(columns={"phase": "phase_digit"}, inplace=True)
+        ts = df_digits["ts"].to_numpy()
+        start_ts = df_phases["start_ts"].to_numpy(dtype=float)
+        end_ts = df_phases["end_ts"].to_numpy(dtype=float)
+        # The phases are [start_ts, end_ts) intervals: once sorted by start
+        # (the empty ones first), the phase of a digit input is the last one
+        # starting before it, if it has not ended yet
+        order = np.lexsort((end_ts, start_ts))
+        position = np.searchsorted(start_ts[order], ts, side="right") - 1
+        phase_index = order[position]
+        phase_index[(position < 0) | (ts >= end_ts[phase_index])] = -1
+        matched = phase_index >= 0
+
+        # The activity and phase of each phase, as codes of categoricals
+        activity_codes, activities = pd.factorize(df_phases["activity"])
+        phases = list(PhaseEnum)
+        phase_codes = np.array(
+            [
+                -1 if pd.isna(phase) else phases.index(phase)
+                for phase in df_phases["phase"]
+            ],
+            dtype=np.int64,
         )
-        # We build a dataframe with the activity, challenge and phase for each digit input according to the interval index
-        df_acp = (
-            df_phases.loc[
-                idx_phases.get_indexer(df_digits["ts"]),
-                ["activity", "challenge", "phase"],
-            ]
-            .copy()
-            .reset_index(drop=True)
+        challenges = df_phases["challenge"].to_numpy(dtype=float, na_value=np.nan)
+        df_digits["activity"] = pd.Categorical.from_codes(
+            np.where(matched, activity_codes[phase_index], -1), categories=activities
         )
-        # We merge the digit inputs with their activity, challenge and phase
-        df_digits.rename(columns={"phase": "phase_digit"}, inplace=True)
-        return pd.concat([df_digits, df_acp], axis=1)
+        df_digits["challenge"] = np.where(matched, challenges[phase_index], np.nan)
+        df_digits["phase"] = pd.Categorical.from_codes(
+            np.where(matched, phase_codes[phase_index], -1), categories=phases
+        )
+        return df_digits
 
     def to_csv(self, filename: str):
         """Writes the game session to a CSV file
@@ -535,12 +611,65 @@ class GameSession:
         df_phases["response_time"] = df_phases["end_ts"] - df_phases["start_ts"]
         return df_phases
 
-    def score(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+    def scored_challenges(self) -> list[Challenge]:
+        """Returns the challenges scored by score(), i.e. those which are not
+        training challenges, in the order of the activities"""
+        return [
+            challenge
+            for activity in self.sorted_activities
+            for challenge in activity.challenges
+            if not challenge.training
+        ]
+
+    @staticmethod
+    def score_many(
+        game_sessions: Iterable[GameSession],
+    ) -> list[tuple[pd.DataFrame, pd.DataFrame] | Exception]:
+        """Scores game sessions, e.g. a chunk of a cohort, their challenges
+        being scored at once (see score_challenges())
+
+        Args:
+            game_sessions (Iterable): The game sessions
+
+        Returns:
+            list: The scores of each game session (see score()), or the error
+             raised while scoring it
+        """
+        game_sessions = list(game_sessions)
+        challenges = [
+            game_session.scored_challenges() for game_session in game_sessions
+        ]
+        scores = iter(
+            score_challenges(
+                [challenge for session in challenges for challenge in session],
+                raise_errors=False,
+            )
+        )
+        results = []
+        for game_session, session in zip(game_sessions, challenges):
+            session_scores = [next(scores) for _ in session]
+            try:
+                results.append(game_session.score(session_scores))
+            except Exception as exc:  # pylint: disable=broad-except
+                results.append(exc)
+        return results
+
+    def score(
+        self, scores: Iterable | None = None
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
         """Returns a pandas dataframe of the score for each activity
 
+        Args:
+            scores (Iterable, optional): The score of each challenge
+             of scored_challenges() (or the error raised while scoring it),
+             e.g. computed in batch by score_challenges(). Defaults to None,
+             for the score() of each challenge.
+
         Returns:
             Tuple[pd.DataFrame]: Two pandas dataframe, one for the scores for each activity and one for the scores for each challenge.
         """
+        if scores is not None:
+            scores = iter(scores)
         challenges_scores = []
         activities_scores = []
         for activity in self.sorted_activities:
@@ -551,7 +680,12 @@ class GameSession:
                     continue
                 if challenge_type is None:
                     challenge_type = type(challenge)
-                challenge_scores = challenge.score()
+                if scores is None:
+                    challenge_scores = challenge.score()
+                else:
+                    challenge_scores = next(scores)
+                    if isinstance(challenge_scores, Exception):
+                        raise challenge_scores
                 challenges_scores.append(
                     {
                         "activity": activity.game_name.value,
@@ -572,6 +706,34 @@ class GameSession:
         )
 
 
+def _load_all(
+    load: Callable[[Any], GameSession], sources: Sequence, workers: int | None
+) -> list[GameSession]:
+    """Loads game sessions in a pool of processes
+
+    Args:
+        load (Callable): The function loading a session from its source, e.g.
+         its path, picklable to be sent to the processes
+        sources (Sequence): The source of each session
+        workers (int | None): The number of processes, 1 to load the sessions
+         in the current process, or None for one process per CPU
+
+    Returns:
+        list: The game sessions, in the order of sources
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(sources)))
+    if workers == 1:
+        return list(map(load, sources))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # A few chunks per process balance the load without sending each
+        # source on its own
+        return list(
+            pool.map(load, sources, chunksize=max(1, len(sources) // (4 * workers)))
+        )
+
+
 def time_csv(game_session_file: (str | list[str]), output_file: str = None, **kwargs):
     """Function that takes a game session file and outputs a CSV file with the time analysis of each phases
 
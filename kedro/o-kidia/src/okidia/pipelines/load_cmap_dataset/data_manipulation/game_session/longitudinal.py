@@ -0,0 +1,162 @@
+"""Longitudinal datasets: the logs of a directory (e.g. every passation of a
+cohort, over several years) grouped by student, the sessions of each student
+being merged into one GameSession (see GameSession.merge()).
+
+The logs are first grouped by student from their student_id alone, read from
+the beginning of each log, then the logs of each student are loaded and
+merged in a pool of processes, one student per task. Only the students being merged or waiting to be yielded
+are held in memory, and the time is linear in the number of logs.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from . import binary
+from .cohort import _DECODERS
+from .game_session import GameSession
+
+# The size of the beginning of a .json log where its student_id is looked for
+PREFIX_SIZE = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _log_paths(directory: str | Path) -> list[Path]:
+    """The logs (.json or .npz files) of a directory and its subdirectories"""
+    return [
+        path
+        for path in sorted(Path(directory).rglob("*"))
+        if path.suffix in _DECODERS and path.is_file()
+    ]
+
+
+def load_log(path: Path, lazy: bool = False) -> GameSession:
+    """Loads a .json or .npz log"""
+    return _DECODERS[path.suffix](path.read_bytes(), lazy)
+
+
+def _prefix_student_id(text: str) -> str | None:
+    """The student_id of the beginning of a JSON log, or None when the
+    members of the log before its student_id are not all in text"""
+    index = _WHITESPACE.match(text).end()
+    if not text.startswith("{", index):
+        return None
+    index += 1
+    try:
+        while True:
+            key, index = _DECODER.raw_decode(text, _WHITESPACE.match(text, index).end())
+            index = _WHITESPACE.match(text, index).end()
+            if not text.startswith(":", index):
+                return None
+            value, index = _DECODER.raw_decode(
+                text, _WHITESPACE.match(text, index + 1).end()
+            )
+            index = _WHITESPACE.match(text, index).end()
+            # A value ending the text may be cut, e.g. a number
+            if index >= len(text):
+                return None
+            if key == "student_id":
+                return value
+            if not text.startswith(",", index):
+                return None
+            index += 1
+    except json.JSONDecodeError:
+        return None
+
+
+def _student_id(path: Path) -> str:
+    """The student_id of a .json or .npz log, read without building its
+    session (nor reading the digit inputs of a .npz log)
+
+    The metadata of a .json log written by the games comes before its
+    activities, so only the beginning of the log is parsed, the whole log
+    being parsed otherwise."""
+    if path.suffix == ".npz":
+        return binary.read_log(path)["student_id"]
+    with open(path, "rb") as file:
+        prefix = file.read(PREFIX_SIZE)
+        # The end of the prefix may cut a character
+        student_id = _prefix_student_id(prefix.decode("utf-8-sig", errors="ignore"))
+        if student_id is not None:
+            return student_id
+        file.seek(0)
+        return json.load(file)["student_id"]
+
+
+def _start_ts(game_session: GameSession) -> float:
+    # The sessions without activities (e.g. only the screen calibration) come
+    # first
+    return min(
+        (activity.start_ts for activity in game_session.activities.values()),
+        default=float("-inf"),
+    )
+
+
+def _load_student(paths: Sequence[Path], lazy: bool = False) -> GameSession:
+    """Loads the logs of a student and merges them in the order they were
+    played"""
+    game_sessions = sorted((load_log(path, lazy) for path in paths), key=_start_ts)
+    return GameSession.merge(game_sessions)
+
+
+def _imap(
+    function: Callable[[Any], Any], items: Iterable, workers: int
+) -> Iterator[Any]:
+    """Calls function on each item in a pool of processes, and yields the
+    results in the order of the items. At most two tasks per process are
+    pending, so the results are not accumulated faster than consumed."""
+    if workers == 1:
+        yield from map(function, items)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_students(
+    directory: str | Path, lazy: bool = False, workers: int | None = None
+) -> Iterator[tuple[str, GameSession]]:
+    """Iterates over the students of a directory of logs
+
+    The sessions of each student are merged in the order they were played,
+    so a student's last passation of an activity replaces the previous ones.
+
+    Args:
+        directory (str | Path): The directory of the .json or .npz logs
+        lazy (bool, optional): Whether the sessions are lazy. Defaults to
+         False.
+        workers (int | None, optional): The number of processes loading the
+         logs, 1 to load them in the current process. Defaults to None, for
+         one process per CPU.
+
+    Yields:
+        tuple: The student_id of each student, sorted, and their merged game
+         session
+    """
+    paths = _log_paths(directory)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    students: dict[str, list[Path]] = {}
+    for path, student_id in zip(paths, _imap(_student_id, paths, workers)):
+        students.setdefault(student_id, []).append(path)
+    student_ids = sorted(students)
+    game_sessions = _imap(
+        partial(_load_student, lazy=lazy),
+        (students[student_id] for student_id in student_ids),
+        workers,
+    )
+    yield from zip(student_ids, game_sessions)
@@ -0,0 +1,269 @@
+"""Segmentation of game sessions into phases (screen calibration, main menu,
+then the demo or reading phase and the training or playing phase of each
+challenge), from the events delimiting them: the start (302), end (200) and
+timeout (303) events of the challenges.
+
+The delimiting events of all the challenges of all the sessions are
+concatenated into arrays, and the phases are found in one NumPy pass, so a
+whole cohort is segmented at once.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .enums import PhaseEnum
+
+if TYPE_CHECKING:
+    from .game_session import GameSession
+
+START_CODE = 302
+END_CODES = (200, 303)
+
+# The order of the rows of each activity: the main menu before it, then
+# the phases of its challenges
+_MAIN_MENU_ROW, _CHALLENGE_ROW = 1, 2
+
+
+def _previous(indices: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """The last index i <= j with mask[i] for each j, or -1"""
+    return np.maximum.accumulate(np.where(mask, indices, -1))
+
+
+def _group_starts(groups: np.ndarray) -> np.ndarray:
+    """The index of the first element of the group of each element, the
+    groups being contiguous"""
+    indices = np.arange(len(groups))
+    first = np.ones(len(groups), dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+    return _previous(indices, first)
+
+
+class ChallengePhases:
+    """The phases of a challenge found event by event, the delimiting events
+    being added in the order of their timestamps, like segment_phases() finds
+    them in whole sessions: the demo (or reading) phase lasts until a start
+    event, then the training (or playing) phase until an end event that does
+    not follow another end event.
+
+    Attributes:
+        training (bool): Whether the challenge is a training challenge
+        started_ts (float | None): The timestamp of the last start event
+        ended (bool): Whether the last delimiting event is an end event
+        unstarted (bool): Whether an end event came before any start event
+        playing (list): The start_ts and end_ts of each training (or
+         playing) phase
+    """
+
+    __slots__ = ("training", "started_ts", "ended", "unstarted", "playing")
+
+    def __init__(self, training: bool):
+        self.training = training
+        self.started_ts: float | None = None
+        self.ended = False
+        self.unstarted = False
+        self.playing: list[tuple[float, float]] = []
+
+    def add(self, ts: float, result_code: int | None) -> None:
+        """Adds the next event of the challenge, only its delimiting events
+        changing the phases"""
+        if result_code == START_CODE:
+            self.started_ts = ts
+            self.ended = False
+        elif result_code in END_CODES and not self.ended:
+            self.ended = True
+            if self.started_ts is None:
+                self.unstarted = True
+            else:
+                self.playing.append((self.started_ts, ts))
+
+    @property
+    def phase(self) -> PhaseEnum:
+        """The current phase of the challenge"""
+        if self.started_ts is not None and not self.ended:
+            return PhaseEnum.TRAINING if self.training else PhaseEnum.PLAYING
+        return PhaseEnum.DEMO if self.training else PhaseEnum.READING
+
+    @property
+    def complete(self) -> bool:
+        """Whether the challenge has a start and an end event, and no end
+        event before its first start event, as required by segment_phases()"""
+        return bool(self.playing) and not self.unstarted
+
+
+# pylint: disable=too-many-locals
+def segment_phases(game_sessions: Sequence[GameSession]) -> pd.DataFrame:
+    """Returns the phases of game sessions
+
+    Args:
+        game_sessions (Sequence): The game sessions, e.g. a whole cohort
+
+    Raises:
+        ValueError: When a challenge has no start or no end event, or ends
+         before it starts
+
+    Returns:
+        pd.DataFrame: The phases, with the index of their session in
+         game_sessions, their activity, challenge and phase (missing for the
+         screen calibration and the main menus), start_ts and end_ts. The
+         phases are sorted by session, then in the order of the activities
+         and the events.
+    """
+    # The screen calibration of each session
+    calibration_rows = []
+    # Each activity: its session, name, start_ts and the start of the main
+    # menu before it when no activity with challenges precedes it in its
+    # session (otherwise the main menu starts with the last end of that one)
+    activity_session, activity_name, activity_start_ts, menu_start_ts = [], [], [], []
+    # Each challenge: its activity, current_challenge and training
+    challenge_activity, challenge_number, challenge_training = [], [], []
+    # Each delimiting event: its challenge, ts and result code
+    event_challenge, event_ts, event_code = [], [], []
+    for session, game_session in enumerate(game_sessions):
+        activities = game_session.sorted_activities
+        calibration_rows.append(
+            (
+                session,
+                len(activity_name),
+                game_session.screen_calibration.digit_inputs[0].ts,
+                activities[0].digit_inputs[0].ts,
+            )
+        )
+        for position, activity in enumerate(activities):
+            activity_session.append(session)
+            activity_name.append(activity.game_name.value)
+            activity_start_ts.append(activity.start_ts)
+            menu_start_ts.append(
+                activity.digit_inputs[0].ts
+                if position == 0 or not activities[position - 1].challenges
+                else np.nan
+            )
+            for challenge in activity.challenges:
+                index = challenge.event_index
+                positions = index.positions(START_CODE, *END_CODES)
+                event_challenge.append(np.full(len(positions), len(challenge_number)))
+                event_ts.append(index.ts[positions])
+                event_code.append(index.result_code[positions])
+                challenge_activity.append(len(activity_name) - 1)
+                challenge_number.append(challenge.current_challenge)
+                challenge_training.append(challenge.training)
+
+    challenge_activity = np.array(challenge_activity, dtype=np.int64)
+    challenge_training = np.array(challenge_training, dtype=bool)
+    challenge_ids = np.concatenate(event_challenge or [np.empty(0, dtype=np.int64)])
+    ts = np.concatenate(event_ts or [np.empty(0)]).astype(np.float64)
+    code = np.concatenate(event_code or [np.empty(0, dtype=np.int64)])
+    activity_ids = challenge_activity[challenge_ids]
+    indices = np.arange(len(code))
+
+    # An end event only ends a challenge when the previous delimiting event
+    # of the challenge is not an end event itself
+    challenge_starts = _group_starts(challenge_ids)
+    activity_starts = _group_starts(activity_ids)
+    is_end_code = np.isin(code, END_CODES)
+    follows_end = np.zeros(len(code), dtype=bool)
+    follows_end[1:] = is_end_code[:-1]
+    follows_end[challenge_starts == indices] = False
+    is_start = code == START_CODE
+    is_end = is_end_code & ~follows_end
+
+    # The playing phase of an end starts with the last start of its challenge
+    last_start = _previous(indices, is_start)
+    unstarted = is_end & (last_start < challenge_starts)
+    # The reading phase of a start begins with the last end of its activity
+    last_end = _previous(indices, is_end)
+    previous_end = np.full(len(code), -1)
+    previous_end[1:] = last_end[:-1]
+    previous_end[previous_end < activity_starts] = -1
+
+    has_start = np.bincount(challenge_ids, is_start, len(challenge_number)) > 0
+    has_end = np.bincount(challenge_ids, is_end, len(challenge_number)) > 0
+    invalid = ~(has_start & has_end)
+    invalid[challenge_ids[unstarted]] = True
+    if invalid.any():
+        challenge = np.flatnonzero(invalid)[0]
+        raise ValueError(
+            f"Missing start or end event for challenge {challenge_number[challenge]} "
+            f"in activity {activity_name[challenge_activity[challenge]]}"
+        )
+
+    # The phases of the challenges, in the order of the events
+    rows = np.flatnonzero(is_start | is_end)
+    row_start = is_start[rows]
+    row_challenge = challenge_ids[rows]
+    row_activity = activity_ids[rows]
+    row_training = challenge_training[row_challenge]
+    activity_start_ts = np.array(activity_start_ts, dtype=np.float64)
+    start_ts = np.where(
+        row_start,
+        np.where(
+            previous_end[rows] >= 0,
+            ts[previous_end[rows]],
+            activity_start_ts[row_activity],
+        ),
+        ts[last_start[rows]],
+    )
+    phase = np.where(
+        row_start,
+        np.where(row_training, PhaseEnum.DEMO, PhaseEnum.READING),
+        np.where(row_training, PhaseEnum.TRAINING, PhaseEnum.PLAYING),
+    )
+
+    # Otherwise, the main menu before an activity starts with the last end of
+    # the previous activity, found at its last event (each challenge has one)
+    activity_ends = np.flatnonzero(np.diff(activity_ids, append=-1) != 0)
+    activity_last_end = np.full(len(activity_name), np.nan)
+    activity_last_end[activity_ids[activity_ends]] = ts[last_end[activity_ends]]
+    menu_start_ts = np.array(menu_start_ts, dtype=np.float64)
+    following = np.isnan(menu_start_ts)
+    menu_start_ts[following] = activity_last_end[np.flatnonzero(following) - 1]
+
+    calibration = np.array(calibration_rows, dtype=np.float64).reshape(-1, 4)
+    activity_session = np.array(activity_session, dtype=np.int64)
+    activity_name = np.array(activity_name, dtype=object)
+    challenge_number = np.array(challenge_number, dtype=np.float64)
+    n_calibrations, n_activities = len(calibration), len(activity_name)
+    phases = pd.DataFrame(
+        {
+            "session": np.concatenate(
+                (
+                    calibration[:, 0],
+                    activity_session,
+                    activity_session[row_activity],
+                )
+            ).astype(np.int64),
+            "activity": np.concatenate(
+                (
+                    np.full(n_calibrations, "ScreenCalib", dtype=object),
+                    np.full(n_activities, "MainMenu", dtype=object),
+                    activity_name[row_activity],
+                )
+            ),
+            "challenge": np.concatenate(
+                (
+                    np.full(n_calibrations + n_activities, np.nan),
+                    challenge_number[row_challenge],
+                )
+            ),
+            "phase": np.concatenate(
+                (np.full(n_calibrations + n_activities, np.nan), phase)
+            ),
+            "start_ts": np.concatenate((calibration[:, 2], menu_start_ts, start_ts)),
+            "end_ts": np.concatenate((calibration[:, 3], activity_start_ts, ts[rows])),
+        }
+    )
+    # The screen calibration comes before the first activity of its session,
+    # the main menu before its activity, then the phases of the activity
+    order = np.argsort(
+        np.concatenate(
+            (
+                calibration[:, 1] * 3,
+                np.arange(n_activities) * 3 + _MAIN_MENU_ROW,
+                row_activity * 3 + _CHALLENGE_ROW,
+            )
+        ),
+        kind="stable",
+    )
+    return phases.iloc[order].reset_index(drop=True)
@@ -0,0 +1,698 @@
+"""Fast validation of game session logs: the JSON of a log is checked in a
+single pass against the rules of the game session classes (GameSession,
+ScreenCalibration, Activity, Challenge, DigitInput, EventInput, ...),
+without building any of them.
+
+The arguments of each class are checked by a checker built once from the
+signature of the class and a table of the expected types. The rules that are
+not about types (enums, empty lists, time ranges) are checked in the same
+order as the classes do, so a log is rejected with the error that parsing it
+into a GameSession would raise.
+"""
+from __future__ import annotations
+
+import inspect
+from collections.abc import Mapping
+from operator import itemgetter
+from typing import Any, Callable, Union
+
+from ..exceptions import (
+    ChallengeIsTrainingError,
+    ChallengesEmptyError,
+    DigitInputsEmptyError,
+    EventInputsEmptyError,
+    PointsEmptyError,
+    ScreenCalibrationOrActivitiesEmptyError,
+    TouchInputsEmptyError,
+)
+from .activity import Activity
+from .challenge import Challenge
+from .digit_input import DigitInput, TouchInput
+from .enums import ActivityEnum, EventTypeEnum
+from .event_input import EventInput
+from .game_session import GameSession, Resolution
+from .screen_calibration import Calibration
+from .video import Video
+
+# A key of a JSON object or an index of a JSON array
+PathItem = Union[str, int]
+
+
+class SchemaViolation(Exception):
+    """Raised when a log does not follow the rules of the game session classes
+
+    Attributes:
+        error (Exception): The error the game session classes raise for the log
+        path (list): The keys and indices leading to the invalid value, from the
+         root of the log
+    """
+
+    def __init__(self, error: Exception, path: list[PathItem] | None = None):
+        super().__init__(error)
+        self.error = error
+        self.path: list[PathItem] = path or []
+
+    @property
+    def pointer(self) -> str:
+        """The path to the invalid value, as a JSON pointer (RFC 6901)"""
+        return "".join(
+            "/" + str(item).replace("~", "~0").replace("/", "~1") for item in self.path
+        )
+
+    def __str__(self) -> str:
+        return f"{type(self.error).__name__} at '{self.pointer}': {self.error}"
+
+
+def _missing_arguments(names: list[str]) -> str:
+    quoted = [f"'{name}'" for name in names]
+    if len(quoted) == 1:
+        return quoted[0]
+    if len(quoted) == 2:
+        return " and ".join(quoted)
+    return ", ".join(quoted[:-1]) + ", and " + quoted[-1]
+
+
+# The expected type of an argument: its name, the accepted types, their
+# description in the error message and whether None is accepted
+Field = tuple[str, Union[type, tuple[type, ...]], str, bool]
+
+
+def _values(keys: list[str]) -> Callable[[Mapping], tuple]:
+    """The function reading the values of the given keys of a mapping at once
+    (the isinstance checks of the values then looping in C)"""
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda obj: (obj[key],)
+    return itemgetter(*keys)
+
+
+class ObjectSchema:
+    """The rules of the JSON object given as keyword arguments to a class (or
+    any other factory): the object must be a mapping, with the keys accepted
+    by the factory, and the values of the given fields must be of the
+    expected types, checked in order.
+
+    The rules are turned into closures over the keys and the fields, so that
+    valid objects (almost all of them) are checked without building any
+    error message.
+
+    Attributes:
+        name (str): The qualified name of the factory, as in its errors
+        fields (list): The expected types of the arguments
+        keys (frozenset): The accepted keys
+        required (list): The required keys, in the order of the signature
+        rejected (tuple): The keys given by the caller next to the JSON object
+        any_key (bool): Whether the factory accepts any other key
+    """
+
+    __slots__ = ("name", "fields", "keys", "required", "rejected", "any_key")
+
+    def __init__(
+        self,
+        factory: Callable,
+        fields: list[Field],
+        injected: tuple[str, ...] = (),
+        overridden: bool = False,
+    ):
+        """
+        Args:
+            factory (Callable): The class or function called with the JSON
+             object
+            fields (list): The expected types of the arguments
+            injected (tuple, optional): The arguments given by the caller next
+             to the JSON object (e.g. lazy). Defaults to ().
+            overridden (bool, optional): If True, the injected arguments
+             override the keys of the JSON object, else a JSON object with
+             these keys is rejected. Defaults to False.
+        """
+        function = factory.__init__ if inspect.isclass(factory) else factory
+        self.name: str = function.__qualname__
+        parameters = [
+            parameter
+            for parameter in inspect.signature(function).parameters.values()
+            if parameter.name != "self"
+        ]
+        named = (
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            inspect.Parameter.KEYWORD_ONLY,
+        )
+        self.fields = fields
+        self.any_key = any(
+            parameter.kind is parameter.VAR_KEYWORD for parameter in parameters
+        )
+        self.rejected = () if overridden else injected
+        # The rejected keys are checked first
+        self.keys = frozenset(
+            parameter.name
+            for parameter in parameters
+            if parameter.kind in named and parameter.name not in self.rejected
+        )
+        self.required = [
+            parameter.name
+            for parameter in parameters
+            if parameter.default is parameter.empty
+            and parameter.kind in named
+            and parameter.name not in injected
+        ]
+
+    def violation(self, obj: Any) -> SchemaViolation:
+        """Finds the first failed check, to raise the error of the factory"""
+        if not isinstance(obj, Mapping):
+            return SchemaViolation(
+                TypeError(
+                    f"{self.name}() argument after ** must be a mapping, "
+                    f"not {type(obj).__name__}"
+                )
+            )
+        for key in self.rejected:
+            if key in obj:
+                return SchemaViolation(
+                    TypeError(
+                        f"{self.name}() got multiple values for keyword "
+                        f"argument '{key}'"
+                    ),
+                    [key],
+                )
+        if not self.any_key and not self.keys.issuperset(obj):
+            key = next(key for key in obj if key not in self.keys)
+            return SchemaViolation(
+                TypeError(f"{self.name}() got an unexpected keyword argument '{key}'"),
+                [key],
+            )
+        missing = [key for key in self.required if key not in obj]
+        if missing:
+            return SchemaViolation(
+                TypeError(
+                    f"{self.name}() missing {len(missing)} required positional "
+                    f"argument{'s' if len(missing) > 1 else ''}: "
+                    f"{_missing_arguments(missing)}"
+                )
+            )
+        for key, expected, description, optional in self.fields:
+            value = obj.get(key)
+            if not isinstance(value, expected) and not (optional and value is None):
+                return SchemaViolation(
+                    TypeError(f"Expected {description} for '{key}', got {type(value)}"),
+                    [key],
+                )
+        raise AssertionError(f"No failed check for {self.name}()")
+
+    def valid_keys(self) -> Callable[[Mapping], bool]:
+        """The check of the keys of a mapping
+
+        Returns:
+            Callable: A function returning whether the keys of the mapping are
+             valid
+        """
+        keys = self.keys
+        required = frozenset(self.required)
+        if self.any_key:
+            # Otherwise the rejected keys are not in keys
+            rejected = self.rejected
+            return lambda obj: obj.keys() >= required and not any(
+                key in obj for key in rejected
+            )
+        if keys == required:
+            return lambda obj: obj.keys() == keys
+        return lambda obj: required <= obj.keys() <= keys
+
+    def _type_checks(self) -> tuple[Callable[[Mapping], tuple], tuple, list]:
+        """The checks of the types of the fields: the function reading the
+        required fields, their types, and the other fields, which may be
+        missing or None"""
+        required = [
+            (key, expected)
+            for key, expected, _, optional in self.fields
+            if key in self.required and not optional
+        ]
+        others = [
+            (key, expected, optional)
+            for key, expected, _, optional in self.fields
+            if key not in self.required or optional
+        ]
+        values = _values([key for key, _ in required]) if required else lambda _: ()
+        return values, tuple(expected for _, expected in required), others
+
+    def valid_types(self) -> Callable[[Mapping], bool]:
+        """The check of the types of the fields of a mapping with valid keys
+
+        Returns:
+            Callable: A function returning whether the types of the fields of
+             the mapping are valid
+        """
+        values, types, others = self._type_checks()
+        if not others:
+            return lambda obj: all(map(isinstance, values(obj), types))
+
+        def valid(obj: Mapping) -> bool:
+            if not all(map(isinstance, values(obj), types)):
+                return False
+            for key, expected, optional in others:
+                value = obj.get(key)
+                if not isinstance(value, expected) and not (optional and value is None):
+                    return False
+            return True
+
+        return valid
+
+    def valid(self) -> Callable[[Any], bool]:
+        """The check of an object, which must be a dict (other mappings fail
+        it)
+
+        Returns:
+            Callable: A function returning whether the object is valid
+        """
+        values, types, others = self._type_checks()
+        keys = self.keys
+        if not self.any_key and keys == frozenset(self.required) and not others:
+            # The fields of most objects (e.g. the digit inputs) are all
+            # required, checked in a single call
+            return (
+                lambda obj: type(obj) is dict
+                and obj.keys() == keys
+                and all(map(isinstance, values(obj), types))
+            )
+        valid_keys = self.valid_keys()
+        valid_types = self.valid_types()
+        return lambda obj: type(obj) is dict and valid_keys(obj) and valid_types(obj)
+
+    def compile(self) -> Callable[..., Mapping]:
+        """Builds the checks of the JSON object
+
+        Returns:
+            Callable: A function raising a SchemaViolation when the JSON object
+             is not valid, and returning it otherwise. Its types argument can be
+             set to False to only check the keys.
+        """
+        valid_keys = self.valid_keys()
+        valid_types = self.valid_types()
+        violation = self.violation
+
+        def check(obj: Any, types: bool = True) -> Mapping:
+            if (
+                (type(obj) is not dict and not isinstance(obj, Mapping))
+                or not valid_keys(obj)
+                or (types and not valid_types(obj))
+            ):
+                raise violation(obj)
+            return obj
+
+        return check
+
+
+def compile_list_checker(
+    schema: ObjectSchema, nested: str, nested_schema: ObjectSchema
+) -> Callable[[list], bool]:
+    """Builds the checks of a list of JSON objects, each one holding a
+    non-empty list of nested objects (e.g. the touches of the digit inputs),
+    into a single loop.
+
+    Args:
+        schema (ObjectSchema): The rules of the objects of the list
+        nested (str): The key of the nested list, which must be a field of
+         schema
+        nested_schema (ObjectSchema): The rules of the nested objects
+
+    Returns:
+        Callable: A function returning whether all the objects are valid. It
+         does not find the invalid one, which is left to the checks of
+         ObjectSchema.compile().
+    """
+    valid_item = schema.valid()
+    valid_nested = nested_schema.valid()
+
+    def valid(items: list) -> bool:
+        for item in items:
+            if not (valid_item(item) and item[nested]):
+                return False
+            for obj in item[nested]:
+                if not valid_nested(obj):
+                    return False
+        return True
+
+    return valid
+
+
+def _at(error: Exception, *path: PathItem) -> SchemaViolation:
+    return SchemaViolation(error, list(path))
+
+
+def _prefixed(violation: SchemaViolation, *path: PathItem) -> SchemaViolation:
+    violation.path[:0] = path
+    return violation
+
+
+_check_session_arguments = ObjectSchema(
+    GameSession,
+    [
+        ("student_id", str, "a string", False),
+        ("device_name", str, "a string", False),
+        ("device_type", str, "a string", False),
+        ("device_model", str, "a string", False),
+        ("device_uid", str, "a string", False),
+        ("soft_version", int, "a int", False),
+        ("soft_configuration_name", str, "a string", False),
+        ("resolution", str, "a string", False),
+        ("screenCalibration", list, "a list", True),
+        ("activities", list, "a list", True),
+    ],
+    injected=("lazy", "trusted"),
+).compile()
+_check_video = ObjectSchema(
+    Video,
+    [
+        ("start_ts", float, "a float", False),
+        ("stop_ts", float, "a float", False),
+        ("path", str, "a string", False),
+    ],
+    injected=("trusted",),
+).compile()
+_check_calibration = ObjectSchema(
+    Calibration,
+    [
+        ("name", str, "a string", False),
+        ("bump_ts", float, "a float", False),
+        ("hit_ts", float, "a float", False),
+        ("displayTime", float, "a float", False),
+        ("relativeScreenPositionX", float, "a float", False),
+        ("relativeScreenPositionY", float, "a float", False),
+    ],
+    injected=("trusted",),
+).compile()
+_check_activity_arguments = ObjectSchema(
+    Activity,
+    [
+        ("game_name", str, "a string", False),
+        ("start_ts", float, "a float", False),
+        ("end_ts", float, "a float", False),
+        ("digit_inputs", list, "a list", False),
+        ("challenges", list, "a list", False),
+    ],
+    injected=("lazy", "trusted"),
+).compile()
+_check_challenge_keys = ObjectSchema(
+    Challenge.from_activity,
+    [],
+    injected=("activity", "lazy", "trusted"),
+    overridden=True,
+).compile()
+_check_challenge_arguments = ObjectSchema(
+    Challenge,
+    [
+        ("start_ts", float, "a float", False),
+        ("end_ts", float, "a float", False),
+        ("current_challenge", int, "an int", False),
+        ("training", bool, "a bool", False),
+        ("events", list, "a list", False),
+    ],
+).compile()
+_check_event_arguments = ObjectSchema(
+    EventInput,
+    [("event_type", str, "a string", False), ("ts", float, "a float", False)],
+).compile()
+_DIGIT_INPUT = ObjectSchema(
+    DigitInput,
+    [
+        ("ts", float, "a float", False),
+        ("touchCount", int, "an int", False),
+        ("touches", list, "a list", False),
+    ],
+    injected=("trusted",),
+)
+_check_digit_input_arguments = _DIGIT_INPUT.compile()
+_TOUCH = ObjectSchema(
+    TouchInput,
+    [
+        ("fingerId", int, "an int", False),
+        ("relativePosition_x", float, "a float", False),
+        ("relativePosition_y", float, "a float", False),
+        ("phase", str, "a string", False),
+    ],
+    injected=("trusted",),
+)
+_check_touch = _TOUCH.compile()
+_valid_digit_inputs = compile_list_checker(_DIGIT_INPUT, "touches", _TOUCH)
+
+
+def _check_video_range(video: Mapping) -> None:
+    if (video["stop_ts"] - video["start_ts"]) < 0:
+        raise _at(
+            ValueError(
+                f"Stop time must be greater than start time, got "
+                f"{video['stop_ts']} - {video['start_ts']}"
+            ),
+            "stop_ts",
+        )
+
+
+def _check_digit_inputs(digit_inputs: list) -> None:
+    if _valid_digit_inputs(digit_inputs):
+        return
+    # Finds the first invalid digit input, and why
+    for index, digit_input in enumerate(digit_inputs):
+        try:
+            touches = _check_digit_input_arguments(digit_input)["touches"]
+        except SchemaViolation as violation:
+            raise _prefixed(violation, index)
+        if not touches:
+            raise _at(
+                TouchInputsEmptyError("The list of touches cannot be empty"),
+                index,
+                "touches",
+            )
+        for touch_index, touch in enumerate(touches):
+            try:
+                _check_touch(touch)
+            except SchemaViolation as violation:
+                raise _prefixed(violation, index, "touches", touch_index)
+
+
+def _check_events(events: list) -> None:
+    index = 0
+    try:
+        for index, event in enumerate(events):
+            _check_event_arguments(event)
+            try:
+                event_type = EventTypeEnum(event["event_type"])
+            except ValueError as error:
+                raise _at(error, "event_type")
+            if event_type is EventTypeEnum.INPUT:
+                object_name = event.get("object_name")
+                if not isinstance(object_name, str):
+                    raise _at(
+                        TypeError(
+                            f"Expected an object name of type 'str' for an "
+                            f"event_type 'input', got {type(object_name)}"
+                        ),
+                        "object_name",
+                    )
+            elif event_type is EventTypeEnum.COMMON:
+                result_code = event.get("result_code")
+                if not isinstance(result_code, int):
+                    raise _at(
+                        TypeError(
+                            f"Expected a result code of type 'int' for the "
+                            f"event_type '{event['event_type']}', got "
+                            f"{type(result_code)}"
+                        ),
+                        "result_code",
+                    )
+    except SchemaViolation as violation:
+        raise _prefixed(violation, index)
+
+
+def _check_challenge(challenge: Any, game_name: ActivityEnum) -> None:
+    challenge = _check_challenge_keys(challenge)
+    events = challenge["events"]
+    if game_name is ActivityEnum.CROCOS_MAZE:
+        # The states of the maze are stored among the events, without ts
+        try:
+            events = [event for event in events if "ts" in event]
+        except TypeError as error:
+            raise _at(error, "events")
+    _check_challenge_arguments({**challenge, "events": events})
+    if challenge["start_ts"] > challenge["end_ts"]:
+        raise _at(
+            ValueError(
+                f"Expected 'start_ts' to be smaller than 'end_ts', got "
+                f"{challenge['start_ts']} > {challenge['end_ts']}"
+            ),
+            "start_ts",
+        )
+    if challenge["current_challenge"] > 0 and challenge["training"]:
+        raise _at(
+            ChallengeIsTrainingError(
+                f"Challenge is training but current_challenge is "
+                f"{challenge['current_challenge']}"
+            ),
+            "training",
+        )
+    if not events:
+        raise _at(EventInputsEmptyError("This challenge has no event inputs"), "events")
+    try:
+        _check_events(events)
+    except SchemaViolation as violation:
+        if events is not challenge["events"]:
+            # Points to the event in the log, states included
+            violation.path[0] = next(
+                index
+                for index, event in enumerate(challenge["events"])
+                if event is events[violation.path[0]]
+            )
+        raise _prefixed(violation, "events")
+
+
+def _check_activity(activity: Any) -> None:
+    activity = _check_activity_arguments(activity)
+    if not activity["digit_inputs"]:
+        raise _at(
+            DigitInputsEmptyError("No digit inputs provided for this activity"),
+            "digit_inputs",
+        )
+    if not activity["challenges"]:
+        raise _at(
+            ChallengesEmptyError("No challenges provided for this activity"),
+            "challenges",
+        )
+    try:
+        game_name = ActivityEnum(activity["game_name"])
+    except ValueError as error:
+        raise _at(error, "game_name")
+    try:
+        _check_digit_inputs(activity["digit_inputs"])
+    except SchemaViolation as violation:
+        raise _prefixed(violation, "digit_inputs")
+    index = 0
+    try:
+        for index, challenge in enumerate(activity["challenges"]):
+            _check_challenge(challenge, game_name)
+    except SchemaViolation as violation:
+        raise _prefixed(violation, "challenges", index)
+    try:
+        _check_video_range(_check_video(activity["video"]))
+    except SchemaViolation as violation:
+        raise _prefixed(violation, "video")
+
+
+def _check_screen_calibration(calibrations: list) -> None:
+    has_digit_inputs = has_points = has_video = False
+    index = 0
+    try:
+        for index, item in enumerate(calibrations):
+            # Sometime comments can be found inside the screen calibration
+            # json list
+            if isinstance(item, str):
+                continue
+            try:
+                is_digit_inputs = "digit_inputs" in item
+                is_video = not is_digit_inputs and "video" in item
+                value = (
+                    item["digit_inputs" if is_digit_inputs else "video"]
+                    if (is_digit_inputs or is_video)
+                    else None
+                )
+            except (TypeError, KeyError, IndexError) as error:
+                raise _at(error)
+            if is_digit_inputs:
+                if not isinstance(value, list):
+                    raise _at(
+                        TypeError(
+                            f"Expected a list for 'digit_inputs', got {type(value)}"
+                        ),
+                        "digit_inputs",
+                    )
+                try:
+                    _check_digit_inputs(value)
+                except SchemaViolation as violation:
+                    raise _prefixed(violation, "digit_inputs")
+                has_digit_inputs = has_digit_inputs or bool(value)
+            elif is_video:
+                if not isinstance(value, dict):
+                    raise _at(
+                        TypeError(f"Expected a dict for 'video', got {type(value)}"),
+                        "video",
+                    )
+                try:
+                    _check_video_range(_check_video(value))
+                except SchemaViolation as violation:
+                    raise _prefixed(violation, "video")
+                has_video = True
+            else:
+                _check_calibration(item)
+                has_points = True
+    except SchemaViolation as violation:
+        raise _prefixed(violation, index)
+
+    if not has_digit_inputs:
+        raise SchemaViolation(
+            DigitInputsEmptyError(
+                "No digit input provided for the calibration in screenCalibration"
+            )
+        )
+    if not has_points:
+        raise SchemaViolation(
+            PointsEmptyError(
+                "No points provided for the calibration in screenCalibration"
+            )
+        )
+    if not has_video:
+        raise SchemaViolation(
+            ValueError("No video provided for the calibration in screenCalibration")
+        )
+
+
+def check_game_session(data: Any) -> None:
+    """Checks that a log can be parsed into a GameSession, without building it
+
+    Args:
+        data (Any): The JSON of the log
+
+    Raises:
+        SchemaViolation: When the log is not valid, holding the error that
+         GameSession.from_dict would raise and the path to the invalid value
+    """
+    # A copy is not validated
+    copying = isinstance(data, Mapping) and data.get("copying", False)
+    data = _check_session_arguments(data, types=not copying)
+    if not copying and not data.get("screenCalibration") and not data.get("activities"):
+        raise SchemaViolation(
+            ScreenCalibrationOrActivitiesEmptyError(
+                "No activities and screen calibration in this game session"
+            )
+        )
+    try:
+        Resolution(data["resolution"])
+    except Exception as error:  # pylint: disable=broad-except
+        raise _at(error, "resolution")
+    if copying:
+        return
+
+    if data.get("screenCalibration") is not None:
+        try:
+            _check_screen_calibration(data["screenCalibration"])
+        except SchemaViolation as violation:
+            raise _prefixed(violation, "screenCalibration")
+
+    index = 0
+    try:
+        for index, activity in enumerate(data.get("activities") or ()):
+            _check_activity(activity)
+    except SchemaViolation as violation:
+        raise _prefixed(violation, "activities", index)
+
+
+def validate_game_session(data: Any) -> SchemaViolation | None:
+    """Validates a log without building the GameSession (see
+    check_game_session())
+
+    Args:
+        data (Any): The JSON of the log
+
+    Returns:
+        SchemaViolation | None: Why the log is not valid, or None when it is
+    """
+    try:
+        check_game_session(data)
+    except SchemaViolation as violation:
+        return violation
+    return None
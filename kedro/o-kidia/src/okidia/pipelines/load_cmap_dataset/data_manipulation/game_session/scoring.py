@@ -0,0 +1,256 @@
+"""Batch scoring of challenges: the scores of many challenges (e.g. all the
+challenges of a session or of a cohort) computed at once from the
+concatenated result codes and object names of their events, instead of
+running the state machine of each challenge event by event.
+
+The scores are the same as those of the score() methods of the challenges,
+which stay the reference implementation, and so are the errors they raise.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .challenge import (
+    Challenge,
+    CrocosFactoryChallenge,
+    CrocosSpotChallenge,
+    CrocosVocabuloChallenge,
+    DJCrocosChallenge,
+)
+from .phases import _group_starts, _previous
+
+# The score of a challenge, or the error raised while scoring it
+Score = Union[tuple, list, Exception]
+
+
+class _Events:
+    """The events of some result codes of challenges, concatenated
+
+    Attributes:
+        challenge (np.ndarray): The position of the challenge of each event
+         in the challenges
+        result_code (np.ndarray): The result code of each event
+        object_name (np.ndarray): The object name of each event
+        object_code (np.ndarray): The code of the object name of each event,
+         the same for the same name
+        challenge_start (np.ndarray): The index of the first event of the
+         challenge of each event
+    """
+
+    __slots__ = (
+        "challenge",
+        "result_code",
+        "object_name",
+        "object_code",
+        "challenge_start",
+    )
+
+    def __init__(self, challenges: Sequence[Challenge], result_codes: tuple[int, ...]):
+        indices = [challenge.event_index for challenge in challenges]
+        challenge = np.repeat(
+            np.arange(len(indices)), [len(index) for index in indices]
+        )
+        result_code = np.concatenate(
+            [index.result_code for index in indices] or [np.empty(0, dtype=np.int64)]
+        )
+        object_name = np.concatenate(
+            [index.object_name for index in indices] or [np.empty(0, dtype=object)]
+        )
+        # The events are already sorted by challenge and timestamp
+        selected = np.isin(result_code, result_codes)
+        self.challenge = challenge[selected]
+        self.result_code = result_code[selected]
+        self.object_name = object_name[selected]
+        # The events without an object name share the code 0
+        self.object_code = pd.factorize(self.object_name)[0] + 1
+        self.challenge_start = _group_starts(self.challenge)
+
+    def __len__(self) -> int:
+        return len(self.result_code)
+
+    def count(self, mask: np.ndarray, challenges: int) -> np.ndarray:
+        """The number of events of mask of each challenge"""
+        return np.bincount(self.challenge[mask], minlength=challenges)
+
+    def set_size(self, adds: np.ndarray, removes: np.ndarray, challenges: int):
+        """The size of the set of the object names of each challenge, when the
+        events of adds add their object name to the set and those of removes
+        remove it
+
+        Returns:
+            tuple: The size of the set of each challenge, and the indices of
+             the events removing an object name missing from the set
+        """
+        operations = np.flatnonzero(adds | removes)
+        # The operations on each object of each challenge, in event order
+        key = self.challenge[operations] * (self.object_code.max(initial=0) + 1)
+        key += self.object_code[operations]
+        order = np.argsort(key, kind="stable")
+        operations, key = operations[order], key[order]
+        added = adds[operations]
+        same = np.zeros(len(operations), dtype=bool)
+        same[1:] = key[1:] == key[:-1]
+        # An object is in the set when its last operation added it
+        present = np.zeros(len(operations), dtype=bool)
+        present[1:] = added[:-1] & same[1:]
+        missing = operations[~added & ~present]
+        last = np.ones(len(operations), dtype=bool)
+        last[:-1] = ~same[1:]
+        return self.count(operations[last & added], challenges), missing
+
+
+def _first_errors(
+    events: _Events, invalid: np.ndarray, error: Callable[[int], Exception]
+) -> dict[int, Exception]:
+    """The error raised by the first invalid event of each challenge"""
+    invalid = np.sort(invalid)
+    challenges, first = np.unique(events.challenge[invalid], return_index=True)
+    return {
+        challenge: error(index)
+        for challenge, index in zip(challenges.tolist(), invalid[first].tolist())
+    }
+
+
+def score_dj_crocos(challenges: Sequence[DJCrocosChallenge]) -> list[Score]:
+    """The scores of DJ Crocos challenges (see DJCrocosChallenge.score())"""
+    events = _Events(challenges, (302, 101, 303, 1, 2, 3))
+    code = events.result_code
+    indices = np.arange(len(events))
+    is_start = code == 302
+    # Each start event begins a try, whose events count unless it failed
+    reset = np.maximum(_previous(indices, is_start), events.challenge_start - 1)
+    failed = _previous(indices, code == 101) > reset
+    started = np.cumsum(is_start)
+    current_try = (
+        started - started[events.challenge_start] + is_start[events.challenge_start]
+    )
+    # The events before the first try count for the last one
+    current_try -= 1
+    is_note = np.isin(code, (1, 2, 3)) & ~failed
+    errors = _first_errors(
+        events,
+        np.flatnonzero(is_note & (current_try >= DJCrocosChallenge.nb_games)),
+        lambda index: IndexError("list index out of range"),
+    )
+
+    success = events.count((code == 303) & ~failed, len(challenges))
+    success = success / DJCrocosChallenge.nb_games
+    notes = events.count(is_note, len(challenges))
+    notes = notes / DJCrocosChallenge.max_continuous_notes
+    scores = zip((success + notes).tolist(), success.tolist(), notes.tolist())
+    return [errors.get(position, score) for position, score in enumerate(scores)]
+
+
+def score_crocos_factory(challenges: Sequence[CrocosFactoryChallenge]) -> list[Score]:
+    """The scores of Crocos Factory challenges (see
+    CrocosFactoryChallenge.score())"""
+    events = _Events(challenges, (1, 2, 3))
+    success = events.count(np.ones(len(events), dtype=bool), len(challenges))
+    return list(
+        zip(
+            (success / CrocosFactoryChallenge.nb_games).tolist(),
+            success.tolist(),
+        )
+    )
+
+
+def _answers(
+    challenges: Sequence[Challenge],
+    right_adds: tuple[int, ...],
+    wrong_adds: tuple[int, ...],
+    right_removes: tuple[int, ...],
+    wrong_removes: tuple[int, ...],
+) -> tuple[np.ndarray, dict[int, Exception]]:
+    """The number of right answers minus the number of wrong answers of each
+    challenge, the answers being sets of object names, and the errors raised
+    when removing a missing answer"""
+    events = _Events(
+        challenges, right_adds + wrong_adds + right_removes + wrong_removes
+    )
+    code = events.result_code
+    right, missing_right = events.set_size(
+        np.isin(code, right_adds), np.isin(code, right_removes), len(challenges)
+    )
+    wrong, missing_wrong = events.set_size(
+        np.isin(code, wrong_adds), np.isin(code, wrong_removes), len(challenges)
+    )
+    errors = _first_errors(
+        events,
+        np.concatenate((missing_right, missing_wrong)),
+        lambda index: KeyError(events.object_name[index]),
+    )
+    return right - wrong, errors
+
+
+def score_crocos_spot(challenges: Sequence[CrocosSpotChallenge]) -> list[Score]:
+    """The scores of Crocos Spot challenges (see CrocosSpotChallenge.score())"""
+    answers, errors = _answers(
+        challenges, (1, 2, 3), (102, 103, 104, 105), (101,), (4,)
+    )
+    scores = zip(
+        (np.maximum(0, answers) / CrocosSpotChallenge.nb_games).tolist(),
+        answers.tolist(),
+    )
+    return [errors.get(position, score) for position, score in enumerate(scores)]
+
+
+def score_crocos_vocabulo(
+    challenges: Sequence[CrocosVocabuloChallenge],
+) -> list[Score]:
+    """The scores of Crocos Vocabulo challenges (see
+    CrocosVocabuloChallenge.score())"""
+    answers, errors = _answers(challenges, (1, 101), (2, 102), (3, 103), (4, 104))
+    scores = zip(np.maximum(0, answers).tolist(), answers.tolist())
+    return [errors.get(position, score) for position, score in enumerate(scores)]
+
+
+# The batch scorer of each type of challenge, the others being scored one by
+# one with their score() method
+BATCH_SCORERS: dict[type, Callable[[Sequence[Any]], list[Score]]] = {
+    DJCrocosChallenge: score_dj_crocos,
+    CrocosFactoryChallenge: score_crocos_factory,
+    CrocosSpotChallenge: score_crocos_spot,
+    CrocosVocabuloChallenge: score_crocos_vocabulo,
+}
+
+
+def score_challenges(
+    challenges: Sequence[Challenge], raise_errors: bool = True
+) -> list[Score]:
+    """The scores of challenges of any type, those of the same type being
+    scored at once
+
+    Args:
+        challenges (Sequence): The challenges, e.g. of a whole cohort
+        raise_errors (bool, optional): Whether the error score() raises for
+         the first challenge that cannot be scored is raised, else the error
+         raised by each challenge is returned as its score. Defaults to True.
+
+    Returns:
+        list: The score of each challenge, as returned by its score() method
+    """
+    by_type: dict[type, list[int]] = {}
+    for position, challenge in enumerate(challenges):
+        by_type.setdefault(type(challenge), []).append(position)
+    scores: list[Score] = [None] * len(challenges)
+    for challenge_type, positions in by_type.items():
+        scorer = BATCH_SCORERS.get(challenge_type)
+        if scorer is None:
+            for position in positions:
+                try:
+                    scores[position] = challenges[position].score()
+                except Exception as exc:  # pylint: disable=broad-except
+                    scores[position] = exc
+            continue
+        for position, score in zip(
+            positions, scorer([challenges[position] for position in positions])
+        ):
+            scores[position] = score
+    if raise_errors:
+        for score in scores:
+            if isinstance(score, Exception):
+                raise score
+    return scores
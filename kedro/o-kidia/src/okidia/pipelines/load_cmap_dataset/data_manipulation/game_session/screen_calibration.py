@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from ..exceptions import DigitInputsEmptyError, PointsEmptyError
-from .digit_input import DigitInput
+from .digit_input import DigitInputArray
+from .fingerprint import fingerprint
 from .video import Video
 
 
@@ -37,30 +38,32 @@ class Calibration:
         displayTime: float,
         relativeScreenPositionX: float,
         relativeScreenPositionY: float,
+        trusted: bool = False,
     ):
-        if not isinstance(name, str):
-            raise TypeError(f"Expected a string for 'name', got {type(name)}")
+        if not trusted:
+            if not isinstance(name, str):
+                raise TypeError(f"Expected a string for 'name', got {type(name)}")
 
-        if not isinstance(bump_ts, float):
-            raise TypeError(f"Expected a float for 'bump_ts', got {type(bump_ts)}")
+            if not isinstance(bump_ts, float):
+                raise TypeError(f"Expected a float for 'bump_ts', got {type(bump_ts)}")
 
-        if not isinstance(hit_ts, float):
-            raise TypeError(f"Expected a float for 'hit_ts', got {type(hit_ts)}")
+            if not isinstance(hit_ts, float):
+                raise TypeError(f"Expected a float for 'hit_ts', got {type(hit_ts)}")
 
-        if not isinstance(displayTime, float):
-            raise TypeError(
-                f"Expected a float for 'displayTime', got {type(displayTime)}"
-            )
+            if not isinstance(displayTime, float):
+                raise TypeError(
+                    f"Expected a float for 'displayTime', got {type(displayTime)}"
+                )
 
-        if not isinstance(relativeScreenPositionX, float):
-            raise TypeError(
-                f"Expected a float for 'relativeScreenPositionX', got {type(relativeScreenPositionX)}"
-            )
+            if not isinstance(relativeScreenPositionX, float):
+                raise TypeError(
+                    f"Expected a float for 'relativeScreenPositionX', got {type(relativeScreenPositionX)}"
+                )
 
-        if not isinstance(relativeScreenPositionY, float):
-            raise TypeError(
-                f"Expected a float for 'relativeScreenPositionY', got {type(relativeScreenPositionY)}"
-            )
+            if not isinstance(relativeScreenPositionY, float):
+                raise TypeError(
+                    f"Expected a float for 'relativeScreenPositionY', got {type(relativeScreenPositionY)}"
+                )
 
         self.name = name
         self.bump_ts = bump_ts
@@ -87,20 +90,31 @@ class ScreenCalibration:
 
     Attributes:
         points (list): List of Calibration objects
-        digit_inputs (list): List of DigitInput objects
+        digit_inputs (DigitInputArray): The digit inputs of each calibration item, each sorted by ts
         video (Video): Video metadata
 
+    With lazy=True, the digit inputs are only parsed when first accessed,
+    then kept. With trusted=True, the types of the calibrations are not
+    checked, as they were already validated (see validate_game_session()).
+
     Raises:
         TypeError: When either type for points, digit_inputs or video is not a list or dict
     """
 
-    __slots__ = ("points", "digit_inputs", "video")
+    __slots__ = (
+        "points",
+        "_digit_inputs",
+        "_digit_inputs_payload",
+        "_trusted",
+        "video",
+    )
 
-    def __init__(self, calibrations: list):
+    def __init__(self, calibrations: list, lazy: bool = False, trusted: bool = False):
         self.points: list[Calibration] = []
-        self.digit_inputs: list[DigitInput] = []
+        # The digit inputs of each calibration item, parsed unless lazy
+        digit_inputs: list[list | DigitInputArray] = []
         self.video = None
-        if not isinstance(calibrations, list):
+        if not trusted and not isinstance(calibrations, list):
             raise TypeError(
                 f"Expected a list for 'calibrations', got {type(calibrations)}"
             )
@@ -109,29 +123,32 @@ class ScreenCalibration:
             if isinstance(item, str):
                 continue
             if "digit_inputs" in item:
-                if not isinstance(item["digit_inputs"], list):
+                if not trusted and not isinstance(
+                    item["digit_inputs"], (list, DigitInputArray)
+                ):
                     raise TypeError(
                         f"Expected a list for 'digit_inputs', got {type(item['digit_inputs'])}"
                     )
-                self.digit_inputs.extend(
-                    sorted(
-                        map(
-                            lambda digit_input: DigitInput(**digit_input),
-                            item["digit_inputs"],
-                        ),
-                        key=lambda digit_input: digit_input.ts,
+                digit_inputs.append(
+                    item["digit_inputs"]
+                    if lazy
+                    else DigitInputArray.from_digit_inputs(
+                        item["digit_inputs"], trusted=trusted
                     )
                 )
             elif "video" in item:
-                if not isinstance(item["video"], dict):
+                if not trusted and not isinstance(item["video"], dict):
                     raise TypeError(
                         f"Expected a dict for 'video', got {type(item['video'])}"
                     )
-                self.video = Video(**item["video"])
+                self.video = Video(**item["video"], trusted=trusted)
             else:
-                self.points.append(Calibration(**item))
+                self.points.append(Calibration(**item, trusted=trusted))
+        self._digit_inputs: DigitInputArray | None = None
+        self._digit_inputs_payload = digit_inputs
+        self._trusted = trusted
 
-        if not self.digit_inputs:
+        if not any(digit_inputs):
             raise DigitInputsEmptyError(
                 "No digit input provided for the calibration in screenCalibration"
             )
@@ -143,20 +160,49 @@ class ScreenCalibration:
             raise ValueError(
                 "No video provided for the calibration in screenCalibration"
             )
+        if not lazy:
+            self._parse_digit_inputs()
+
+    def _parse_digit_inputs(self) -> None:
+        self._digit_inputs = DigitInputArray.concatenate(
+            DigitInputArray.from_digit_inputs(digit_inputs, trusted=self._trusted)
+            for digit_inputs in self._digit_inputs_payload
+        )
+        self._digit_inputs_payload = None
+
+    @property
+    def digit_inputs(self) -> DigitInputArray:
+        if self._digit_inputs is None:
+            self._parse_digit_inputs()
+        return self._digit_inputs
 
     def __eq__(self, other: object):
         if not isinstance(other, ScreenCalibration):
             return False
-        return (
+        return self is other or (
             self.points == other.points
             and self.video == other.video
-            and len(self.digit_inputs) == len(other.digit_inputs)
-            and all(
+            and self.digit_inputs == other.digit_inputs
+        )
+
+    def fingerprint(self) -> str:
+        """The content fingerprint of the calibration (see fingerprint.py),
+        hashing its current content at each call, in linear time"""
+        video = self.video
+        return fingerprint(
+            [
                 [
-                    digit_input == other_digit_input
-                    for digit_input, other_digit_input in zip(
-                        self.digit_inputs, other.digit_inputs
-                    )
-                ]
-            )
+                    [
+                        point.name,
+                        point.bump_ts,
+                        point.hit_ts,
+                        point.display_time,
+                        point.relative_screen_position_x,
+                        point.relative_screen_position_y,
+                    ]
+                    for point in self.points
+                ],
+                None if video is None else [video.start_ts, video.stop_ts, video.path],
+            ],
+            self.digit_inputs.fingerprint(),
         )
@@ -0,0 +1,607 @@
+"""Incremental construction of a game session from a live feed, e.g. the
+NDJSON lines sent by a tablet during a passation. The records are added one
+by one, and the current activity, challenge and phase, the scores and the
+response times can be queried at any point: each new event updates the
+score (see ChallengeScorer) and the phases (see ChallengePhases) of its
+challenge in O(1), instead of the whole log being parsed and scored again.
+
+Each record is a JSON object whose "record" key gives its kind, its other
+keys being those of the matching part of a log:
+
+- "session": the metadata of the session (student_id, device_name, ...,
+  resolution)
+- "calibration": an item of the screen calibration (a point, digit inputs
+  or the video)
+- "activity": the start of an activity (game_name, start_ts, and video when
+  it is known)
+- "challenge": the start of a challenge of the current activity (start_ts,
+  current_challenge, training)
+- "event": an event of the current challenge
+- "digit_input": a digit input of the current activity, or of the next one
+  when no activity is being played (e.g. in the main menu)
+- "challenge_end", "activity_end": the end (end_ts) of the current
+  challenge or activity, with the video of the activity when not given at
+  its start
+
+to_records() gives the records of a complete log, e.g. to replay it.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Iterator
+
+import pandas as pd
+
+from .challenge import CHALLENGE_TYPES, Challenge, ChallengeScorer
+from .digit_input import DigitInputArray, _digit_input_fields
+from .enums import ActivityEnum, PhaseEnum
+from .event_input import EventInput
+from .game_session import GameSession
+from .phases import ChallengePhases
+
+RECORD_KEY = "record"
+
+# The columns of the response times (see GameSession.response_times())
+RESPONSE_TIME_COLUMNS = [
+    "activity",
+    "challenge",
+    "phase",
+    "start_ts",
+    "end_ts",
+    "response_time",
+]
+
+
+def _fields(record: dict) -> dict:
+    return {key: value for key, value in record.items() if key != RECORD_KEY}
+
+
+def _check_ts(record: dict, key: str) -> float:
+    ts = record.get(key)
+    if not isinstance(ts, float):
+        raise TypeError(f"Expected a float for '{key}', got {type(ts)}")
+    return ts
+
+
+class _LiveChallenge:
+    """A challenge of a live feed, its score and phases being updated with
+    each event. The events arriving out of order are scored once all the
+    events are sorted again, when the challenge is queried."""
+
+    __slots__ = (
+        "challenge_type",
+        "start_ts",
+        "end_ts",
+        "current_challenge",
+        "training",
+        "events",
+        "last_ts",
+        "in_order",
+        "scorer",
+        "error",
+        "phases",
+        "score",
+    )
+
+    def __init__(
+        self,
+        challenge_type: type[Challenge],
+        start_ts: float,
+        current_challenge: int,
+        training: bool,
+    ):
+        self.challenge_type = challenge_type
+        self.start_ts = start_ts
+        self.end_ts: float | None = None
+        self.current_challenge = current_challenge
+        self.training = training
+        # The events as received, for to_dict(), and as EventInput
+        self.events: list[tuple[dict, EventInput | None]] = []
+        self.last_ts = start_ts
+        self.in_order = True
+        self.scorer: ChallengeScorer | None = None
+        self.error: Exception | None = None
+        self.phases = ChallengePhases(training)
+        # The score, once it cannot change anymore
+        self.score: Any = None
+        self._replay([])
+
+    def _add(self, event: EventInput) -> None:
+        self.phases.add(event.ts, event.result_code)
+        if (
+            self.scorer is not None
+            and self.error is None
+            and event.result_code in self.scorer.result_codes
+        ):
+            try:
+                self.scorer.add(event)
+            except Exception as exc:  # pylint: disable=broad-except
+                # Raised when the challenge is scored, like score() does
+                self.error = exc
+
+    def _replay(self, events: Iterable[EventInput]) -> None:
+        scorer = self.challenge_type.scorer
+        self.scorer = None if scorer is None else scorer()
+        self.error = None
+        self.phases = ChallengePhases(self.training)
+        for event in events:
+            self._add(event)
+        self.in_order = True
+
+    def add(self, event: dict) -> None:
+        if "ts" not in event and self.challenge_type.scorer is None:
+            # The state of a Crocos Maze challenge (see CrocosMazeChallenge)
+            self.events.append((event, None))
+            return
+        event_input = EventInput(**event)
+        self.events.append((event, event_input))
+        if event_input.ts < self.last_ts:
+            self.in_order = False
+        self.last_ts = max(self.last_ts, event_input.ts)
+        if self.in_order:
+            self._add(event_input)
+
+    def sort(self) -> None:
+        """Updates the score and phases with the events arriving out of
+        order"""
+        if not self.in_order:
+            self._replay(
+                sorted(
+                    (event for _, event in self.events if event is not None),
+                    key=lambda event: event.ts,
+                )
+            )
+
+    def to_dict(self) -> dict:
+        """The challenge as in a log, ending with its last event when it is
+        not ended yet"""
+        return {
+            "start_ts": self.start_ts,
+            "end_ts": self.last_ts if self.end_ts is None else self.end_ts,
+            "current_challenge": self.current_challenge,
+            "training": self.training,
+            "events": [event for event, _ in self.events],
+        }
+
+    def compute_score(self, activity: _LiveActivity) -> Any:
+        """The score of the challenge (see Challenge.score()), or None when
+        the challenge is not ended and cannot be scored yet
+
+        Raises:
+            Exception: The error raised by score() for the challenge
+        """
+        if self.score is not None:
+            return self.score
+        self.sort()
+        if self.scorer is not None:
+            if self.error is not None:
+                raise self.error
+            score = self.scorer.score()
+        else:
+            # The score of a Crocos Maze challenge is only known once its
+            # curve is drawn
+            if self.end_ts is None and all(event is None for _, event in self.events):
+                return None
+            fields = self.to_dict()
+            challenge = self.challenge_type(**fields, activity=activity, trusted=True)
+            if self.end_ts is None and next(challenge.digit_curve(), None) is None:
+                return None
+            score = challenge.score()
+        if self.end_ts is not None:
+            self.score = score
+        return score
+
+
+class _LiveActivity:
+    """An activity of a live feed"""
+
+    __slots__ = (
+        "game_name",
+        "start_ts",
+        "end_ts",
+        "video",
+        "digit_inputs",
+        "digit_inputs_ts",
+        "challenges",
+    )
+
+    def __init__(
+        self,
+        game_name: ActivityEnum,
+        start_ts: float,
+        video: dict | None,
+        digit_inputs: list[dict],
+    ):
+        self.game_name = game_name
+        self.start_ts = start_ts
+        self.end_ts: float | None = None
+        self.video = video
+        self.digit_inputs: list[dict] = []
+        self.digit_inputs_ts: list[float] = []
+        self.challenges: list[_LiveChallenge] = []
+        for digit_input in digit_inputs:
+            self.add_digit_input(digit_input)
+
+    def add_digit_input(self, digit_input: dict) -> None:
+        ts, _, _ = _digit_input_fields(digit_input)
+        self.digit_inputs.append(digit_input)
+        self.digit_inputs_ts.append(ts)
+
+    def get_digit_inputs(self, from_ts: float, to_ts: float) -> DigitInputArray:
+        """The digit inputs between the given timestamps (see
+        Activity.get_digit_inputs())"""
+        ts = self.digit_inputs_ts
+        if all(ts[i] <= ts[i + 1] for i in range(len(ts) - 1)):
+            digit_inputs = self.digit_inputs[
+                bisect_left(ts, from_ts) : bisect_right(ts, to_ts)
+            ]
+            return DigitInputArray.from_digit_inputs(digit_inputs, trusted=True)
+        return DigitInputArray.from_digit_inputs(
+            self.digit_inputs, trusted=True
+        ).between(from_ts, to_ts)
+
+    @property
+    def sorted_challenges(self) -> list[_LiveChallenge]:
+        return sorted(self.challenges, key=lambda challenge: challenge.start_ts)
+
+    def to_dict(self) -> dict:
+        """The activity as in a log, ending with its last event or digit
+        input when it is not ended yet"""
+        end_ts = self.end_ts
+        if end_ts is None:
+            end_ts = max(
+                [self.start_ts]
+                + self.digit_inputs_ts
+                + [challenge.to_dict()["end_ts"] for challenge in self.challenges]
+            )
+        return {
+            "game_name": self.game_name.value,
+            "start_ts": self.start_ts,
+            "end_ts": end_ts,
+            "video": self.video,
+            "digit_inputs": list(self.digit_inputs),
+            "challenges": [challenge.to_dict() for challenge in self.challenges],
+        }
+
+
+class GameSessionBuilder:
+    """Builds a game session from a live feed of records (see stream.py)
+
+    Attributes:
+        metadata (dict): The metadata of the session, from its "session"
+         record
+        calibration (list): The items of the screen calibration
+        activities (dict): The activities by name, an activity replacing the
+         previous one of the same name like in GameSession
+
+    Raises:
+        ValueError: When a record is of an unknown kind, or out of place
+         (e.g. an event while no challenge is being played)
+        TypeError: When a timestamp, an event or a digit input is not valid
+    """
+
+    __slots__ = (
+        "metadata",
+        "calibration",
+        "activities",
+        "_activity",
+        "_challenge",
+        "_pending_digit_inputs",
+    )
+
+    def __init__(self):
+        self.metadata: dict = {}
+        self.calibration: list[dict] = []
+        self.activities: dict[ActivityEnum, _LiveActivity] = {}
+        self._activity: _LiveActivity | None = None
+        self._challenge: _LiveChallenge | None = None
+        # The digit inputs received between two activities
+        self._pending_digit_inputs: list[dict] = []
+
+    @staticmethod
+    def from_lines(lines: Iterable[str | bytes]) -> GameSessionBuilder:
+        """Builds a game session from NDJSON lines, e.g. a file"""
+        builder = GameSessionBuilder()
+        for line in lines:
+            builder.add_line(line)
+        return builder
+
+    def add_line(self, line: str | bytes) -> None:
+        """Adds the record of an NDJSON line, blank lines being skipped"""
+        if line.strip():
+            self.add(json.loads(line))
+
+    def add(self, record: dict) -> None:
+        """Adds the next record of the feed"""
+        kind = record.get(RECORD_KEY) if isinstance(record, dict) else None
+        if kind == "event":
+            if self._challenge is None:
+                raise ValueError("Received an event while no challenge is played")
+            self._challenge.add(_fields(record))
+        elif kind == "digit_input":
+            digit_input = _fields(record)
+            if self._activity is None:
+                # Checked like the digit inputs of an activity
+                _digit_input_fields(digit_input)
+                self._pending_digit_inputs.append(digit_input)
+            else:
+                self._activity.add_digit_input(digit_input)
+        elif kind == "challenge":
+            self._start_challenge(record)
+        elif kind == "challenge_end":
+            self._end_challenge(record)
+        elif kind == "activity":
+            self._start_activity(record)
+        elif kind == "activity_end":
+            self._end_activity(record)
+        elif kind == "calibration":
+            self.calibration.append(_fields(record))
+        elif kind == "session":
+            self.metadata = _fields(record)
+        else:
+            raise ValueError(f"Unknown record {kind!r}")
+
+    def _start_activity(self, record: dict) -> None:
+        if self._activity is not None:
+            raise ValueError(
+                f"Received an activity before the end of {self._activity.game_name.value}"
+            )
+        activity = _LiveActivity(
+            ActivityEnum(record.get("game_name")),
+            _check_ts(record, "start_ts"),
+            record.get("video"),
+            self._pending_digit_inputs,
+        )
+        self._pending_digit_inputs = []
+        self.activities.pop(activity.game_name, None)
+        self.activities[activity.game_name] = activity
+        self._activity = activity
+
+    def _end_activity(self, record: dict) -> None:
+        if self._activity is None:
+            raise ValueError("Received the end of an activity while none is played")
+        if self._challenge is not None:
+            raise ValueError(
+                f"Received the end of an activity before the end of challenge "
+                f"{self._challenge.current_challenge}"
+            )
+        self._activity.end_ts = _check_ts(record, "end_ts")
+        if "video" in record:
+            self._activity.video = record["video"]
+        self._activity = None
+
+    def _start_challenge(self, record: dict) -> None:
+        if self._activity is None:
+            raise ValueError("Received a challenge while no activity is played")
+        if self._challenge is not None:
+            raise ValueError(
+                f"Received a challenge before the end of challenge "
+                f"{self._challenge.current_challenge}"
+            )
+        current_challenge = record.get("current_challenge")
+        if not isinstance(current_challenge, int):
+            raise TypeError(
+                f"Expected an int for 'current_challenge', got {type(current_challenge)}"
+            )
+        training = record.get("training")
+        if not isinstance(training, bool):
+            raise TypeError(f"Expected a bool for 'training', got {type(training)}")
+        self._challenge = _LiveChallenge(
+            CHALLENGE_TYPES.get(self._activity.game_name, Challenge),
+            _check_ts(record, "start_ts"),
+            current_challenge,
+            training,
+        )
+        self._activity.challenges.append(self._challenge)
+
+    def _end_challenge(self, record: dict) -> None:
+        if self._challenge is None:
+            raise ValueError("Received the end of a challenge while none is played")
+        self._challenge.end_ts = _check_ts(record, "end_ts")
+        self._challenge = None
+
+    @property
+    def activity(self) -> ActivityEnum | None:
+        """The activity being played, or None"""
+        return None if self._activity is None else self._activity.game_name
+
+    @property
+    def challenge(self) -> int | None:
+        """The number of the challenge being played, or None"""
+        return None if self._challenge is None else self._challenge.current_challenge
+
+    @property
+    def phase(self) -> PhaseEnum | None:
+        """The phase of the challenge being played, or None"""
+        if self._challenge is None:
+            return None
+        self._challenge.sort()
+        return self._challenge.phases.phase
+
+    @property
+    def sorted_activities(self) -> list[_LiveActivity]:
+        return sorted(self.activities.values(), key=lambda activity: activity.start_ts)
+
+    def score(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Returns the scores of the activities and challenges received so
+        far, like GameSession.score(). The challenge being played is scored
+        with its events received so far, unless it cannot be scored yet (a
+        Crocos Maze challenge whose curve is not drawn), and the activities
+        without a scored challenge yet are left out.
+
+        Returns:
+            Tuple[pd.DataFrame]: The scores of each activity and of each
+             challenge
+        """
+        challenges_scores = []
+        activities_scores = []
+        for activity in self.sorted_activities:
+            activity_scores = []
+            for challenge in activity.sorted_challenges:
+                if challenge.training:
+                    continue
+                challenge_scores = challenge.compute_score(activity)
+                if challenge_scores is None:
+                    continue
+                challenges_scores.append(
+                    {
+                        "activity": activity.game_name.value,
+                        "challenge": challenge.current_challenge,
+                        "score": challenge_scores[0],
+                    }
+                )
+                activity_scores.append(challenge_scores)
+            if activity_scores:
+                challenge_type = CHALLENGE_TYPES.get(activity.game_name, Challenge)
+                activities_scores.append(
+                    {
+                        "activity": activity.game_name.value,
+                        "score": challenge_type.compute_activity_score(activity_scores),
+                    }
+                )
+        return pd.DataFrame.from_records(activities_scores), pd.DataFrame.from_records(
+            challenges_scores
+        )
+
+    def response_times(self) -> pd.DataFrame:
+        """Returns the response times of the training and playing phases
+        ended so far, like GameSession.response_times()
+
+        Raises:
+            ValueError: When an ended challenge has no start or no end event,
+             or ends before it starts
+
+        Returns:
+            pd.DataFrame: The response times
+        """
+        rows = []
+        for activity in self.sorted_activities:
+            for challenge in activity.sorted_challenges:
+                challenge.sort()
+                phases = challenge.phases
+                ended = challenge.end_ts is not None or activity.end_ts is not None
+                if ended and not phases.complete:
+                    raise ValueError(
+                        f"Missing start or end event for challenge "
+                        f"{challenge.current_challenge} in activity "
+                        f"{activity.game_name.value}"
+                    )
+                phase = PhaseEnum.TRAINING if challenge.training else PhaseEnum.PLAYING
+                rows.extend(
+                    (
+                        activity.game_name.value,
+                        float(challenge.current_challenge),
+                        float(phase),
+                        start_ts,
+                        end_ts,
+                    )
+                    for start_ts, end_ts in phases.playing
+                )
+        response_times = pd.DataFrame(rows, columns=RESPONSE_TIME_COLUMNS[:-1])
+        response_times["response_time"] = (
+            response_times["end_ts"] - response_times["start_ts"]
+        )
+        return response_times
+
+    def to_dict(self) -> dict:
+        """Returns the log received so far, the activity and challenge being
+        played ending with their last event or digit input"""
+        log = dict(self.metadata)
+        if self.calibration:
+            log["screenCalibration"] = list(self.calibration)
+        log["activities"] = [
+            activity.to_dict() for activity in self.activities.values()
+        ]
+        return log
+
+    def to_game_session(self, lazy: bool = False) -> GameSession:
+        """Returns the game session received so far (see to_dict()), without
+        the activities whose video or first challenge is not received yet"""
+        log = self.to_dict()
+        log["activities"] = [
+            activity
+            for activity in log["activities"]
+            if activity["video"] is not None and activity["challenges"]
+        ]
+        return GameSession.from_dict(log, lazy=lazy)
+
+
+def to_records(log: dict) -> Iterator[dict]:
+    """Returns the records of a complete log, in the order a tablet sends
+    them: the digit inputs and the challenges of each activity are merged by
+    timestamp, the events of each challenge being kept in their order.
+
+    Args:
+        log (dict): The JSON of the log
+
+    Yields:
+        dict: The records (see stream.py)
+    """
+    yield {
+        RECORD_KEY: "session",
+        **{
+            key: value
+            for key, value in log.items()
+            if key not in ("screenCalibration", "activities")
+        },
+    }
+    for item in log.get("screenCalibration") or []:
+        # Sometime comments can be found inside the screen calibration
+        if isinstance(item, dict):
+            yield {RECORD_KEY: "calibration", **item}
+    activities = log.get("activities") or []
+    if isinstance(activities, dict):
+        activities = [activities]
+    for activity in sorted(activities, key=lambda activity: activity["start_ts"]):
+        digit_inputs = sorted(
+            activity["digit_inputs"], key=lambda digit_input: digit_input["ts"]
+        )
+        # The digit inputs before the activity (e.g. in the main menu) are
+        # received before it
+        start = bisect_left(
+            [digit_input["ts"] for digit_input in digit_inputs], activity["start_ts"]
+        )
+        for digit_input in digit_inputs[:start]:
+            yield {RECORD_KEY: "digit_input", **digit_input}
+        yield {
+            RECORD_KEY: "activity",
+            "game_name": activity["game_name"],
+            "start_ts": activity["start_ts"],
+        }
+        yield from (
+            record
+            for _, record in heapq.merge(
+                (
+                    (digit_input["ts"], {RECORD_KEY: "digit_input", **digit_input})
+                    for digit_input in digit_inputs[start:]
+                ),
+                _challenge_records(activity["challenges"]),
+                key=lambda item: item[0],
+            )
+        )
+        yield {
+            RECORD_KEY: "activity_end",
+            "end_ts": activity["end_ts"],
+            "video": activity["video"],
+        }
+
+
+def _challenge_records(challenges: list[dict]) -> Iterator[tuple[float, dict]]:
+    """The records of the challenges of an activity, with a timestamp never
+    decreasing to merge them with the digit inputs"""
+    ts = float("-inf")
+    for challenge in sorted(challenges, key=lambda challenge: challenge["start_ts"]):
+        ts = max(ts, challenge["start_ts"])
+        yield ts, {
+            RECORD_KEY: "challenge",
+            "start_ts": challenge["start_ts"],
+            "current_challenge": challenge["current_challenge"],
+            "training": challenge["training"],
+        }
+        for event in challenge["events"]:
+            ts = max(ts, event.get("ts", ts))
+            yield ts, {RECORD_KEY: "event", **event}
+        ts = max(ts, challenge["end_ts"])
+        yield ts, {RECORD_KEY: "challenge_end", "end_ts": challenge["end_ts"]}
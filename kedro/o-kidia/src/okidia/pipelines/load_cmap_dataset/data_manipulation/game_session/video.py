@@ -18,21 +18,26 @@ class Video:
 
     __slots__ = ("start_ts", "stop_ts", "path")
 
-    def __init__(self, start_ts: float, stop_ts: float, path: str):
-        if not isinstance(start_ts, float):
-            raise TypeError(f"Expected a float for 'start_ts', got {type(start_ts)}")
-
-        if not isinstance(stop_ts, float):
-            raise TypeError(f"Expected a float for 'stop_ts', got {type(stop_ts)}")
-
-        if not isinstance(path, str):
-            raise TypeError(f"Expected a string for 'path', got {type(path)}")
-
-        if (stop_ts - start_ts) < 0:
-            raise ValueError(
-                f"Stop time must be greater than start time, got {stop_ts} - "
-                f"{start_ts}"
-            )
+    def __init__(
+        self, start_ts: float, stop_ts: float, path: str, trusted: bool = False
+    ):
+        if not trusted:
+            if not isinstance(start_ts, float):
+                raise TypeError(
+                    f"Expected a float for 'start_ts', got {type(start_ts)}"
+                )
+
+            if not isinstance(stop_ts, float):
+                raise TypeError(f"Expected a float for 'stop_ts', got {type(stop_ts)}")
+
+            if not isinstance(path, str):
+                raise TypeError(f"Expected a string for 'path', got {type(path)}")
+
+            if (stop_ts - start_ts) < 0:
+                raise ValueError(
+                    f"Stop time must be greater than start time, got {stop_ts} - "
+                    f"{start_ts}"
+                )
 
         self.start_ts = start_ts
         self.stop_ts = stop_ts
@@ -3,33 +3,176 @@ This is a boilerplate pipeline 'load_cmap_dataset'
 generated using Kedro 0.18.0
 """
 from __future__ import annotations
+
 import json
-import pandas as pd
-import json
-import csv
-from tkinter.messagebox import NO
+import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
 
-from typing import Callable
+import pandas as pd
 
+from .data_manipulation.exceptions import DuplicateGameSessionError
 from .data_manipulation.game_session import GameSession
+from .data_manipulation.game_session.schema import validate_game_session
 
+logger = logging.getLogger(__name__)
 
-def validate_json(json_dataset: dict[str, Callable]) -> dict[str, Callable]:
-    valid_dataset = {}
-    for key, data_loading_func in json_dataset.items():
+# The columns of the validation report, one row per rejected file
+REPORT_COLUMNS = ["file", "error_class", "path", "message"]
+
+
+def _duplicate_key(data: dict) -> str:
+    """A key of a valid log, cheap to compute and the same for the logs of the
+    same game session: only the logs sharing a key are parsed to be compared
+    (see _find_duplicates())"""
+    return json.dumps(
+        [
+            data["student_id"],
+            data["device_uid"],
+            sorted(activity["start_ts"] for activity in data.get("activities") or ()),
+        ]
+    )
+
+
+def _validate_partition(
+    load: Callable[[], Any]
+) -> tuple[tuple[str, str, str] | None, str | None]:
+    """Loads a partition and validates it against the GameSession rules
+
+    Args:
+        load (Callable): The loading function of the partition
+
+    Returns:
+        tuple: The class of the error, the JSON pointer to the invalid value
+         and the error message, or None when the log is valid, and the key of
+         a valid log (see _duplicate_key())
+    """
+    try:
+        # Call explicitly to generate the data from file
+        data = load()
+        violation = validate_game_session(data)
+    except Exception as exc:  # pylint: disable=broad-except
+        # The file cannot be read, or is not JSON
+        return (type(exc).__name__, "", str(exc)), None
+    if violation is None:
+        return None, _duplicate_key(data)
+    error = type(violation.error).__name__, violation.pointer, str(violation.error)
+    return error, None
+
+
+def _validate_partitions(
+    json_dataset: dict[str, Callable], workers: int | None
+) -> list[tuple[tuple[str, str, str] | None, str | None]]:
+    loaders = list(json_dataset.values())
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(loaders))
+    if workers > 1:
         try:
-            # Call explicitly to generate the data from file
-            json_data = data_loading_func()
-            # Try to create a GameSession object from the data to check if
-            # it is valid
-            _ = GameSession.from_dict(json_data)
-        except BaseException as exc:
-            print(
-                f"There was a problem while loading the json file {key}. "
-                f"Exception raised: {type(exc)}"
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(
+                    pool.map(
+                        _validate_partition,
+                        loaders,
+                        chunksize=max(1, len(loaders) // (4 * workers)),
+                    )
+                )
+        except (pickle.PicklingError, AttributeError, TypeError) as exc:
+            # Some loaders (e.g. lambdas or datasets holding a connection)
+            # cannot be sent to another process
+            logger.warning(
+                "The partitions cannot be validated in parallel (%s), "
+                "falling back to a single process",
+                exc,
+            )
+    return [_validate_partition(load) for load in loaders]
+
+
+def _find_duplicates(
+    json_dataset: dict[str, Callable], keys: dict[str, str]
+) -> dict[str, str]:
+    """Finds the valid partitions holding the same game session as a previous
+    one, whatever their file names. Only the partitions sharing a key are
+    parsed, and compared by fingerprint (see GameSession.fingerprint()).
+
+    Args:
+        json_dataset (dict): The loading function of each partition
+        keys (dict): The key of each valid partition (see _duplicate_key())
+
+    Returns:
+        dict: The first partition with the same session, by duplicate
+    """
+    groups: dict[str, list[str]] = {}
+    for partition, key in keys.items():
+        groups.setdefault(key, []).append(partition)
+    duplicates = {}
+    for partitions in groups.values():
+        if len(partitions) < 2:
+            continue
+        originals: dict[str, str] = {}
+        for partition in partitions:
+            # The log was validated, its types are not checked again
+            fingerprint = GameSession.from_dict(
+                json_dataset[partition](), trusted=True
+            ).fingerprint()
+            original = originals.setdefault(fingerprint, partition)
+            if original != partition:
+                duplicates[partition] = original
+    return duplicates
+
+
+def validate_json(
+    json_dataset: dict[str, Callable], workers: int | None = None
+) -> tuple[dict[str, Callable], pd.DataFrame]:
+    """Keeps the logs that can be parsed into a GameSession. The logs are
+    validated against the rules of the GameSession classes without being
+    parsed, each process of a pool validating its share of the partitions.
+    A log holding the same game session as a previous one (e.g. uploaded
+    twice under different file names) is rejected as a duplicate.
+
+    Args:
+        json_dataset (dict): The loading function of each partition
+        workers (int | None, optional): The number of processes validating
+         the partitions, 1 to validate them in the current process. Defaults
+         to None, for one process per CPU.
+
+    Returns:
+        tuple: The loading functions of the valid partitions, and the report of
+         the rejected ones, with the file, the class of the error, the JSON
+         pointer to the invalid value and the error message
+    """
+    valid_dataset = {}
+    report = []
+    results = _validate_partitions(json_dataset, workers)
+    duplicates = _find_duplicates(
+        json_dataset,
+        {
+            partition: duplicate_key
+            for partition, (_, duplicate_key) in zip(json_dataset, results)
+            if duplicate_key is not None
+        },
+    )
+    for (key, data_loading_func), (result, _) in zip(json_dataset.items(), results):
+        if result is None and key in duplicates:
+            result = (
+                DuplicateGameSessionError.__name__,
+                "",
+                f"Same game session as {duplicates[key]}",
             )
-            print(exc)
-        else:
+        if result is None:
             # If no error occured with the current file, we save it
             valid_dataset[key] = data_loading_func
-    return valid_dataset
+            continue
+        error_class, path, message = result
+        logger.warning(
+            "There was a problem while loading the json file %s. "
+            "Exception raised: %s at '%s': %s",
+            key,
+            error_class,
+            path,
+            message,
+        )
+        report.append((key, error_class, path, message))
+    return valid_dataset, pd.DataFrame(report, columns=REPORT_COLUMNS)
@@ -5,6 +5,7 @@ generated using Kedro 0.18.0
 
 from kedro.pipeline import Pipeline, node, pipeline
 
+from .data_manipulation.game_session.cohort import score_cohort
 from .nodes import validate_json
 
 
@@ -13,9 +14,18 @@ def create_pipeline(**kwargs) -> Pipeline:
         [
             node(
                 func=validate_json,
-                inputs="local_json_dataset",
-                outputs="validated_json_dataset",
+                inputs=["local_json_dataset", "params:validation_workers"],
+                outputs=["validated_json_dataset", "validation_report"],
                 name="validation_node",
             ),
+            node(
+                func=score_cohort,
+                inputs={
+                    "sessions": "validated_json_dataset",
+                    "workers": "params:scoring_workers",
+                },
+                outputs="cohort_scores",
+                name="scoring_node",
+            ),
         ]
     )
@@ -8,6 +8,7 @@ import os
 import pandas as pd
 from typing import Callable
 from ..load_cmap_dataset.data_manipulation.game_session import GameSession
+from ..load_cmap_dataset.data_manipulation.game_session.cache import load_game_session
 import math
 import numpy as np
 
@@ -57,12 +58,7 @@ def trajectory_segmentation(validated_json_dataset: dict[str, Callable]) -> dict
     print('trajectory_segmentation')
     n = len(validated_json_dataset.items())
     trajectoires = {}
-    #for key, data_loading_func in validated_dataset.items():
-        #game_session = GameSession.from_dict(data_loading_func())
-    path = "c:\\Users\\lenovo\\Documents\\GitHub\\kedro\\o-kidia"
-    session=[0 for i in range(n)]
-    for i in range(0, n):
-        session[i] = GameSession.from_json(os.path.join(path ,"data", "02_intermediate","logs", "%s.json"%(i+1)))
+    session = [load_game_session(key, data_loading_func) for key, data_loading_func in validated_json_dataset.items()]
 
     for challenge in range(len(session[1].sorted_activities[0].challenges)):
         tra_list = [0 for i in range(n)]
@@ -112,3 +112,25 @@ def test_activity_shallow_copy():
     )
     activity_copy = activity.copy()
     assert activity == activity_copy
+
+
+def test_activity_get_digit_inputs():
+    from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.activity import (
+        Activity,
+    )
+
+    activity = Activity(
+        game_name="CrocosMaze",
+        start_ts=0.0,
+        end_ts=0.0,
+        digit_inputs=[
+            {**dummy_digit_inputs, "ts": ts} for ts in [3.0, 1.0, 2.0, 2.0, 0.5]
+        ],
+        challenges=challenges_dummy,
+        video=video_dummy,
+    )
+    assert activity.get_digit_inputs(1.0, 2.0).ts.tolist() == [1.0, 2.0, 2.0]
+    assert len(activity.get_digit_inputs(3.5, 4.0)) == 0
+
+    activity.digit_inputs = []
+    assert len(activity.get_digit_inputs(0.0, 4.0)) == 0
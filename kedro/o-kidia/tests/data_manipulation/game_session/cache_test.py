@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+import os
+
+from kedro.io import PartitionedDataSet
+
+from src.okidia.extras.dataset.game_session_dataset import GameSessionDataSet
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.cache import (
+    GameSessionCache,
+)
+
+
+def load_log(name):
+    with open(
+        os.path.join(os.path.dirname(__file__), "dummy_data", name), encoding="utf-8"
+    ) as file:
+        return json.load(file)
+
+
+def test_game_session_cache_hit(tmp_path):
+    partitions = PartitionedDataSet(
+        path=tmp_path.as_posix(), dataset=GameSessionDataSet, filename_suffix=".npz"
+    )
+    partitions.save({"test": lambda: load_log("test.json")})
+    loaders = partitions.load()
+
+    cache = GameSessionCache()
+    lazy = cache.get("test", loaders["test"], lazy=True)
+    activity = next(iter(lazy.activities.values()))
+    assert activity._digit_inputs is None
+    # The lazy and the other callers share the session, parsed on demand
+    game_session = cache.get("test", loaders["test"])
+    assert game_session is lazy
+    assert activity._digit_inputs is not None
+    assert game_session == GameSession.from_dict(load_log("test.json"))
+    assert cache.get("test", loaders["test"], lazy=True) is game_session
+    assert (cache.hits, cache.misses, len(cache)) == (2, 1, 1)
+
+    # A partition whose file changed is parsed again
+    partitions.save({"test": lambda: {**load_log("test.json"), "student_id": "other"}})
+    assert cache.get("test", partitions.load()["test"]).student_id == "other"
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 2)
+
+
+def test_game_session_cache_eviction(tmp_path):
+    partitions = PartitionedDataSet(
+        path=tmp_path.as_posix(), dataset=GameSessionDataSet, filename_suffix=".npz"
+    )
+    partitions.save(
+        {
+            name: (lambda name=name: load_log(f"{name}.json"))
+            for name in ("game_session_1", "game_session_2")
+        }
+    )
+    loaders = partitions.load()
+    cache = GameSessionCache(max_entries=1)
+    first = cache.get("game_session_1", loaders["game_session_1"])
+    assert cache.get("game_session_1", loaders["game_session_1"]) is first
+    # The least recently used session is evicted
+    cache.get("game_session_2", loaders["game_session_2"])
+    assert len(cache) == 1
+    assert cache.get("game_session_1", loaders["game_session_1"]) is not first
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_game_session_cache_other_loaders():
+    data = load_log("test.json")
+    cache = GameSessionCache()
+    # The data of other loaders is not cached
+    game_session = cache.get("test", lambda: data)
+    assert game_session == GameSession.from_dict(data)
+    assert cache.get("test", lambda: data) is not game_session
+    # A GameSession is returned as is
+    assert cache.get("test", lambda: game_session) is game_session
+    assert (cache.hits, cache.misses, len(cache)) == (0, 3, 0)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+
+import pandas as pd
+from kedro.io import PartitionedDataSet
+
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.cohort import (
+    SCORE_COLUMNS,
+    read_scores,
+    score_cohort,
+    write_scores,
+)
+
+DUMMY_DATA = os.path.join(os.path.dirname(__file__), "dummy_data")
+TEST_JSON = os.path.join(DUMMY_DATA, "test.json")
+
+
+def test_score_cohort(tmp_path):
+    shutil.copy(TEST_JSON, tmp_path / "a.json")
+    (tmp_path / "cohort").mkdir()
+    shutil.copy(TEST_JSON, tmp_path / "cohort" / "b.json")
+    (tmp_path / "invalid.json").write_text("{}")
+
+    table = score_cohort(tmp_path, workers=1)
+    assert list(table.columns) == SCORE_COLUMNS
+    assert list(table["session"].unique()) == ["a", "cohort/b", "invalid"]
+    assert (
+        table[table["session"] == "invalid"]["error"].str.startswith("TypeError").all()
+    )
+
+    activity_scores, challenge_scores = GameSession.from_json(TEST_JSON).score()
+    scores = table[table["session"] == "a"]
+    activities = scores[scores["challenge"].isna()]
+    assert list(activities["activity"]) == list(activity_scores["activity"])
+    assert list(activities["score"]) == list(activity_scores["score"])
+    challenges = scores[scores["challenge"].notna()]
+    assert list(challenges["challenge"]) == list(challenge_scores["challenge"])
+    assert list(challenges["score"]) == list(challenge_scores["score"])
+
+    # The table read back is complete: no session is scored again
+    write_scores(table, tmp_path / "scores" / "scores.csv")
+    previous = read_scores(tmp_path / "scores" / "scores.csv")
+    previous.loc[previous["session"] == "a", "score"] = -1
+    table = score_cohort(tmp_path, previous, workers=1)
+    assert (table[table["session"] == "a"]["score"] == -1).all()
+
+    # Only the modified sessions are
+    (tmp_path / "a.json").write_text("{}")
+    table = score_cohort(tmp_path, previous, workers=1)
+    assert table[table["session"] == "a"]["error"].notna().all()
+    assert len(table[table["session"] == "a"]) == 1
+
+
+def test_score_cohort_partitions():
+    with open(TEST_JSON, encoding="utf-8") as file:
+        data = json.load(file)
+    # The loaders of a PartitionedDataSet may return the log or the session
+    table = score_cohort({"session": lambda: data}, workers=1)
+    assert table["error"].isna().all()
+    pd.testing.assert_frame_equal(
+        table.drop(columns="fingerprint"),
+        score_cohort({"session": lambda: GameSession.from_dict(data)}, workers=1).drop(
+            columns="fingerprint"
+        ),
+    )
+
+
+def test_score_cohort_workers(tmp_path):
+    for index in range(2, 6):
+        shutil.copy(os.path.join(DUMMY_DATA, f"game_session_{index}.json"), tmp_path)
+    expected = score_cohort(tmp_path, workers=1)
+    assert expected["error"].isna().all()
+    # Each process reads the logs it scores
+    pd.testing.assert_frame_equal(score_cohort(tmp_path, workers=2), expected)
+    partitions = PartitionedDataSet(
+        path=tmp_path.as_posix(), dataset="json.JSONDataSet", filename_suffix=".json"
+    )
+    pd.testing.assert_frame_equal(score_cohort(partitions.load(), workers=2), expected)
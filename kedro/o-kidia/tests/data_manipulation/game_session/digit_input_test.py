@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from src.okidia.pipelines.load_cmap_dataset.data_manipulation.exceptions import (
@@ -97,3 +98,125 @@ def test_digit_input_eq():
     assert input_1 != input_3
     assert input_1 != input_4
     assert input_1 != input_5
+
+
+def raw_digit_input(ts: float, *touches: tuple) -> dict:
+    return {
+        "ts": ts,
+        "touchCount": len(touches),
+        "touches": [
+            {
+                "fingerId": finger_id,
+                "relativePosition_x": x,
+                "relativePosition_y": y,
+                "phase": phase,
+            }
+            for finger_id, x, y, phase in touches
+        ],
+    }
+
+
+raw_digit_inputs = [
+    raw_digit_input(2.0, (0, 0.2, 0.3, "Moved")),
+    raw_digit_input(1.0, (0, 0.1, 0.1, "Began"), (1, 0.5, 0.6, "Began")),
+    raw_digit_input(3.0, (1, 0.7, 0.8, "Ended")),
+    raw_digit_input(1.0, (2, 0.9, 0.9, "Stationary")),
+]
+
+
+def test_digit_input_array_views():
+    from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.digit_input import (
+        DigitInput,
+        DigitInputArray,
+    )
+
+    array = DigitInputArray.from_digit_inputs(raw_digit_inputs)
+    expected = sorted(
+        (DigitInput(**digit_input) for digit_input in raw_digit_inputs),
+        key=lambda digit_input: digit_input.ts,
+    )
+
+    assert len(array) == len(expected)
+    assert array == expected
+    assert [digit_input.asdict() for digit_input in array] == [
+        digit_input.asdict() for digit_input in expected
+    ]
+    assert array[0].touches[1].finger_id == 1
+    assert isinstance(array[-1], DigitInput)
+    assert array[-1].ts == 3.0
+    with pytest.raises(IndexError):
+        array[4]
+
+
+def test_digit_input_array_selection():
+    from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.digit_input import (
+        DigitInputArray,
+    )
+
+    array = DigitInputArray.from_digit_inputs(raw_digit_inputs)
+    views = list(array)
+
+    assert array[1:3] == views[1:3]
+    assert array[::2] == views[::2]
+    assert array[array.ts > 1.0] == views[2:]
+    assert array.take([3, 0]) == [views[3], views[0]]
+    assert DigitInputArray.concatenate([array[2:], views[:2]]) == views[2:] + views[:2]
+    assert DigitInputArray.concatenate([array[1:3], array[1:3]]) == DigitInputArray(
+        **{
+            column: getattr(array[[1, 2, 1, 2]], column)
+            for column in DigitInputArray.__slots__
+        }
+    )
+
+    columns = array[1:].asdict()
+    assert columns["x"].tolist() == [0.9, 0.2, 0.7]
+    assert columns["phase"].tolist() == ["Stationary", "Moved", "Ended"]
+
+
+@pytest.mark.parametrize(
+    "digit_input,exception,exception_message",
+    [
+        ({"ts": 0.00}, TypeError, ".*missing 2 required positional argument.*"),
+        (
+            {"ts": 0.00, "touchCount": 0, "touches": []},
+            TouchInputsEmptyError,
+            "The list of touches cannot be empty",
+        ),
+        (
+            {"ts": 0, "touchCount": 0, "touches": []},
+            TypeError,
+            "Expected a float for 'ts', got <class 'int'>",
+        ),
+        (
+            raw_digit_input(0.0, (0, 0, 0.0, "Began")),
+            TypeError,
+            "Expected a float for 'relativePosition_x', got <class 'int'>",
+        ),
+    ],
+)
+def test_exception_digit_input_array(digit_input, exception, exception_message):
+    from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.digit_input import (
+        DigitInputArray,
+    )
+
+    with pytest.raises(exception, match=exception_message):
+        DigitInputArray.from_digit_inputs(raw_digit_inputs + [digit_input])
+
+
+@pytest.mark.parametrize(
+    "from_ts,to_ts",
+    [(1.0, 2.0), (0.0, 10.0), (1.5, 2.5), (2.0, 2.0), (3.5, 4.0), (2.0, 1.0)],
+)
+def test_digit_input_array_between(from_ts: float, to_ts: float):
+    from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.digit_input import (
+        DigitInputArray,
+    )
+
+    array = DigitInputArray.from_digit_inputs(raw_digit_inputs)
+    expected = [
+        digit_input for digit_input in array if from_ts <= digit_input.ts <= to_ts
+    ]
+
+    digit_inputs = array.between(from_ts, to_ts)
+    assert digit_inputs == expected
+    assert np.shares_memory(digit_inputs.x, array.x)
@@ -59,3 +59,32 @@ def test_event_input_eq():
     assert event_input_1 == event_input_2
     assert event_input_1 != event_input_3
     assert event_input_1 != event_input_4
+
+
+def test_event_index():
+    from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.event_input import (
+        EventIndex,
+        EventInput,
+    )
+
+    events = [
+        EventInput(ts=0.0, event_type="Common", result_code=302),
+        EventInput(ts=1.0, event_type="input", object_name="Cursor"),
+        EventInput(ts=2.0, event_type="Common", result_code=1),
+        EventInput(ts=3.0, event_type="input", object_name="Cursor", result_code=1),
+        EventInput(ts=4.0, event_type="Common", result_code=303),
+    ]
+    index = EventIndex(events)
+
+    assert len(index) == 5
+    assert index.result_code.tolist() == [302, EventIndex.NO_RESULT_CODE, 1, 1, 303]
+    assert index.positions(1) == [2, 3]
+    assert index.positions(303, 1, 302) == [0, 2, 3, 4]
+    assert index.positions(404) == []
+    assert index.with_result_code(1, 303) == events[2:]
+    assert index.with_object_name("Cursor") == [events[1], events[3]]
+    assert index.count(1, 303) == 3
+    assert index.first(303, 1) is events[2]
+    assert index.first(404) is None
+    with pytest.raises(ValueError):
+        index.ts[0] = 1.0
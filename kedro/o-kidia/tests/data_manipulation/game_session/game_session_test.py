@@ -15,6 +15,9 @@ from src.okidia.pipelines.load_cmap_dataset.data_manipulation.exceptions import
 from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
     GameSession,
 )
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.enums import (
+    PhaseEnum,
+)
 
 
 def test_valid_json_parsing():
@@ -45,6 +48,28 @@ def test_valid_dataframe_creation():
     assert df.columns.tolist() == cols
 
 
+def test_dataframe_phases():
+    game_session = GameSession.from_json(
+        os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+    )
+    df = game_session.to_dataframe()
+    assert isinstance(df["activity"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["phase"].dtype, pd.CategoricalDtype)
+    assert df["phase"].cat.categories.tolist() == list(PhaseEnum)
+
+    # Each digit input is in the [start_ts, end_ts) interval of its phase
+    df_phases = game_session._phases_dataframe()
+    for _, phase in df_phases.iterrows():
+        in_phase = df[(df["ts"] >= phase["start_ts"]) & (df["ts"] < phase["end_ts"])]
+        assert (in_phase["activity"] == phase["activity"]).all()
+        if pd.isna(phase["phase"]):
+            assert in_phase["phase"].isna().all()
+        else:
+            assert (in_phase["phase"] == phase["phase"]).all()
+            assert (in_phase["challenge"] == phase["challenge"]).all()
+    assert not df["activity"].isna().any()
+
+
 def test_response_time():
     game_session = GameSession.from_json(
         os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
@@ -207,3 +232,193 @@ def test_game_session_from_files():
     )
 
     assert game_session == game_session_other
+
+
+def test_game_session_merge():
+    paths = [
+        os.path.join(
+            os.path.dirname(__file__), "dummy_data", f"game_session_{index}.json"
+        )
+        for index in range(1, 7)
+    ]
+    sessions = [GameSession.from_json(path) for path in paths]
+    merged = GameSession.merge(sessions)
+    assert (
+        merged
+        == sessions[0]
+        | sessions[1]
+        | sessions[2]
+        | sessions[3]
+        | sessions[4]
+        | sessions[5]
+    )
+    assert merged.screen_calibration is sessions[0].screen_calibration
+    assert list(merged.activities) == [
+        game_name for session in sessions for game_name in session.activities
+    ]
+    # The sessions are not modified
+    assert not sessions[0].activities
+    assert GameSession.from_files(paths, workers=2) == merged
+
+    other = GameSession.from_json(
+        os.path.join(os.path.dirname(__file__), "dummy_data", "2.json")
+    )
+    students = GameSession.group_by_student([sessions[0], other] + sessions[1:])
+    assert list(students) == [merged.student_id, other.student_id]
+    assert students[merged.student_id] == merged
+    assert students[other.student_id] == other
+
+    with pytest.raises(ValueError):
+        GameSession.merge(sessions + [other])
+    with pytest.raises(ValueError):
+        GameSession.merge([])
+    with pytest.raises(TypeError):
+        GameSession.merge(sessions + [None])
+
+
+def test_lazy_game_session():
+    path = os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+    game_session = GameSession.from_json(path, lazy=True)
+
+    activities = game_session.sorted_activities
+    # Only the headers are parsed
+    assert all(activity._digit_inputs is None for activity in activities)
+    assert all(
+        challenge._events is None
+        for activity in activities
+        for challenge in activity.challenges
+    )
+    assert game_session.screen_calibration._digit_inputs is None
+
+    # A copy without video keeps the digit inputs to parse
+    assert activities[0].copy()._digit_inputs is None
+    assert len(activities[0].digit_inputs) > 0
+    assert activities[0]._digit_inputs_payload is None
+
+    assert game_session == GameSession.from_json(path)
+    pd.testing.assert_frame_equal(
+        game_session.to_dataframe(), GameSession.from_json(path).to_dataframe()
+    )
+
+
+def test_lazy_game_session_invalid_payload():
+    with open(
+        os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+    ) as file:
+        data = json.load(file)
+    activity = data["activities"][0]
+    activity["digit_inputs"][0]["ts"] = 0
+    activity["challenges"][0]["events"].append(
+        {"ts": 0, "event_type": "Common", "result_code": 1}
+    )
+
+    game_session = GameSession.from_dict(data, lazy=True)
+    game_activity = game_session.get_activity(
+        next(iter(game_session.activities)), digit_inputs=False
+    )
+    assert len(game_activity.digit_inputs) == 0
+
+    activity = game_session.sorted_activities[0]
+    with pytest.raises(TypeError, match="Expected a float for 'ts'"):
+        activity.digit_inputs
+    with pytest.raises(TypeError, match="Expected a float for 'ts'"):
+        activity.challenges[0].events
+    with pytest.raises(TypeError, match="Expected a float for 'ts'"):
+        GameSession.from_dict(data)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_trusted_game_session(lazy: bool):
+    with open(
+        os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+    ) as file:
+        data = json.load(file)
+    game_session = GameSession.from_dict(data, lazy=lazy, trusted=True)
+    expected = GameSession.from_dict(data)
+
+    assert game_session == expected
+    pd.testing.assert_frame_equal(game_session.to_dataframe(), expected.to_dataframe())
+    assert game_session.score()[0].equals(expected.score()[0])
+
+    # The types are not checked again
+    data["activities"][0]["digit_inputs"][0]["ts"] = 0
+    assert (
+        GameSession.from_dict(data, lazy=lazy, trusted=True)
+        .sorted_activities[0]
+        .digit_inputs[0]
+        .ts
+        == 0
+    )
+    # The keys of the log cannot set the mode
+    data["activities"][0]["trusted"] = True
+    with pytest.raises(TypeError, match="trusted"):
+        GameSession.from_dict(data, lazy=lazy, trusted=True).sorted_activities
+
+
+def test_game_session_fingerprint():
+    path = os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+    with open(path) as file:
+        data = json.load(file)
+    game_session = GameSession.from_json(path)
+    fingerprint = game_session.fingerprint()
+
+    # The same for every form of the log
+    assert GameSession.from_json(path, lazy=True).fingerprint() == fingerprint
+    assert GameSession.from_dict(data, trusted=True).fingerprint() == fingerprint
+    assert (
+        GameSession.from_raw(json.dumps(data, sort_keys=True, indent=2)).fingerprint()
+        == fingerprint
+    )
+    assert game_session == GameSession.from_json(path)
+    # The sessions can be modified, so they are not hashable
+    with pytest.raises(TypeError):
+        hash(game_session)
+
+    # Any change of the content changes it
+    data["activities"][0]["digit_inputs"][0]["touches"][0]["phase"] = "Moved"
+    other = GameSession.from_dict(data)
+    assert other.fingerprint() != fingerprint
+    assert other != game_session
+    assert other.screen_calibration == game_session.screen_calibration
+    assert other.sorted_activities[0] != game_session.sorted_activities[0]
+    assert (
+        other.sorted_activities[0].challenges
+        == game_session.sorted_activities[0].challenges
+    )
+
+
+def test_game_session_mutated():
+    path = os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+    pristine = GameSession.from_json(path)
+    for lazy in (False, True):
+        game_session = GameSession.from_json(path, lazy=lazy)
+        # Compared once before being modified
+        assert game_session == pristine
+        fingerprint = game_session.fingerprint()
+
+        del game_session.activities[game_session.sorted_activities[-1].game_name]
+        assert game_session != pristine
+        assert game_session.fingerprint() != fingerprint
+
+        game_session = GameSession.from_json(path, lazy=lazy)
+        activity = game_session.sorted_activities[0]
+        challenge = activity.challenges[0]
+        assert challenge == pristine.sorted_activities[0].challenges[0]
+        assert game_session == pristine
+        challenge.start_ts -= 1
+        assert challenge != pristine.sorted_activities[0].challenges[0]
+        assert activity != pristine.sorted_activities[0]
+        assert game_session != pristine
+        assert game_session.fingerprint() != fingerprint
+
+    # The copies and the merges are compared with their current content too
+    copy = pristine.copy()
+    assert copy == pristine
+    copy.activities = dict(copy.activities)
+    copy.activities.popitem()
+    assert copy != pristine
+    merged = GameSession.merge([GameSession.from_json(path)] * 2)
+    assert merged == pristine
+    merged.screen_calibration.points.pop()
+    assert merged != pristine
+    assert merged.fingerprint() != pristine.fingerprint()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+    binary,
+    longitudinal,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.longitudinal import (
+    iter_students,
+)
+
+DUMMY_DATA = os.path.join(os.path.dirname(__file__), "dummy_data")
+
+
+def test_iter_students(tmp_path):
+    # The sessions of a student, in another order than they were played
+    (tmp_path / "2021").mkdir()
+    for index in range(1, 7):
+        shutil.copy(
+            os.path.join(DUMMY_DATA, f"game_session_{index}.json"),
+            tmp_path / "2021" / f"{7 - index}.json",
+        )
+    shutil.copy(os.path.join(DUMMY_DATA, "2.json"), tmp_path / "other.json")
+    (tmp_path / "notes.txt").write_text("not a log")
+
+    expected = GameSession.from_json(os.path.join(DUMMY_DATA, "test.json"))
+    other = GameSession.from_json(os.path.join(DUMMY_DATA, "2.json"))
+    for workers in (1, 2):
+        students = list(iter_students(tmp_path, workers=workers))
+        assert [student_id for student_id, _ in students] == [
+            expected.student_id,
+            other.student_id,
+        ]
+        assert students[0][1] == expected
+        assert students[1][1] == other
+
+
+def test_iter_students_one_at_a_time(tmp_path, monkeypatch):
+    shutil.copy(os.path.join(DUMMY_DATA, "2.json"), tmp_path / "a.json")
+    for index in range(1, 7):
+        shutil.copy(
+            os.path.join(DUMMY_DATA, f"game_session_{index}.json"),
+            tmp_path / f"{index}.json",
+        )
+    # The same student's logs, in the binary form
+    (tmp_path / "binary").mkdir()
+    for index in (1, 2):
+        with open(os.path.join(DUMMY_DATA, f"game_session_{index}.json")) as file:
+            (tmp_path / "binary" / f"{index}.npz").write_bytes(
+                binary.encode(json.load(file))
+            )
+
+    loaded = []
+    original_load_log = longitudinal.load_log
+
+    def load_log(path, lazy=False):
+        loaded.append(path.name)
+        return original_load_log(path, lazy)
+
+    monkeypatch.setattr(longitudinal, "load_log", load_log)
+    students = longitudinal.iter_students(tmp_path, workers=1)
+    expected = GameSession.from_json(os.path.join(DUMMY_DATA, "test.json"))
+    other = GameSession.from_json(os.path.join(DUMMY_DATA, "2.json"))
+    # Only the logs of the first student are loaded to yield it
+    first = next(students)
+    assert sorted(loaded) == ["1.json", "1.npz", "2.json", "2.npz"] + [
+        f"{index}.json" for index in range(3, 7)
+    ]
+    assert first == (expected.student_id, expected)
+    loaded.clear()
+    assert list(students) == [(other.student_id, other)]
+    assert loaded == ["a.json"]
+
+
+def test_student_id(tmp_path, monkeypatch):
+    with open(os.path.join(DUMMY_DATA, "test.json"), encoding="utf-8") as file:
+        log = json.load(file)
+    # Only the beginning of the log is parsed, when the metadata comes first
+    path = tmp_path / "log.json"
+    path.write_text(json.dumps(log)[: longitudinal.PREFIX_SIZE], encoding="utf-8-sig")
+    assert longitudinal._student_id(path) == log["student_id"]
+    # The whole log is parsed otherwise
+    monkeypatch.setattr(longitudinal, "PREFIX_SIZE", 64)
+    path.write_text(
+        json.dumps({"activities": log["activities"], "student_id": "last"}),
+        encoding="utf-8",
+    )
+    assert longitudinal._student_id(path) == "last"
+    path.write_text(json.dumps({"soft_version": 1234, "student_id": "cut"}))
+    for size in range(1, 50):
+        monkeypatch.setattr(longitudinal, "PREFIX_SIZE", size)
+        assert longitudinal._student_id(path) == "cut"
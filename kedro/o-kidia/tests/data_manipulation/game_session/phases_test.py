@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.enums import (
+    PhaseEnum,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.phases import (
+    segment_phases,
+)
+
+DUMMY_DATA = os.path.join(os.path.dirname(__file__), "dummy_data")
+
+
+def load_log(name: str) -> dict:
+    with open(os.path.join(DUMMY_DATA, name), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_segment_phases():
+    phases = GameSession.from_dict(load_log("test.json"))._phases_dataframe()
+    assert list(phases.columns) == [
+        "activity",
+        "challenge",
+        "phase",
+        "start_ts",
+        "end_ts",
+    ]
+    assert list(phases["activity"][:2]) == ["ScreenCalib", "MainMenu"]
+    menus = phases["activity"].isin(["ScreenCalib", "MainMenu"])
+    assert phases["phase"][menus].isna().all()
+    # Each challenge has a reading (or demo) phase, then a playing (or
+    # training) phase starting when the reading phase ends
+    challenges = phases[~menus]
+    assert set(challenges["phase"]) <= set(PhaseEnum)
+    assert (challenges["start_ts"] <= challenges["end_ts"]).all()
+    started = challenges["phase"].isin([PhaseEnum.PLAYING, PhaseEnum.TRAINING])
+    assert (
+        challenges["start_ts"][started].to_numpy()
+        == challenges["end_ts"].shift()[started].to_numpy()
+    ).all()
+
+
+def test_segment_phases_cohort():
+    game_sessions = [
+        GameSession.from_dict(load_log(name))
+        for name in ("0.json", "test.json", "1.json")
+    ]
+    phases = segment_phases(game_sessions)
+    expected = pd.concat(
+        [
+            game_session._phases_dataframe().assign(session=session)
+            for session, game_session in enumerate(game_sessions)
+        ],
+        ignore_index=True,
+    )
+    pd.testing.assert_frame_equal(phases, expected[phases.columns])
+
+
+def test_segment_phases_missing_end():
+    log = load_log("test.json")
+    challenge = log["activities"][0]["challenges"][0]
+    challenge["events"] = [
+        event
+        for event in challenge["events"]
+        if event.get("result_code") not in (200, 303)
+    ]
+    with pytest.raises(ValueError, match="Missing start or end event"):
+        GameSession.from_dict(log)._phases_dataframe()
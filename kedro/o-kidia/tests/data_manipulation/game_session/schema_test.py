@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.exceptions import (
+    ChallengeIsTrainingError,
+    DuplicateGameSessionError,
+    TouchInputsEmptyError,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.schema import (
+    validate_game_session,
+)
+from src.okidia.pipelines.load_cmap_dataset.nodes import validate_json
+
+TEST_JSON = os.path.join(os.path.dirname(__file__), "dummy_data", "test.json")
+
+
+def load_test_json() -> dict:
+    with open(TEST_JSON, encoding="utf-8") as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize(
+    "name", ["test.json", "game_session_1.json", "2021_11_09_14_20_56_267.json"]
+)
+def test_valid_game_session(name: str):
+    with open(
+        os.path.join(os.path.dirname(__file__), "dummy_data", name), encoding="utf-8"
+    ) as file:
+        assert validate_game_session(json.load(file)) is None
+
+
+def remove_touches(data: dict) -> None:
+    data["activities"][0]["digit_inputs"][1]["touches"] = []
+
+
+def set_touch_phase(data: dict) -> None:
+    data["activities"][0]["digit_inputs"][2]["touches"][0]["phase"] = 1
+
+
+def set_training(data: dict) -> None:
+    challenge = data["activities"][0]["challenges"][1]
+    challenge["current_challenge"] = 1
+    challenge["training"] = True
+
+
+def remove_student_id(data: dict) -> None:
+    del data["student_id"]
+
+
+def set_game_name(data: dict) -> None:
+    data["activities"][0]["game_name"] = "Unknown"
+
+
+@pytest.mark.parametrize(
+    "mutate,exception,pointer",
+    [
+        (remove_touches, TouchInputsEmptyError, "/activities/0/digit_inputs/1/touches"),
+        (
+            set_touch_phase,
+            TypeError,
+            "/activities/0/digit_inputs/2/touches/0/phase",
+        ),
+        (set_training, ChallengeIsTrainingError, "/activities/0/challenges/1/training"),
+        (remove_student_id, TypeError, ""),
+        (set_game_name, ValueError, "/activities/0/game_name"),
+    ],
+)
+def test_invalid_game_session(mutate, exception: type, pointer: str):
+    data = load_test_json()
+    mutate(data)
+    violation = validate_game_session(data)
+    assert type(violation.error) is exception
+    assert violation.pointer == pointer
+    # The same error as when parsing the log
+    with pytest.raises(exception):
+        GameSession.from_dict(data)
+
+
+def test_validate_json_report():
+    invalid = load_test_json()
+    remove_touches(invalid)
+
+    def invalid_json():
+        raise json.JSONDecodeError("Expecting value", "", 0)
+
+    dataset = {
+        "valid": load_test_json,
+        "invalid": lambda: invalid,
+        "unreadable": invalid_json,
+    }
+    valid_dataset, report = validate_json(dataset, workers=1)
+    assert list(valid_dataset) == ["valid"]
+    assert report["file"].tolist() == ["invalid", "unreadable"]
+    assert report["error_class"].tolist() == [
+        "TouchInputsEmptyError",
+        "JSONDecodeError",
+    ]
+    assert report["path"].tolist() == ["/activities/0/digit_inputs/1/touches", ""]
+
+
+def test_validate_json_duplicates():
+    other = load_test_json()
+    other["activities"][0]["digit_inputs"][0]["ts"] += 1.0
+
+    dataset = {
+        "first": load_test_json,
+        "other": lambda: other,
+        # The same log under another name, with its keys reordered
+        "copy": lambda: json.loads(json.dumps(load_test_json(), sort_keys=True)),
+    }
+    valid_dataset, report = validate_json(dataset, workers=1)
+    assert list(valid_dataset) == ["first", "other"]
+    assert report["file"].tolist() == ["copy"]
+    assert report["error_class"].tolist() == [DuplicateGameSessionError.__name__]
+    assert report["message"].tolist() == ["Same game session as first"]
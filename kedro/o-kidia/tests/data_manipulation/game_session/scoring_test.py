@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.challenge import (
+    CrocosSpotChallenge,
+    CrocosVocabuloChallenge,
+    DJCrocosChallenge,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.scoring import (
+    BATCH_SCORERS,
+    score_challenges,
+)
+
+DUMMY_DATA = os.path.join(os.path.dirname(__file__), "dummy_data")
+
+
+def reference_score(challenge):
+    try:
+        return challenge.score()
+    except Exception as exc:  # pylint: disable=broad-except
+        return exc
+
+
+def assert_same_scores(scores, expected):
+    assert len(scores) == len(expected)
+    for score, expected_score in zip(scores, expected):
+        if isinstance(expected_score, Exception):
+            assert type(score) is type(expected_score)
+            assert score.args == expected_score.args
+        else:
+            assert score == expected_score
+            assert list(map(type, score)) == list(map(type, expected_score))
+
+
+def make_challenge(challenge_type, events):
+    return challenge_type(
+        0.0,
+        float(len(events)),
+        1,
+        False,
+        [
+            {
+                "event_type": "input",
+                "ts": float(ts),
+                "result_code": result_code,
+                "object_name": object_name,
+            }
+            for ts, (result_code, object_name) in enumerate(events)
+        ],
+        activity=None,
+    )
+
+
+@pytest.mark.parametrize(
+    "name", ["test.json", "0.json", "2021_11_09_14_20_56_267.json"]
+)
+def test_batch_scorers_recorded_sessions(name):
+    game_session = GameSession.from_json(os.path.join(DUMMY_DATA, name))
+    challenges = [
+        challenge
+        for activity in game_session.sorted_activities
+        for challenge in activity.challenges
+    ]
+    for challenge_type, scorer in BATCH_SCORERS.items():
+        batch = [c for c in challenges if type(c) is challenge_type]
+        assert batch
+        assert_same_scores(scorer(batch), list(map(reference_score, batch)))
+
+
+def test_batch_scorers_errors():
+    spot = [
+        make_challenge(CrocosSpotChallenge, [(1, "a"), (102, "b"), (4, "b")]),
+        # A right answer removed before being given
+        make_challenge(CrocosSpotChallenge, [(101, "a"), (1, "a"), (4, "b")]),
+    ]
+    vocabulo = [
+        make_challenge(CrocosVocabuloChallenge, [(1, "a"), (1, "a"), (3, "a")]),
+        make_challenge(CrocosVocabuloChallenge, [(2, "a"), (4, "a"), (4, "a")]),
+    ]
+    dj_crocos = [
+        make_challenge(DJCrocosChallenge, [(1, "note"), (302, "note"), (101, "note")]),
+        # A note played during a fifth try
+        make_challenge(DJCrocosChallenge, [(302, "note")] * 5 + [(2, "note")]),
+    ]
+    for challenges in (spot, vocabulo, dj_crocos):
+        scores = BATCH_SCORERS[type(challenges[0])](challenges)
+        assert_same_scores(scores, list(map(reference_score, challenges)))
+        assert not isinstance(scores[0], Exception)
+        assert isinstance(scores[1], Exception)
+
+    challenges = spot + dj_crocos
+    with pytest.raises(KeyError):
+        score_challenges(challenges)
+    assert_same_scores(
+        score_challenges(challenges, raise_errors=False),
+        list(map(reference_score, challenges)),
+    )
+
+
+def test_score_many():
+    game_sessions = [
+        GameSession.from_json(os.path.join(DUMMY_DATA, name))
+        for name in ("0.json", "1.json")
+    ]
+    for scores, game_session in zip(
+        GameSession.score_many(game_sessions), game_sessions
+    ):
+        for table, expected in zip(scores, game_session.score()):
+            assert table.equals(expected)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.enums import (
+    ActivityEnum,
+    PhaseEnum,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.stream import (
+    GameSessionBuilder,
+    to_records,
+)
+
+DUMMY_DATA = os.path.join(os.path.dirname(__file__), "dummy_data")
+
+
+def load_log(name: str) -> dict:
+    with open(os.path.join(DUMMY_DATA, name), encoding="utf-8") as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("name", ["test.json", "0.json", "1.json"])
+def test_game_session_builder(name):
+    log = load_log(name)
+    game_session = GameSession.from_dict(log)
+    builder = GameSessionBuilder()
+    for record in to_records(log):
+        builder.add(record)
+    assert builder.activity is None and builder.challenge is None
+    assert builder.to_game_session() == game_session
+    for table, expected in zip(builder.score(), game_session.score()):
+        pd.testing.assert_frame_equal(table, expected)
+    pd.testing.assert_frame_equal(
+        builder.response_times(), game_session.response_times()
+    )
+
+
+def test_game_session_builder_live():
+    log = load_log("test.json")
+    game_session = GameSession.from_dict(log)
+    builder = GameSessionBuilder()
+    phases = []
+    for record in to_records(log):
+        builder.add(record)
+        if record["record"] == "event" and builder.activity == ActivityEnum.DJ_CROCOS:
+            phases.append(builder.phase)
+            if builder.challenge == 1:
+                # The score of the challenge being played is that of its
+                # events received so far
+                activity = game_session.activities[ActivityEnum.DJ_CROCOS]
+                challenge = builder.activities[ActivityEnum.DJ_CROCOS].challenges[-1]
+                partial = type(activity.challenges[1])(
+                    **challenge.to_dict(), activity=activity
+                )
+                _, scores = builder.score()
+                assert scores["score"].iloc[-1] == partial.score()[0]
+    assert PhaseEnum.DEMO in phases and PhaseEnum.TRAINING in phases
+    assert PhaseEnum.READING in phases and PhaseEnum.PLAYING in phases
+
+    # An open activity, and the challenges it has started so far
+    records = list(to_records(log))
+    end = max(
+        position
+        for position, record in enumerate(records)
+        if record["record"] == "challenge"
+    )
+    builder = GameSessionBuilder()
+    for record in records[: end + 3]:
+        builder.add(record)
+    assert builder.activity is not None and builder.challenge is not None
+    activity = builder.to_dict()["activities"][-1]
+    assert activity["game_name"] == builder.activity.value
+    assert activity["challenges"][-1]["current_challenge"] == builder.challenge
+    # Its video is only received at its end
+    assert builder.activity not in builder.to_game_session().activities
+
+
+def test_game_session_builder_out_of_order():
+    log = load_log("0.json")
+    expected = GameSessionBuilder()
+    builder = GameSessionBuilder()
+    records = list(to_records(log))
+    shuffled = random.Random(0)
+    position = 0
+    while position < len(records):
+        # The events of each challenge received in a random order
+        block = []
+        while position < len(records) and records[position]["record"] == "event":
+            block.append(records[position])
+            position += 1
+        if not block:
+            block.append(records[position])
+            position += 1
+        for record in block:
+            expected.add(record)
+        # The state of a Crocos Maze challenge, without timestamps, stays in
+        # order
+        events = [record for record in block if "ts" in record]
+        shuffled.shuffle(events)
+        for record in [record for record in block if "ts" not in record] + events:
+            builder.add(record)
+    for table, expected_table in zip(builder.score(), expected.score()):
+        pd.testing.assert_frame_equal(table, expected_table)
+    pd.testing.assert_frame_equal(builder.response_times(), expected.response_times())
+
+
+def test_game_session_builder_lines():
+    log = load_log("1.json")
+    lines = [json.dumps(record) + "\n" for record in to_records(log)]
+    builder = GameSessionBuilder.from_lines(lines + ["\n"])
+    assert builder.to_game_session() == GameSession.from_dict(log)
+
+    builder = GameSessionBuilder()
+    with pytest.raises(ValueError):
+        builder.add_line('{"record": "event", "ts": 1.0}')
+    with pytest.raises(ValueError):
+        builder.add({"record": "challenge_end", "end_ts": 1.0})
+    with pytest.raises(ValueError):
+        builder.add({"record": "unknown"})
+    builder.add({"record": "activity", "game_name": "DJCrocos", "start_ts": 1.0})
+    with pytest.raises(TypeError):
+        builder.add(
+            {
+                "record": "challenge",
+                "start_ts": "1",
+                "current_challenge": 0,
+                "training": True,
+            }
+        )
+    with pytest.raises(ValueError):
+        builder.add({"record": "activity", "game_name": "CrocoSpot", "start_ts": 2.0})
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from src.decryption.benchmark import (
+    RESULT_COLUMNS,
+    compare_to_baseline,
+    generate_synthetic_file,
+    parse_size,
+    run_benchmark,
+)
+from src.decryption.cmap_decryption import decrypt_encrypted_file
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [("1024", 1024), ("64K", 1 << 16), ("1.5M", 3 << 19), ("4gb", 1 << 32)],
+)
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+def test_generate_synthetic_file(tmp_path):
+    synthetic_file = generate_synthetic_file(tmp_path, 3 << 19)
+    assert synthetic_file.encrypted_filepath.stat().st_size == (3 << 19) + 16
+    decrypted_filepath = tmp_path / "decrypted.mp4"
+    decrypt_encrypted_file(
+        synthetic_file.encrypted_filepath,
+        synthetic_file.iv_filepath,
+        decrypted_filepath,
+        synthetic_file.encryption_key,
+    )
+    # The PKCS7 padding is kept by the decryption
+    assert decrypted_filepath.read_bytes()[-16:] == b"\x10" * 16
+    # The synthetic file is reused by the next runs
+    assert (
+        generate_synthetic_file(tmp_path, 3 << 19).encryption_key
+        == synthetic_file.encryption_key
+    )
+
+
+def test_run_benchmark(tmp_path):
+    results_df = run_benchmark(
+        tmp_path,
+        [1 << 20],
+        chunk_sizes=[1 << 16],
+        workers=[1, 2],
+        pipelined=[False, True],
+        isolate=False,
+    )
+    assert list(results_df.columns) == RESULT_COLUMNS
+    assert len(results_df) == 2 * 2 * 2 * 2
+    assert (results_df["throughput"] > 0).all()
+    assert (results_df["peak_rss"] > 0).all()
+    assert not list(tmp_path.joinpath("decrypted").iterdir())
+
+    baseline_df = results_df.copy()
+    assert compare_to_baseline(results_df, baseline_df, 0.1).empty
+    baseline_df.loc[0, "throughput"] *= 2
+    regressions = compare_to_baseline(results_df, baseline_df, 0.1)
+    assert len(regressions) == 1
+
+
+def test_run_benchmark_isolated(tmp_path):
+    results_df = run_benchmark(
+        tmp_path,
+        [1 << 20],
+        entry_points=["decrypt_encrypted_file"],
+        backends=["cryptography"],
+    )
+    assert isinstance(results_df, pd.DataFrame)
+    assert len(results_df) == 1
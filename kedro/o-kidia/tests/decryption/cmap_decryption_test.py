@@ -0,0 +1,277 @@
+import hashlib
+import os
+from pathlib import Path
+
+import pandas as pd
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from src.decryption import cmap_decryption
+from src.decryption.cmap_decryption import (
+    DecryptionResult,
+    decrypt_videos,
+    derive_key_and_iv,
+    load_cmap_video_keys,
+    summarize_results,
+    verify_videos,
+)
+from src.decryption.manifest import MANIFEST_FILENAME, DecryptionManifest
+from src.utils.definitions import CMAP_DATASET_COLUMNS
+
+
+def make_cmap_dataset(root: Path, nb_videos: int) -> dict:
+    """Creates a fake C-MAP dataset of nb_videos encrypted videos under root,
+    and returns the plain content of each video by file name."""
+    videos_dir = root.joinpath("S3 files", "videos")
+    rows = []
+    plains = {}
+    for i in range(nb_videos):
+        session_id = f"2021_11_0{i % 3 + 1}_14_20_56_{i:03d}"
+        filename = f"recording_{i}.mp4.enc"
+        session_dir = videos_dir.joinpath(session_id)
+        session_dir.mkdir(parents=True, exist_ok=True)
+        iv_filepath = session_dir.joinpath(f"recording_{i}.iv")
+        iv_filepath.write_text("6273eaf3a83e20e64ecd7bb17d8b836e", encoding="utf-8")
+        encryption_key = os.urandom(32).hex()
+        key, iv = derive_key_and_iv(iv_filepath, encryption_key)
+        # A fake MP4 file, padded with PKCS7 before its encryption
+        plain = (
+            b"\x00\x00\x00\x18ftypmp42"
+            + os.urandom(16 * (1000 + i) - 12 - 5)
+            + b"\x05" * 5
+        )
+        encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+        encrypted = encryptor.update(plain) + encryptor.finalize()
+        session_dir.joinpath(filename).write_bytes(encrypted)
+        tag = "ScreenCalibration" if i % 2 else "CrocosMaze"
+        rows.append([session_id, filename, encryption_key, tag, len(encrypted)])
+        plains[f"{tag}_recording_{i}.mp4"] = plain
+    keys_dir = root.joinpath("Videos keys")
+    keys_dir.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(rows, columns=CMAP_DATASET_COLUMNS).to_csv(
+        keys_dir.joinpath("video_keys.csv"), index=False
+    )
+    return plains
+
+
+def test_decrypt_videos(tmp_path):
+    plains = make_cmap_dataset(tmp_path / "cmap", 6)
+    keys_df = load_cmap_video_keys(tmp_path / "cmap" / "Videos keys" / "video_keys.csv")
+    # One video is missing, the decryption should fail for it only
+    missing = keys_df.iloc[0]
+    tmp_path.joinpath(
+        "cmap", "S3 files", "videos", missing["Session"], missing["Filename"]
+    ).unlink()
+
+    results_df = decrypt_videos(
+        keys_df, tmp_path / "cmap", tmp_path / "out", False, True, workers=3
+    )
+    assert len(results_df) == 6
+    assert (results_df["status"] == DecryptionResult.FAILED).sum() == 1
+    assert (results_df["status"] == DecryptionResult.SUCCESS).sum() == 5
+    for decrypted_filepath in tmp_path.joinpath("out", "decrypted_videos").glob("*/*"):
+        assert decrypted_filepath.read_bytes() == plains[decrypted_filepath.name]
+
+    # Already decrypted videos are skipped when they should not be replaced
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        workers=2,
+        executor="thread",
+    )
+    summary = summarize_results(results_df, 1.0)
+    assert summary.loc[DecryptionResult.SKIPPED, "files"] == 5
+    assert summary.loc[DecryptionResult.FAILED, "files"] == 1
+    assert summary.loc[DecryptionResult.SUCCESS, "bytes_read"] == 0
+
+
+def test_decrypt_videos_os_error(tmp_path, monkeypatch):
+    make_cmap_dataset(tmp_path / "cmap", 4)
+    keys_df = load_cmap_video_keys(tmp_path / "cmap" / "Videos keys" / "video_keys.csv")
+    # An encrypted video that cannot be read: only its decryption fails
+    unreadable = keys_df.iloc[1]
+    encrypted_filepath = tmp_path.joinpath(
+        "cmap", "S3 files", "videos", unreadable["Session"], unreadable["Filename"]
+    )
+    encrypted_filepath.unlink()
+    encrypted_filepath.mkdir()
+
+    results_df = decrypt_videos(
+        keys_df, tmp_path / "cmap", tmp_path / "out", False, False, workers=2
+    )
+    assert len(results_df) == 4
+    failed = results_df[results_df["status"] == DecryptionResult.FAILED]
+    assert list(failed["filename"]) == [unreadable["Filename"]]
+    assert failed["error"].iloc[0].startswith("IsADirectoryError")
+    assert (results_df["status"] == DecryptionResult.SUCCESS).sum() == 3
+    assert not list(tmp_path.joinpath("out").rglob("*.part"))
+
+    # The partial files of the videos that fail once decrypted are removed
+    def replace(src, dst):
+        raise PermissionError(f"Cannot rename {src}")
+
+    monkeypatch.setattr(cmap_decryption.os, "replace", replace)
+    results_df = decrypt_videos(
+        keys_df, tmp_path / "cmap", tmp_path / "other", False, False, workers=1
+    )
+    assert (results_df["status"] == DecryptionResult.FAILED).all()
+    assert not [
+        path for path in tmp_path.joinpath("other").rglob("*") if path.is_file()
+    ]
+
+
+def test_decrypt_videos_with_manifest(tmp_path):
+    plains = make_cmap_dataset(tmp_path / "cmap", 4)
+    keys_df = load_cmap_video_keys(tmp_path / "cmap" / "Videos keys" / "video_keys.csv")
+    manifest_path = tmp_path / "out" / MANIFEST_FILENAME
+
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        manifest=DecryptionManifest(manifest_path),
+    )
+    assert (results_df["status"] == DecryptionResult.SUCCESS).all()
+    manifest = DecryptionManifest(manifest_path)
+    assert len(manifest.entries) == 4
+    for entry in manifest.entries.values():
+        decrypted_filepath = Path(entry.decrypted_filepath)
+        assert (
+            hashlib.sha256(plains[decrypted_filepath.name]).hexdigest() == entry.sha256
+        )
+
+    # Nothing changed: everything is skipped
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        manifest=DecryptionManifest(manifest_path),
+    )
+    assert (results_df["status"] == DecryptionResult.SKIPPED).all()
+
+    # A decrypted video is lost, and an encrypted one is uploaded again:
+    # the lost one is decrypted again, the changed one is only replaced
+    # when files are replaced
+    Path(manifest.entries["/".join(keys_df.iloc[0, :2])].decrypted_filepath).unlink()
+    changed = tmp_path.joinpath("cmap", "S3 files", "videos", *keys_df.iloc[1, :2])
+    os.utime(changed, (0, 0))
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        manifest=DecryptionManifest(manifest_path),
+    )
+    assert (results_df["status"] == DecryptionResult.SUCCESS).sum() == 1
+    assert (results_df["status"] == DecryptionResult.SKIPPED).sum() == 3
+    assert results_df["error"].str.startswith("Changed since").sum() == 1
+    Path(manifest.entries["/".join(keys_df.iloc[0, :2])].decrypted_filepath).unlink()
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        True,
+        True,
+        workers=2,
+        executor="thread",
+        manifest=DecryptionManifest(manifest_path),
+        pipelined=True,
+    )
+    assert (results_df["status"] == DecryptionResult.SUCCESS).sum() == 2
+    assert (results_df["status"] == DecryptionResult.SKIPPED).sum() == 2
+    assert not list(tmp_path.joinpath("out").rglob("*.part"))
+    for entry in DecryptionManifest(manifest_path).entries.values():
+        decrypted_filepath = Path(entry.decrypted_filepath)
+        assert decrypted_filepath.read_bytes() == plains[decrypted_filepath.name]
+
+
+def test_decrypt_videos_adopted_in_manifest(tmp_path):
+    plains = make_cmap_dataset(tmp_path / "cmap", 4)
+    keys_df = load_cmap_video_keys(tmp_path / "cmap" / "Videos keys" / "video_keys.csv")
+    # Videos decrypted without a manifest, one of them being lost since
+    decrypt_videos(keys_df, tmp_path / "cmap", tmp_path / "out", False, True)
+    lost = next(tmp_path.joinpath("out", "decrypted_videos").glob("*/*"))
+    lost.unlink()
+    mtimes = {
+        path: path.stat().st_mtime_ns
+        for path in tmp_path.joinpath("out", "decrypted_videos").glob("*/*")
+    }
+
+    manifest_path = tmp_path / "out" / MANIFEST_FILENAME
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        manifest=DecryptionManifest(manifest_path),
+    )
+    # The decrypted videos are not decrypted again, only recorded
+    assert (results_df["status"] == DecryptionResult.SUCCESS).sum() == 1
+    assert (results_df["status"] == DecryptionResult.SKIPPED).sum() == 3
+    for path, mtime in mtimes.items():
+        assert path.stat().st_mtime_ns == mtime
+    manifest = DecryptionManifest(manifest_path)
+    assert len(manifest.entries) == 4
+    for entry in manifest.entries.values():
+        decrypted_filepath = Path(entry.decrypted_filepath)
+        assert (
+            hashlib.sha256(plains[decrypted_filepath.name]).hexdigest() == entry.sha256
+        )
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        manifest=DecryptionManifest(manifest_path),
+    )
+    assert (results_df["error"] == "Already decrypted (see manifest)").all()
+
+
+def test_verify_videos(tmp_path):
+    make_cmap_dataset(tmp_path / "cmap", 4)
+    keys_df = load_cmap_video_keys(tmp_path / "cmap" / "Videos keys" / "video_keys.csv")
+    manifest_path = tmp_path / "out" / MANIFEST_FILENAME
+    results_df = decrypt_videos(
+        keys_df,
+        tmp_path / "cmap",
+        tmp_path / "out",
+        False,
+        True,
+        manifest=DecryptionManifest(manifest_path),
+    )
+    assert results_df["valid_container"].all()
+    assert results_df["valid_padding"].all()
+
+    # One decrypted video is lost, another one is corrupted
+    manifest = DecryptionManifest(manifest_path)
+    lost, corrupted = (
+        Path(manifest.entries["/".join(keys_df.iloc[i, :2])].decrypted_filepath)
+        for i in range(2)
+    )
+    lost.unlink()
+    with open(corrupted, "r+b") as corrupted_file:
+        corrupted_file.seek(-1, os.SEEK_END)
+        corrupted_file.write(b"\x00")
+
+    results_df = verify_videos(
+        keys_df,
+        tmp_path / "out",
+        workers=2,
+        executor="thread",
+        manifest=manifest,
+    ).set_index("filename")
+    assert results_df.loc[keys_df.iloc[0, 1], "status"] == DecryptionResult.FAILED
+    corrupted_result = results_df.loc[keys_df.iloc[1, 1]]
+    assert corrupted_result["status"] == DecryptionResult.FAILED
+    assert not corrupted_result["valid_padding"]
+    assert corrupted_result["valid_container"]
+    assert (results_df["status"] == DecryptionResult.SUCCESS).sum() == 2
@@ -0,0 +1,97 @@
+import pickle
+import stat
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.decryption import cmap_decryption
+from src.decryption.cmap_decryption import load_video_key_index
+from src.decryption.key_index import INDEX_DIRNAME, VideoKeyIndex, session_date
+from tests.decryption.cmap_decryption_test import make_cmap_dataset
+
+
+def test_session_date():
+    assert session_date("2021_11_09_14_20_56_267") == datetime(2021, 11, 9, 14, 20, 56)
+    assert session_date("not_a_session") is None
+
+
+def test_select(tmp_path):
+    make_cmap_dataset(tmp_path, 6)
+    csv_path = tmp_path / "Videos keys" / "video_keys.csv"
+    index = load_video_key_index(csv_path)
+
+    assert len(index.select()) == 6
+    selected = index.select(sessions=["2021_11_01_14_20_56_000", "unknown"])
+    assert list(selected["Filename"]) == ["recording_0.mp4.enc"]
+    selected = index.select(tags=["ScreenCalibration"])
+    assert list(selected["Filename"]) == [
+        "recording_1.mp4.enc",
+        "recording_3.mp4.enc",
+        "recording_5.mp4.enc",
+    ]
+    selected = index.select(tags=["ScreenCalibration"], since=datetime(2021, 11, 2))
+    assert list(selected["Filename"]) == [
+        "recording_1.mp4.enc",
+        "recording_5.mp4.enc",
+    ]
+    assert index.select(sessions=[], tags=["CrocosMaze"]).empty
+
+
+def test_cache(tmp_path, monkeypatch):
+    make_cmap_dataset(tmp_path, 3)
+    csv_path = tmp_path / "Videos keys" / "video_keys.csv"
+    output_dir = tmp_path / "output"
+    index = load_video_key_index(csv_path, output_dir)
+    cache_dir = output_dir / INDEX_DIRNAME
+    assert cache_dir.is_dir()
+    assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+    # Nothing is written next to the keys file
+    assert list(csv_path.parent.iterdir()) == [csv_path]
+
+    # The keys file is not parsed again while it does not change
+    def load_cmap_video_keys(file_path):
+        raise AssertionError("The keys file is parsed")
+
+    monkeypatch.setattr(cmap_decryption, "load_cmap_video_keys", load_cmap_video_keys)
+    cached = load_video_key_index(csv_path, output_dir)
+    assert isinstance(cached.columns["Encryption key"], np.memmap)
+    pd.testing.assert_frame_equal(cached.select(), index.select())
+    pd.testing.assert_frame_equal(
+        cached.select(tags=["ScreenCalibration"], since=datetime(2021, 11, 2)),
+        index.select(tags=["ScreenCalibration"], since=datetime(2021, 11, 2)),
+    )
+    assert list(cached.select(sessions=["2021_11_01_14_20_56_000"])["Filename"]) == [
+        "recording_0.mp4.enc"
+    ]
+    monkeypatch.undo()
+
+    # The cache is invalidated when the keys file changes
+    make_cmap_dataset(tmp_path, 4)
+    assert VideoKeyIndex.from_cache(cache_dir, csv_path) is None
+    assert len(load_video_key_index(csv_path, output_dir).select()) == 4
+    assert len(VideoKeyIndex.from_cache(cache_dir, csv_path)) == 4
+
+
+def test_cache_best_effort(tmp_path):
+    make_cmap_dataset(tmp_path, 3)
+    csv_path = tmp_path / "Videos keys" / "video_keys.csv"
+    output_dir = tmp_path / "output"
+    cache_dir = output_dir / INDEX_DIRNAME
+    load_video_key_index(csv_path, output_dir)
+
+    # A corrupted cache, or a pickle planted in its place, is ignored
+    for content in (b"", b"not a cache", pickle.dumps(np.arange(3))):
+        cache_dir.joinpath("session_positions.npy").write_bytes(content)
+        assert VideoKeyIndex.from_cache(cache_dir, csv_path) is None
+        assert len(load_video_key_index(csv_path, output_dir).select()) == 3
+        assert VideoKeyIndex.from_cache(cache_dir, csv_path) is not None
+    cache_dir.joinpath("header.json").unlink()
+    assert VideoKeyIndex.from_cache(cache_dir, csv_path) is None
+
+    # A cache that cannot be written is skipped
+    blocked_dir = tmp_path / "blocked"
+    blocked_dir.write_text("not a directory")
+    index = load_video_key_index(csv_path)
+    assert not index.save(blocked_dir / INDEX_DIRNAME, csv_path)
+    assert len(load_video_key_index(csv_path, blocked_dir).select()) == 3
@@ -0,0 +1,73 @@
+import io
+import os
+
+import pytest
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from kedro.io.core import DataSetError
+
+from src.decryption.cmap_decryption import derive_key_and_iv
+from src.decryption.seekable import DecryptedFile, open_decrypted
+from src.decryption.streaming import BACKENDS, BLOCK_SIZE
+from src.okidia.extras.dataset.encrypted_file_dataset import EncryptedFileDataSet
+
+key_test = bytes.fromhex(
+    "e2db8b9e17d0f102d284caea3e687101c7aaf93a0a30cc39467d6c0b0cb0cfac"
+)
+iv_test = bytes.fromhex("6273eaf3a83e20e64ecd7bb17d8b836e")
+
+
+def encrypt(data: bytes, key: bytes = key_test, iv: bytes = iv_test) -> bytes:
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_random_access(backend):
+    plain = os.urandom(BLOCK_SIZE * 500)
+    decrypted = DecryptedFile(io.BytesIO(encrypt(plain)), key_test, iv_test, backend)
+    assert decrypted.size == len(plain)
+    for start, size in [(0, 10), (5, 40), (BLOCK_SIZE * 7, 1), (3001, 777)]:
+        decrypted.seek(start)
+        assert decrypted.read(size) == plain[start : start + size]
+        assert decrypted.tell() == start + size
+    decrypted.seek(-20, os.SEEK_END)
+    assert decrypted.read() == plain[-20:]
+    assert decrypted.read(10) == b""
+
+
+def test_buffered_sequential_read():
+    plain = os.urandom(BLOCK_SIZE * 1000)
+    with open_decrypted(
+        io.BytesIO(encrypt(plain)), key_test, iv_test, buffer_size=100
+    ) as decrypted:
+        chunks = iter(lambda: decrypted.read(333), b"")
+        assert b"".join(chunks) == plain
+
+
+def test_encrypted_file_dataset(tmp_path):
+    iv_filepath = tmp_path / "video.iv"
+    iv_filepath.write_text(iv_test.hex(), encoding="utf-8")
+    encryption_key = os.urandom(32).hex()
+    key, iv = derive_key_and_iv(iv_filepath, encryption_key)
+    plain = os.urandom(BLOCK_SIZE * 100)
+    encrypted_filepath = tmp_path / "video.mp4.enc"
+    encrypted_filepath.write_bytes(encrypt(plain, key, iv))
+
+    dataset = EncryptedFileDataSet(
+        filepath=str(encrypted_filepath),
+        key=encryption_key,
+        iv_filepath=str(iv_filepath),
+    )
+    assert dataset.exists()
+    with dataset.load() as decrypted:
+        decrypted.seek(1000)
+        assert decrypted.read(100) == plain[1000:1100]
+    assert encryption_key not in str(dataset)
+
+    # The iv file is read from the filesystem of the encrypted file
+    with pytest.raises(DataSetError, match="same filesystem"):
+        EncryptedFileDataSet(
+            filepath=str(encrypted_filepath),
+            key=encryption_key,
+            iv_filepath="s3://bucket/video.iv",
+        )
@@ -0,0 +1,155 @@
+import hashlib
+import io
+import os
+
+import pytest
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from src.decryption.cmap_decryption import decrypt_encrypted_file, derive_key_and_iv
+from src.decryption.decryption import FileDecryption
+from src.decryption.streaming import (
+    BACKENDS,
+    BLOCK_SIZE,
+    get_backend,
+    pipelined_decrypt,
+    stream_decrypt,
+)
+
+key_test = bytes.fromhex(
+    "e2db8b9e17d0f102d284caea3e687101c7aaf93a0a30cc39467d6c0b0cb0cfac"
+)
+iv_test = bytes.fromhex("6273eaf3a83e20e64ecd7bb17d8b836e")
+
+
+def encrypt(data: bytes, key: bytes = key_test, iv: bytes = iv_test) -> bytes:
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return encryptor.update(data) + encryptor.finalize()
+
+
+@pytest.mark.parametrize("backend_name", list(BACKENDS))
+@pytest.mark.parametrize("chunk_size", [BLOCK_SIZE, 100, 4096, 1 << 20])
+def test_stream_decrypt(backend_name, chunk_size):
+    plain = os.urandom(BLOCK_SIZE * 1000)
+    decrypted = io.BytesIO()
+    stats = stream_decrypt(
+        io.BytesIO(encrypt(plain)),
+        decrypted,
+        get_backend(backend_name, key_test, iv_test),
+        chunk_size,
+    )
+    assert decrypted.getvalue() == plain
+    assert stats.bytes_read == stats.bytes_written == len(plain)
+
+
+@pytest.mark.parametrize("backend_name", list(BACKENDS))
+@pytest.mark.parametrize("chunk_size, depth", [(100, 1), (4096, 4)])
+def test_pipelined_decrypt(backend_name, chunk_size, depth):
+    plain = os.urandom(BLOCK_SIZE * 1000)
+    decrypted = io.BytesIO()
+    hasher = hashlib.sha256()
+    stats = pipelined_decrypt(
+        io.BytesIO(encrypt(plain)),
+        decrypted,
+        get_backend(backend_name, key_test, iv_test),
+        chunk_size,
+        hasher,
+        depth,
+    )
+    assert decrypted.getvalue() == plain
+    assert hasher.digest() == hashlib.sha256(plain).digest()
+    assert stats.bytes_read == stats.bytes_written == len(plain)
+    assert stats.bottleneck in ("read", "decrypt", "write")
+
+
+class FailingWriter(io.BytesIO):
+    def write(self, data):
+        if self.tell() > 1000:
+            raise OSError("No space left on device")
+        return super().write(data)
+
+
+def test_pipelined_decrypt_errors():
+    plain = os.urandom(BLOCK_SIZE * 1000)
+    # A failing stage stops the others, and its error is raised
+    with pytest.raises(OSError, match="^No space left.*"):
+        pipelined_decrypt(
+            io.BytesIO(encrypt(plain)),
+            FailingWriter(),
+            get_backend("cryptography", key_test, iv_test),
+            100,
+            depth=2,
+        )
+    with pytest.raises(ValueError):
+        pipelined_decrypt(
+            io.BytesIO(encrypt(plain) + b"\x00" * 5),
+            io.BytesIO(),
+            get_backend("cryptography", key_test, iv_test),
+            100,
+            depth=2,
+        )
+
+
+def test_stream_decrypt_incomplete_block():
+    plain = os.urandom(BLOCK_SIZE * 10)
+    encrypted = encrypt(plain) + b"\x00" * 5
+    # PyCryptodome drops the incomplete trailing block...
+    decrypted = io.BytesIO()
+    stream_decrypt(
+        io.BytesIO(encrypted),
+        decrypted,
+        get_backend("pycryptodome", key_test, iv_test),
+        64,
+    )
+    assert decrypted.getvalue() == plain
+    # ...while cryptography refuses it
+    with pytest.raises(ValueError):
+        stream_decrypt(
+            io.BytesIO(encrypted),
+            io.BytesIO(),
+            get_backend("cryptography", key_test, iv_test),
+            64,
+        )
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="^Unknown decryption backend.*"):
+        get_backend("rot13", key_test, iv_test)
+
+
+def test_decrypt_single_file(tmp_path):
+    plain = os.urandom(BLOCK_SIZE * 4096)
+    encrypted_filepath = tmp_path / "video.okiv"
+    encrypted_filepath.write_bytes(encrypt(plain))
+    decrypted_filepath = tmp_path / "video.mp4"
+    decrypted_filepath.touch()
+    stats = FileDecryption.decrypt_single_file(
+        encrypted_filepath,
+        key_test.hex(),
+        iv_test.hex(),
+        decrypted_filepath,
+        chunk_size=1000,
+    )
+    assert decrypted_filepath.read_bytes() == plain
+    assert stats.bytes_read == len(plain)
+
+
+def test_decrypt_encrypted_file(tmp_path):
+    iv_filepath = tmp_path / "video.iv"
+    iv_filepath.write_text(iv_test.hex() + "\n", encoding="utf-8")
+    encryption_key = os.urandom(32).hex()
+    key, iv = derive_key_and_iv(iv_filepath, encryption_key)
+    plain = os.urandom(BLOCK_SIZE * 4096)
+    encrypted_filepath = tmp_path / "video.mp4.enc"
+    encrypted_filepath.write_bytes(encrypt(plain, key, iv))
+    decrypted_filepath = tmp_path / "video.mp4"
+
+    stats = decrypt_encrypted_file(
+        encrypted_filepath,
+        iv_filepath,
+        decrypted_filepath,
+        encryption_key,
+        1000,
+    )
+    assert decrypted_filepath.read_bytes() == plain
+    assert stats.bytes_written == len(plain)
+    assert stats.throughput > 0
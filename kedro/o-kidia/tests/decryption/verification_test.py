@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from src.decryption.verification import StreamVerifier, verify_file
+
+MP4_HEADER = b"\x00\x00\x00\x18ftypmp42"
+
+
+def padded(data: bytes) -> bytes:
+    padding = 16 - len(data) % 16
+    return data + bytes([padding] * padding)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 16, 4096])
+def test_stream_verifier(chunk_size):
+    data = padded(MP4_HEADER + os.urandom(1000))
+    verifier = StreamVerifier()
+    for i in range(0, len(data), chunk_size):
+        verifier.update(data[i : i + chunk_size])
+    assert verifier.valid_container
+    assert verifier.valid_padding
+    assert verifier.errors() == []
+    assert verifier.size == len(data)
+
+
+@pytest.mark.parametrize(
+    "data, container, padding",
+    [
+        (padded(os.urandom(1000)), False, True),
+        (MP4_HEADER + os.urandom(1004), True, False),
+        (padded(MP4_HEADER + os.urandom(1000))[:-16], True, False),
+        (padded(MP4_HEADER)[:-1], True, False),
+        (b"", False, False),
+    ],
+)
+def test_stream_verifier_errors(data, container, padding):
+    verifier = StreamVerifier()
+    verifier.update(data)
+    assert verifier.valid_container == container
+    assert verifier.valid_padding == padding
+    assert len(verifier.errors()) == (not container) + (not padding)
+
+
+def test_verify_file(tmp_path):
+    data = padded(MP4_HEADER + os.urandom(5000))
+    filepath = tmp_path / "video.mp4"
+    filepath.write_bytes(data)
+    verifier = verify_file(filepath, chunk_size=1000)
+    assert verifier.errors() == []
+    assert verifier.size == len(data)
@@ -0,0 +1,102 @@
+import importlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from kedro.io import DataCatalog, PartitionedDataSet
+from kedro.io.core import DataSetError
+
+from src.okidia.extras.dataset.game_session_dataset import GameSessionDataSet
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session import (
+    GameSession,
+)
+from src.okidia.pipelines.load_cmap_dataset.data_manipulation.game_session.cache import (
+    GameSessionCache,
+)
+
+DUMMY_DATA = os.path.join(
+    os.path.dirname(__file__),
+    os.pardir,
+    "data_manipulation",
+    "game_session",
+    "dummy_data",
+)
+
+PROJECT = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)
+GAME_SESSION = "okidia.pipelines.load_cmap_dataset.data_manipulation.game_session"
+
+
+def load_log(name):
+    with open(os.path.join(DUMMY_DATA, name), encoding="utf-8") as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+@pytest.mark.parametrize("name", ["test.json", "2021_11_09_14_20_56_267.json"])
+def test_save_and_load(tmp_path, name, trusted):
+    log = load_log(name)
+    dataset = GameSessionDataSet((tmp_path / "session.npz").as_posix(), trusted=trusted)
+    assert not dataset.exists()
+    dataset.save(log)
+    assert dataset.exists()
+
+    game_session = dataset.load()
+    expected = GameSession.from_dict(log)
+    assert game_session == expected
+    pd.testing.assert_frame_equal(game_session.to_dataframe(), expected.to_dataframe())
+
+
+def test_invalid_data(tmp_path):
+    dataset = GameSessionDataSet((tmp_path / "session.npz").as_posix())
+    with pytest.raises(DataSetError):
+        dataset.save([])
+
+    buffer = io.BytesIO()
+    header = json.dumps({"format_version": 9}).encode("utf-8")
+    np.savez(buffer, header=np.frombuffer(header, dtype=np.uint8))
+    with pytest.raises(DataSetError, match="Unsupported game session format"):
+        GameSessionDataSet.decode(buffer.getvalue())
+
+
+def test_partitioned_dataset_and_cache(tmp_path):
+    partitions = PartitionedDataSet(
+        path=tmp_path.as_posix(),
+        dataset=GameSessionDataSet,
+        filename_suffix=".npz",
+    )
+    partitions.save({"session": lambda: load_log("test.json")})
+    loaders = partitions.load()
+    assert list(loaders) == ["session"]
+
+    cache = GameSessionCache()
+    game_session = cache.get("session", loaders["session"])
+    assert game_session == GameSession.from_dict(load_log("test.json"))
+    assert cache.get("session", loaders["session"]) is game_session
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_catalog_dataset(tmp_path, monkeypatch):
+    # Like kedro run, the catalog and the nodes import the okidia package from
+    # src, not the src package used by the other tests
+    monkeypatch.syspath_prepend(os.path.join(PROJECT, "src"))
+    with open(os.path.join(PROJECT, "conf", "base", "catalog.yml")) as file:
+        config = yaml.safe_load(file)["validated_json_dataset"]
+    catalog = DataCatalog.from_config(
+        {"validated_json_dataset": {**config, "path": tmp_path.as_posix()}}
+    )
+    catalog.save("validated_json_dataset", {"session": load_log("test.json")})
+    loaders = catalog.load("validated_json_dataset")
+
+    cache = importlib.import_module(f"{GAME_SESSION}.cache")
+    cohort = importlib.import_module(f"{GAME_SESSION}.cohort")
+    game_session = cache.load_game_session("session", loaders["session"])
+    expected = GameSession.from_dict(load_log("test.json"))
+    assert type(game_session).__module__.startswith("okidia.")
+    assert game_session.fingerprint() == expected.fingerprint()
+    table = cohort.score_cohort(loaders, workers=1)
+    assert table["error"].isna().all()
+    assert len(table) == len(expected.activities) + len(expected.scored_challenges())
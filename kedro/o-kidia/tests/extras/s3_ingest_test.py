@@ -0,0 +1,110 @@
+import json
+import os
+
+import fsspec
+import pytest
+from fsspec.implementations.local import LocalFileSystem
+
+from src.okidia.extras.dataset.pipeline_test_dataset import PipelineTestDataset
+from src.okidia.extras.dataset.s3_ingest import ConcurrentDownloader, file_etag
+
+
+def make_archive(root, nb_days=3, nb_passations=4):
+    """Creates a fake archive of JSON passations, one folder per day."""
+    passations = {}
+    for day in range(nb_days):
+        day_dir = root / f"2022_03_0{day + 1}"
+        day_dir.mkdir(parents=True)
+        for i in range(nb_passations):
+            passation = {"day": day, "passation": i}
+            day_dir.joinpath(f"passation_{i}.json").write_text(json.dumps(passation))
+            passations[f"2022_03_0{day + 1}/passation_{i}"] = passation
+        day_dir.joinpath("notes.txt").write_text("not a passation")
+    return passations
+
+
+class CountingFileSystem(LocalFileSystem):
+    """A local filesystem that counts the downloads."""
+
+    cachable = False
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.downloads = 0
+
+    def get_file(self, rpath, lpath, **kwargs):
+        self.downloads += 1
+        return super().get_file(rpath, lpath, **kwargs)
+
+
+def test_concurrent_downloader(tmp_path):
+    passations = make_archive(tmp_path / "archive")
+    fs = CountingFileSystem()
+    downloader = ConcurrentDownloader(fs, tmp_path / "cache", max_workers=4)
+    archive = (tmp_path / "archive").as_posix()
+
+    infos = downloader.list_files(archive, ".json")
+    assert len(infos) == len(passations)
+    local_paths = downloader.download(infos)
+    assert fs.downloads == len(passations)
+    for remote_path, local_path in local_paths.items():
+        assert local_path.read_bytes() == open(remote_path, "rb").read()
+
+    # Unchanged files are read from the cache
+    downloader.ingest(archive, ".json")
+    assert fs.downloads == len(passations)
+
+    # A changed file is downloaded again
+    changed = tmp_path / "archive" / "2022_03_01" / "passation_0.json"
+    changed.write_text(json.dumps({"changed": True}))
+    os.utime(changed, (0, 0))
+    local_paths = downloader.ingest(archive, ".json")
+    assert fs.downloads == len(passations) + 1
+    assert json.loads(local_paths[changed.as_posix()].read_text()) == {"changed": True}
+
+
+def test_file_etag():
+    assert file_etag({"ETag": '"abc"', "size": 3}) == "abc"
+    assert file_etag({"size": 3, "mtime": 12.5}) == "3-12.5"
+
+
+def test_pipeline_test_dataset(tmp_path):
+    passations = make_archive(tmp_path / "archive")
+    dataset = PipelineTestDataset(
+        "key",
+        "secret",
+        path=(tmp_path / "archive").as_posix(),
+        cache_dir=str(tmp_path / "cache"),
+        max_workers=4,
+    )
+    loaded = dataset.load()
+    assert loaded.keys() == passations.keys()
+    assert {partition_id: load() for partition_id, load in loaded.items()} == passations
+    assert list(tmp_path.joinpath("cache").rglob("*.json"))
+
+
+def test_pipeline_test_dataset_s3(tmp_path, moto_server):
+    passations = make_archive(tmp_path / "archive")
+    fs = fsspec.filesystem(
+        "s3",
+        key="key",
+        secret="secret",
+        client_kwargs={"endpoint_url": moto_server},
+        skip_instance_cache=True,
+    )
+    fs.mkdir("archives")
+    fs.put(
+        (tmp_path / "archive").as_posix(),
+        "archives/TestData/S3 files",
+        recursive=True,
+    )
+
+    dataset = PipelineTestDataset(
+        "key",
+        "secret",
+        endpoint_url=moto_server,
+        cache_dir=str(tmp_path / "cache"),
+        max_workers=4,
+    )
+    loaded = dataset.load()
+    assert {partition_id: load() for partition_id, load in loaded.items()} == passations
@@ -0,0 +1,123 @@
+import json
+import os
+
+import fsspec
+import pytest
+from kedro.io.core import DataSetError
+
+from src.okidia.extras.dataset.test_passation import TestPassation
+
+
+def write_passation(path, size=100):
+    passation = {"screenCalibration": [], "label": "é" * size}
+    path.write_text(json.dumps(passation, ensure_ascii=False), "utf-8")
+    return passation
+
+
+def test_load_and_cache(tmp_path, mocker):
+    passation = write_passation(tmp_path / "passation.json", 1000)
+    dataset = TestPassation(
+        (tmp_path / "passation.json").as_posix(),
+        cache_dir=str(tmp_path / "cache"),
+        block_size=64,
+    )
+    assert dataset.load() == passation
+    assert list(tmp_path.joinpath("cache").rglob("passation.json"))
+
+    # Reloaded from the cache, without reading the remote file
+    remote_open = mocker.spy(dataset._fs, "open")
+    assert dataset.load() == passation
+    remote_open.assert_not_called()
+
+    # Downloaded again once changed
+    changed = write_passation(tmp_path / "passation.json", 10)
+    os.utime(tmp_path / "passation.json", (0, 0))
+    assert dataset.load() == changed
+    remote_open.assert_called_once()
+
+
+def test_load_byte_order_mark(tmp_path):
+    passation = {"label": "éà€"}
+    (tmp_path / "passation.json").write_text(json.dumps(passation), "utf-8-sig")
+    dataset = TestPassation(
+        (tmp_path / "passation.json").as_posix(),
+        cache_dir=str(tmp_path / "cache"),
+        block_size=3,
+    )
+    assert dataset.load() == passation
+
+
+def test_offline(tmp_path):
+    write_passation(tmp_path / "passation.json")
+    filepath = (tmp_path / "passation.json").as_posix()
+    offline = TestPassation(filepath, cache_dir=str(tmp_path / "cache"), offline=True)
+    assert not offline.exists()
+    with pytest.raises(DataSetError, match=".*offline mode"):
+        offline.load()
+
+    passation = TestPassation(filepath, cache_dir=str(tmp_path / "cache")).load()
+    (tmp_path / "passation.json").unlink()
+    assert offline.exists()
+    assert offline.load() == passation
+
+
+def test_cache_size(tmp_path):
+    datasets = []
+    for i in range(3):
+        write_passation(tmp_path / f"passation_{i}.json", 1000)
+        datasets.append(
+            TestPassation(
+                (tmp_path / f"passation_{i}.json").as_posix(),
+                cache_dir=str(tmp_path / "cache"),
+                cache_size=5000,
+            )
+        )
+    datasets[0].load()
+    datasets[1].load()
+    # passation_0 is used again, passation_1 is the least recently used
+    os.utime(datasets[1]._cache.local_path(str(datasets[1]._filepath)), (0, 0))
+    datasets[0].load()
+    datasets[2].load()
+    cached = sorted(path.name for path in tmp_path.joinpath("cache").rglob("*.json"))
+    assert cached == ["passation_0.json", "passation_2.json"]
+    assert datasets[0]._cache.size() <= 5000
+
+
+def test_invalid_passation(tmp_path):
+    (tmp_path / "passation.json").write_text("{not json", "utf-8")
+    dataset = TestPassation(
+        (tmp_path / "passation.json").as_posix(), cache_dir=str(tmp_path / "cache")
+    )
+    with pytest.raises(DataSetError):
+        dataset.load()
+    assert not list(tmp_path.joinpath("cache").rglob("passation.json*"))
+    with pytest.raises(DataSetError, match=".*read-only.*"):
+        dataset.save({})
+
+
+def test_load_s3(tmp_path, moto_server):
+    passation = write_passation(tmp_path / "passation.json", 1000)
+    fs_args = {
+        "key": "key",
+        "secret": "secret",
+        "client_kwargs": {"endpoint_url": moto_server},
+    }
+    fs = fsspec.filesystem("s3", skip_instance_cache=True, **fs_args)
+    fs.mkdir("archives")
+    fs.put_file((tmp_path / "passation.json").as_posix(), "archives/passation.json")
+
+    dataset = TestPassation(
+        "s3://archives/passation.json",
+        fs_args=fs_args,
+        cache_dir=str(tmp_path / "cache"),
+        block_size=256,
+    )
+    assert dataset.load() == passation
+    assert dataset.load() == passation
+    offline = TestPassation(
+        "s3://archives/passation.json",
+        fs_args=fs_args,
+        cache_dir=str(tmp_path / "cache"),
+        offline=True,
+    )
+    assert offline.load() == passation